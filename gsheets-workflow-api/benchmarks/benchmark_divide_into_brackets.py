@@ -0,0 +1,119 @@
+"""
+Benchmark of dividing the answers to slider questions into brackets.
+
+Compares the current numpy divide_into_brackets with the previous pd.cut and
+groupby implementation, for sliders of various ranges with 100k answers each,
+checking that both give the same labels and answer counts. Run with:
+
+    python -m benchmarks.benchmark_divide_into_brackets
+"""
+import warnings
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.utils import timed
+from lib.mapping.choicify_question import (
+    NUMBER_OF_SIMULATED_CHOICES,
+    divide_into_brackets,
+)
+
+ANSWER_COUNT = 100_000
+SLIDER_RANGES = [(0, 100), (1, 10), (0, 5), (-50, 50), (0, 1000), (0, 10000), (7, 7)]
+
+
+def legacy_divide_into_brackets(
+    int_answers: pd.Series, num_brackets: int, min_value: int, max_value: int
+) -> pd.DataFrame:
+    slider_values = pd.Series(data=range(min_value, max_value + 1))
+    slider_bins = pd.cut(slider_values, num_brackets, labels=False, retbins=True)
+    slider_bin_indices = slider_bins[0]
+    slider_bins_min = slider_values.groupby(slider_bin_indices).apply(
+        lambda x: min(list(x))
+    )
+    slider_bins_max = slider_values.groupby(slider_bin_indices).apply(
+        lambda x: max(list(x))
+    )
+    slider_bins_df = pd.DataFrame(
+        {
+            "slider_bins_min": slider_bins_min,
+            "slider_bins_max": slider_bins_max,
+        }
+    )
+    slider_bins_df["slider_bins_label"] = (
+        slider_bins_df["slider_bins_min"].astype(str)
+        + "-"
+        + slider_bins_df["slider_bins_max"].astype(str)
+    )
+    bins = pd.cut(int_answers, bins=slider_bins[1], labels=False, retbins=True)
+    bin_indices = bins[0]
+    binned_int_answers = int_answers.groupby(bin_indices).apply(
+        lambda x: sorted(list(x))
+    )
+    bin_min = int_answers.groupby(bin_indices).apply(lambda x: min(list(x)))
+    bin_max = int_answers.groupby(bin_indices).apply(lambda x: max(list(x)))
+    answer_counts = int_answers.groupby(bin_indices).apply(lambda x: len(x))
+    return pd.DataFrame(
+        {
+            "label": slider_bins_df["slider_bins_label"],
+            "binned_int_answers": binned_int_answers,
+            "bin_min": bin_min,
+            "bin_max": bin_max,
+            "answer_counts": answer_counts,
+        }
+    )
+
+
+def brackets(df: pd.DataFrame) -> List[Tuple[int, str, int]]:
+    """The bracket numbers, labels and answer counts, as used by choicify_question"""
+    return [
+        (int(row_index), label, 0 if pd.isna(answer_count) else int(answer_count))
+        for row_index, label, answer_count in zip(
+            df.index, df["label"], df["answer_counts"]
+        )
+    ]
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    answers = [
+        # Including a few answers outside of the slider range
+        pd.Series(rng.integers(min_value - 2, max_value + 3, ANSWER_COUNT))
+        for min_value, max_value in SLIDER_RANGES
+    ]
+    print(f"{len(SLIDER_RANGES)} sliders with {ANSWER_COUNT} answers each")
+
+    with warnings.catch_warnings():
+        # The groupby apply of the previous implementation warns about group keys
+        warnings.simplefilter("ignore", FutureWarning)
+        legacy_results = timed(
+            "previous",
+            lambda: [
+                legacy_divide_into_brackets(
+                    int_answers, NUMBER_OF_SIMULATED_CHOICES, min_value, max_value
+                )
+                for int_answers, (min_value, max_value) in zip(answers, SLIDER_RANGES)
+            ],
+        )
+    results = timed(
+        "current",
+        lambda: [
+            divide_into_brackets(
+                int_answers, NUMBER_OF_SIMULATED_CHOICES, min_value, max_value
+            )
+            for int_answers, (min_value, max_value) in zip(answers, SLIDER_RANGES)
+        ],
+    )
+
+    for legacy_result, result in zip(legacy_results, results):
+        assert brackets(result) == brackets(legacy_result)
+        pd.testing.assert_frame_equal(
+            result[["bin_min", "bin_max"]].reset_index(drop=True),
+            legacy_result[["bin_min", "bin_max"]].reset_index(drop=True),
+            check_dtype=False,
+        )
+
+
+if __name__ == "__main__":
+    main()
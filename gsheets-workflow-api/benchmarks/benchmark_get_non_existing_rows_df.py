@@ -0,0 +1,121 @@
+"""
+Benchmark of skipping the rows that already exist in a worksheet.
+
+Compares the current set-based get_non_existing_rows_df with the previous
+outer merge implementation, for a survey's worth of new rows against a
+sheet shaped like questions_combo. Run with:
+
+    python -m benchmarks.benchmark_get_non_existing_rows_df
+"""
+import numpy as np
+import pandas as pd
+
+from benchmarks.utils import timed
+from lib.import_mechanics.utils import (
+    get_non_existing_rows_df,
+    stringified_id_set,
+    stringify_id,
+)
+
+EXISTING_ROW_COUNT = 100_000
+NEW_ROW_COUNT = 200
+SURVEY_COUNT = 20
+
+
+def legacy_get_non_existing_rows_df(
+    new_df: pd.DataFrame, existing_df: pd.DataFrame, unique_id_attribute: str
+) -> pd.DataFrame:
+    new_df["_merge_id"] = new_df[unique_id_attribute].dropna().apply(stringify_id)
+    existing_df["_merge_id"] = (
+        existing_df[unique_id_attribute].dropna().apply(stringify_id)
+    )
+    if not existing_df["_merge_id"].dropna().empty:
+        merged_df = pd.merge(
+            new_df,
+            existing_df,
+            on=["_merge_id"],
+            how="outer",
+            indicator=True,
+            suffixes=("", "_existing"),
+        )
+        res = merged_df.loc[merged_df["_merge"] == "left_only", new_df.columns].drop(
+            columns=["_merge_id"]
+        )
+    else:
+        res = new_df.drop(columns=["_merge_id"])
+    return res
+
+
+def sheet_df(question_ids: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "survey_id": question_ids // 100,
+            "survey_question_id": question_ids,
+            "question_text": [f"Question {id}" for id in question_ids],
+            "response_count": np.full(len(question_ids), 1000),
+        }
+    )
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    existing_df = sheet_df(np.arange(EXISTING_ROW_COUNT) + 100_000_000)
+    # Half of the rows of each survey already exist
+    new_dfs = [
+        sheet_df(
+            np.concatenate(
+                [
+                    rng.choice(existing_df["survey_question_id"], NEW_ROW_COUNT // 2),
+                    np.arange(NEW_ROW_COUNT // 2) + 200_000_000 + survey * 1000,
+                ]
+            )
+        ).astype({"survey_question_id": str})
+        for survey in range(SURVEY_COUNT)
+    ]
+    print(
+        f"{SURVEY_COUNT} surveys of {NEW_ROW_COUNT} rows against "
+        f"{EXISTING_ROW_COUNT} existing rows"
+    )
+
+    legacy_results = timed(
+        "previous",
+        lambda: [
+            legacy_get_non_existing_rows_df(
+                new_df.copy(), existing_df.copy(), "survey_question_id"
+            )
+            for new_df in new_dfs
+        ],
+    )
+    results = timed(
+        "current",
+        lambda: [
+            get_non_existing_rows_df(new_df, existing_df, "survey_question_id")
+            for new_df in new_dfs
+        ],
+    )
+
+    def with_existing_ids() -> list:
+        existing_ids = stringified_id_set(existing_df["survey_question_id"])
+        return [
+            get_non_existing_rows_df(
+                new_df, existing_df, "survey_question_id", existing_ids
+            )
+            for new_df in new_dfs
+        ]
+
+    reused_results = timed("current, reusing the existing ids", with_existing_ids)
+
+    for legacy_result, result, reused_result in zip(
+        legacy_results, results, reused_results
+    ):
+        # The outer merge sorts the rows by id
+        pd.testing.assert_frame_equal(
+            result.sort_values("survey_question_id", ignore_index=True),
+            legacy_result.sort_values("survey_question_id", ignore_index=True),
+            check_dtype=False,
+        )
+        pd.testing.assert_frame_equal(reused_result, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark of the formula row number rewriting in GsheetsWorksheetData.
+
+Compares the current implementation with the previous row-wise df.apply
+implementation on a sheet shaped like topline_combo. Run with:
+
+    python -m benchmarks.benchmark_gsheets_worksheet_data
+"""
+import re
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.utils import timed
+from lib.gsheets.gsheets_worksheet_data import GsheetsWorksheetData
+
+ROW_COUNT = 50_000
+TEXT_COLUMN_COUNT = 10
+FORMULA_COLUMN_COUNT = 3
+
+
+def legacy_replace_current_row_numbers_in_formulas(
+    data: GsheetsWorksheetData, df: pd.DataFrame
+) -> pd.DataFrame:
+    df = df.copy()
+    df["__row_number"] = np.arange(len(df)) + data.header_row_number + 2
+
+    def replace_current_row_numbers(row: dict) -> dict:
+        for col_name in df.columns:
+            if col_name == "__row_number":
+                continue
+            value = row[col_name]
+            if isinstance(value, str) and len(value) > 0 and value[0] == "=":
+                row[col_name] = re.sub(
+                    r"([A-Z]+)" + str(row["__row_number"]),
+                    r"\1" + data.row_number_placeholder_in_formulas,
+                    value,
+                )
+        return row
+
+    df = df.apply(replace_current_row_numbers, axis=1)
+    return df.drop(columns=["__row_number"])
+
+
+def legacy_restore_current_row_numbers_in_formulas(
+    data: GsheetsWorksheetData, df: pd.DataFrame
+) -> pd.DataFrame:
+    df = df.copy()
+    df["__row_number"] = np.arange(len(df)) + data.header_row_number + 2
+
+    def restore_current_row_numbers(row: dict) -> dict:
+        for col_name in data.df.columns:
+            if col_name == "__row_number":
+                continue
+            value = row[col_name]
+            if isinstance(value, str) and len(value) > 0 and value[0] == "=":
+                row[col_name] = value.replace(
+                    data.row_number_placeholder_in_formulas,
+                    str(row["__row_number"]),
+                )
+        return row
+
+    df = df.apply(restore_current_row_numbers, axis=1)
+    return df.drop(columns=["__row_number"])
+
+
+def sheet_df(row_count: int) -> pd.DataFrame:
+    row_numbers = np.arange(row_count) + 2
+    columns: Dict[str, Any] = {
+        f"text_{column}": [f"Row {row} text {column}" for row in range(row_count)]
+        for column in range(TEXT_COLUMN_COUNT)
+    }
+    columns["number"] = np.arange(row_count)
+    columns["formula_0"] = [f'=IF(J{row}="","",J{row}*2)' for row in row_numbers]
+    columns["formula_1"] = [
+        f"=COUNTIF(questions_combo!$A$2:$A, A{row})" for row in row_numbers
+    ]
+    columns["formula_2"] = [f"=VLOOKUP(C{row},B$2:D12,3)" for row in row_numbers]
+    return pd.DataFrame(columns)
+
+
+def main() -> None:
+    df = sheet_df(ROW_COUNT)
+    data = GsheetsWorksheetData(df=df.head(0), header_row_number=0)
+    data.df = df
+    print(
+        f"{ROW_COUNT} rows, {len(df.columns)} columns of which {FORMULA_COLUMN_COUNT} formulas"
+    )
+
+    legacy_replaced = timed(
+        "replace, previous",
+        lambda: legacy_replace_current_row_numbers_in_formulas(data, df),
+    )
+    replaced = timed(
+        "replace, current", lambda: data.replace_current_row_numbers_in_formulas(df)
+    )
+    pd.testing.assert_frame_equal(replaced, legacy_replaced)
+
+    data.df = replaced
+    legacy_restored = timed(
+        "restore, previous",
+        lambda: legacy_restore_current_row_numbers_in_formulas(data, replaced),
+    )
+    restored = timed(
+        "restore, current",
+        lambda: data.restore_current_row_numbers_in_formulas(replaced),
+    )
+    pd.testing.assert_frame_equal(restored, legacy_restored)
+    pd.testing.assert_frame_equal(restored, df)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Benchmark of the parsing functions used while marking answers as correct.
+
+Runs the inputs of the test vectors of tests/parsing over and over, as an
+import parses the same answer options, factual answers and survey names once
+per answer. Compares the key normalizer and numeric extraction with the
+previous uncached implementations, and the composite parsing functions with
+their caches cleared before each repetition against warm caches. Finally
+compares matching a topline_combo sized column of answer options one by one
+with answer_option_matches_factual_answer_series. Run with:
+
+    python -m benchmarks.benchmark_parsing
+"""
+import re
+from typing import Any, Callable, List
+
+import pandas as pd
+from unidecode import unidecode
+
+from benchmarks.utils import timed
+from lib.parsing.answer_option_matches_factual_answer import (
+    answer_option_matches_factual_answer,
+    answer_option_matches_factual_answer_series,
+)
+from lib.parsing.chosen_answer_option_distance import (
+    chosen_answer_option_is_this_many_answer_options_away_from_factual_answer,
+)
+from lib.parsing.extract_numerical_parts_of_answer_option import (
+    extract_numerical_parts_of_answer_option,
+    is_numeric,
+    to_float,
+)
+from lib.parsing.key_normalizer_for_slightly_fuzzy_lookups import (
+    key_normalizer_for_slightly_fuzzy_lookups,
+)
+from lib.parsing.parse_survey_name import parse_survey_name
+from lib.parsing.parsing_cache import clear_parsing_caches, log_parsing_cache_stats
+
+REPETITIONS = 2000
+COLUMN_ROW_COUNT = 500_000
+
+# Copies of the inputs of the test vectors of tests/parsing
+LOOKUP_KEYS: List[Any] = [
+    "Foo ",
+    "Fóo*",
+    " Bar",
+    "  Baz  ",
+    " Qux ",
+    " Qux! ",
+    " Qux$ ",
+    " Qux& ",
+    " Qux* ",
+    " Qux+ ",
+    " Qux/ ",
+    " Qux= ",
+    " Qux? ",
+    " Qux@ ",
+    " Qux[ ",
+    " Qux] ",
+    " Qux^ ",
+    " Qux{ ",
+    " Qux} ",
+    " Qux| ",
+    " Qux~ ",
+    " Qux# ",
+    " Qux$ ",
+    " Qux& ",
+    " Qux' ",
+    " Qux` ",
+    " Qux ",
+    1,
+    1.0,
+]
+NUMBERS: List[Any] = [
+    "1",
+    "1.0",
+    "1.",
+    "1,0",
+    "1,",
+    "150,000",
+    "150,000.00",
+    "150,000.00%",
+    "abc%",
+]
+ANSWER_OPTIONS: List[Any] = [
+    False,
+    True,
+    None,
+    None,
+    "",
+    1,
+    1.1,
+    "1",
+    "1.1",
+    "1%",
+    "-1.1",
+    "-1%",
+    "1-1.1",
+    "1-2%",
+    "Abc",
+    "14 pounds",
+    "1000€",
+    "$1",
+    "$14",
+    "$14 billion",
+    "About 10",
+    "Around 150,000",
+    "Yes",
+    "30-40%",
+    "20-30%",
+    "More than 500",
+    "Less than 500",
+    "Between 300 and 700",
+]
+ANSWER_OPTIONS_AND_FACTUAL_ANSWERS: List[Any] = [
+    ("1%", "1%"),
+    ("1%", "1% "),
+    ("1%", "1%,"),
+    ("1%,", "1%"),
+    ('1%"', "1%"),
+    ("1%", "0.01"),
+    ("1%", "0.02"),
+    ("10%", '0.1"'),
+    ("100%", '1"'),
+    ("30-40%", "24%"),
+    ("30-40%", "34%"),
+    ("30-40%", "44%"),
+    ("30-40%", "30%"),
+    ("30-40%", "40%"),
+    ("30-40%", "20%"),
+    ("20-30%", "30%"),
+    ("20-30%", "30.0%"),
+    ("20-30%", "29.9%"),
+    ("14 pounds", "14"),
+    ("14", "14 pounds"),
+    ("15", "14 pounds"),
+]
+CHOSEN_ANSWER_OPTIONS_AND_FACTUAL_ANSWERS: List[Any] = [
+    ("1", ["1", "2", "3"], "1"),
+    ("1", ["1", "2", "3"], "2"),
+    ("1", ["1", "2", "3"], "3"),
+    ("2", ["1", "2", "3"], "1"),
+    ("3", ["1", "2", "3"], "1"),
+    ("10-20%", ["10-20%", "20-30%", "30-40%"], "15%"),
+    ("10-20%", ["10-20%", "20-30%", "30-40%"], "25%"),
+    ("10-20%", ["10-20%", "20-30%", "30-40%"], "35%"),
+    ("20-30%", ["10-20%", "20-30%", "30-40%"], "15%"),
+    ("30-40%", ["10-20%", "20-30%", "30-40%"], "15%"),
+    ("20-30%", ["10-20%", "20-30%", "30-40%"], "30%"),
+    ("10-20%", ["10-20%", "20-30%", "30-40%"], "30%"),
+    ("30-40%", ["10-20%", "20-30%", "30-40%"], "30%"),
+    ("7", ["1", "2", "3", "4", "5", "6", "7"], "1"),
+    ("43%", ["3%", "23%", "43%"], "3%"),
+    ("$50 billion", ["$10 billion", "$30 billion", "$50 billion"], "$10 billion"),
+]
+SURVEY_NAMES: List[Any] = [
+    "World Views 123",
+    "Country Views 123",
+    "Study Survey 123",
+    "Foo 123",
+    "#N/A",
+    "Country Views 383",
+    "Country Views 384",
+    "Country Views 385",
+    "Study 123",
+    "World Views 1",
+    "World Views 80",
+]
+
+
+def legacy_key_normalizer_for_slightly_fuzzy_lookups(lookup_key: Any) -> str:
+    trimmed_lower_cased_without_diacritics = unidecode(str(lookup_key).strip().lower())
+    return re.sub(r"[^a-z0-9%\-.,<> ()]", "", trimmed_lower_cased_without_diacritics)
+
+
+def legacy_is_numeric(n: Any) -> bool:
+    sanitized_n = str(n).replace(",", "")
+    try:
+        float(sanitized_n)
+        return True
+    except ValueError:
+        return False
+
+
+def legacy_extract_numerical_parts_of_answer_option(answer_option: str) -> list:
+    answer_option = legacy_key_normalizer_for_slightly_fuzzy_lookups(
+        str(answer_option).strip().lower()
+    )
+    if legacy_is_numeric(answer_option):
+        return [float(answer_option)]
+    numeric_regex = r"(-?\d[\d.,]*)(%)?(-(\d[\d.,]*)(%)?)?"
+    numeric_match_result = re.search(numeric_regex, answer_option)
+    if numeric_match_result:
+        first_part_number = numeric_match_result.group(1)
+        first_part_is_percentage = numeric_match_result.group(2) == "%"
+        second_part_number = numeric_match_result.group(4)
+        second_part_is_percentage = numeric_match_result.group(5) == "%"
+        if second_part_number:
+            if second_part_is_percentage:
+                first_part_is_percentage = True
+        first_part = to_float(first_part_number, first_part_is_percentage)
+        if not second_part_number:
+            return [first_part]
+        else:
+            second_part = to_float(second_part_number, second_part_is_percentage)
+            return [first_part, second_part]
+    return []
+
+
+def repeated(func: Callable[[], list], clear_caches: bool = False) -> list:
+    results: List[Any] = []
+    for _ in range(REPETITIONS):
+        if clear_caches:
+            clear_parsing_caches()
+        results = func()
+    return results
+
+
+def main() -> None:
+    print(f"{REPETITIONS} repetitions of the test vectors of tests/parsing")
+
+    def key_normalizer_lookups(normalize: Callable[[Any], str]) -> list:
+        return [normalize(lookup_key) for lookup_key in LOOKUP_KEYS]
+
+    def numeric_lookups(
+        check_is_numeric: Callable[[Any], bool], extract: Callable[[Any], list]
+    ) -> list:
+        return [check_is_numeric(n) for n in NUMBERS] + [
+            extract(answer_option) for answer_option in ANSWER_OPTIONS
+        ]
+
+    def composite_lookups() -> list:
+        return (
+            [
+                answer_option_matches_factual_answer(answer_option, factual_answer)
+                for answer_option, factual_answer in (
+                    ANSWER_OPTIONS_AND_FACTUAL_ANSWERS
+                )
+            ]
+            + [
+                chosen_answer_option_is_this_many_answer_options_away_from_factual_answer(
+                    answer_option, answer_options, factual_answer
+                )
+                for answer_option, answer_options, factual_answer in (
+                    CHOSEN_ANSWER_OPTIONS_AND_FACTUAL_ANSWERS
+                )
+            ]
+            + [parse_survey_name(survey_name) for survey_name in SURVEY_NAMES]
+        )
+
+    legacy_keys = timed(
+        "key normalizer, previous",
+        lambda: repeated(
+            lambda: key_normalizer_lookups(
+                legacy_key_normalizer_for_slightly_fuzzy_lookups
+            )
+        ),
+    )
+    keys = timed(
+        "key normalizer, current",
+        lambda: repeated(
+            lambda: key_normalizer_lookups(key_normalizer_for_slightly_fuzzy_lookups)
+        ),
+    )
+    assert keys == legacy_keys
+
+    legacy_numerics = timed(
+        "numeric extraction, previous",
+        lambda: repeated(
+            lambda: numeric_lookups(
+                legacy_is_numeric, legacy_extract_numerical_parts_of_answer_option
+            )
+        ),
+    )
+    numerics = timed(
+        "numeric extraction, current",
+        lambda: repeated(
+            lambda: numeric_lookups(
+                is_numeric, extract_numerical_parts_of_answer_option
+            )
+        ),
+    )
+    assert numerics == legacy_numerics
+
+    cold_results = timed(
+        "composite parsing, caches cleared before each repetition",
+        lambda: repeated(composite_lookups, clear_caches=True),
+    )
+    clear_parsing_caches()
+    warm_results = timed(
+        "composite parsing, warm caches", lambda: repeated(composite_lookups)
+    )
+    assert warm_results == cold_results
+
+    answer_options, factual_answers = zip(*ANSWER_OPTIONS_AND_FACTUAL_ANSWERS)
+    column_repetitions = COLUMN_ROW_COUNT // len(answer_options)
+    answer_options_column = pd.Series(list(answer_options) * column_repetitions)
+    factual_answers_column = pd.Series(list(factual_answers) * column_repetitions)
+    print(f"Matching a column of {len(answer_options_column)} answer options")
+    clear_parsing_caches()
+    row_results = timed(
+        "one by one",
+        lambda: [
+            answer_option_matches_factual_answer(answer_option, factual_answer)
+            for answer_option, factual_answer in zip(
+                answer_options_column, factual_answers_column
+            )
+        ],
+    )
+    clear_parsing_caches()
+    series_results = timed(
+        "as a Series",
+        lambda: answer_option_matches_factual_answer_series(
+            answer_options_column, factual_answers_column
+        ).tolist(),
+    )
+    assert series_results == row_results
+
+    log_parsing_cache_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark of parsing the submitted answers of individual responses.
+
+Compares parsing pages of /responses/bulk results into the full Response
+models, as previously done, with validating only the answers (strict
+validation) and with the default lean parsing. Then compares merging the
+submitted answers of the pages by rebuilding their Answer objects, as
+previously done, with SubmittedAnswers.extend. Run with:
+
+    python -m benchmarks.benchmark_response_parsing
+"""
+from typing import Any, Callable, Dict, List
+
+from benchmarks.utils import timed
+from lib.survey_monkey.api_client import fold_response_page_into_submitted_answers
+from lib.survey_monkey.api_response_wrapper import GenericApiResponse
+from lib.survey_monkey.response import Response
+from lib.survey_monkey.submitted_answers import SubmittedAnswers
+
+RESPONSE_COUNT = 5000
+QUESTION_COUNT = 20
+PER_PAGE = 100
+
+
+def response_item(response_id: str, respondent: int) -> Dict[str, Any]:
+    """A response as listed by /responses/bulk"""
+    return {
+        "id": response_id,
+        "recipient_id": "",
+        "collection_mode": "default",
+        "response_status": "completed",
+        "custom_value": "",
+        "first_name": "",
+        "last_name": "",
+        "email_address": "",
+        "ip_address": "127.0.0.1",
+        "logic_path": {},
+        "metadata": {"contact": {}},
+        "page_path": [],
+        "collector_id": "1",
+        "survey_id": "101",
+        "custom_variables": {},
+        "edit_url": "",
+        "analyze_url": "",
+        "total_time": 10,
+        "date_modified": "2023-01-02T00:00:00",
+        "date_created": "2023-01-02T00:00:00",
+        "href": "",
+        "pages": [
+            {
+                "id": "101-page",
+                "questions": [
+                    {
+                        "id": f"q{question}",
+                        "answers": [
+                            {"choice_id": f"c{question}-{respondent % 5}"},
+                            {"text": str(respondent % 100)},
+                        ],
+                    }
+                    for question in range(QUESTION_COUNT)
+                ],
+            }
+        ],
+    }
+
+
+def response_pages() -> List[GenericApiResponse]:
+    return [
+        GenericApiResponse(
+            data=[
+                response_item(f"r{page}-{respondent}", respondent)
+                for respondent in range(PER_PAGE)
+            ],
+            per_page=PER_PAGE,
+            page=page,
+            total=RESPONSE_COUNT,
+            links={"self": "", "next": None, "last": None},
+        )
+        for page in range(1, RESPONSE_COUNT // PER_PAGE + 1)
+    ]
+
+
+def with_full_response_models(
+    pages: List[GenericApiResponse],
+) -> Dict[str, SubmittedAnswers]:
+    submitted_answers_by_question_id: Dict[str, SubmittedAnswers] = {}
+    for api_response in pages:
+        for item in api_response.data:
+            response = Response(**item)
+            for response_page in response.pages:
+                for question in response_page.questions:
+                    submitted_answers_by_question_id.setdefault(
+                        question.id, SubmittedAnswers()
+                    ).append_response(answer.dict() for answer in question.answers)
+    return submitted_answers_by_question_id
+
+
+def with_fold(
+    pages: List[GenericApiResponse], strict_validation: bool
+) -> Dict[str, SubmittedAnswers]:
+    submitted_answers_by_question_id: Dict[str, SubmittedAnswers] = {}
+    for api_response in pages:
+        fold_response_page_into_submitted_answers(
+            api_response,
+            submitted_answers_by_question_id,
+            strict_validation=strict_validation,
+        )
+    return submitted_answers_by_question_id
+
+
+def legacy_extend(submitted_answers: SubmittedAnswers, other: SubmittedAnswers) -> None:
+    for answers in other:
+        submitted_answers.append_response(answer.dict() for answer in answers)
+
+
+def merged(
+    page_results: List[Dict[str, SubmittedAnswers]],
+    extend: Callable[[SubmittedAnswers, SubmittedAnswers], None],
+) -> Dict[str, SubmittedAnswers]:
+    submitted_answers_by_question_id: Dict[str, SubmittedAnswers] = {}
+    for page_submitted_answers_by_question_id in page_results:
+        for question_id, answers in page_submitted_answers_by_question_id.items():
+            extend(
+                submitted_answers_by_question_id.setdefault(
+                    question_id, SubmittedAnswers()
+                ),
+                answers,
+            )
+    return submitted_answers_by_question_id
+
+
+def compare_parsing(pages: List[GenericApiResponse]) -> Dict[str, SubmittedAnswers]:
+    full_results = timed(
+        "full Response models", lambda: with_full_response_models(pages)
+    )
+    strict_results = timed("strict validation", lambda: with_fold(pages, True))
+    lean_results = timed("lean", lambda: with_fold(pages, False))
+
+    assert strict_results == full_results
+    assert lean_results == full_results
+    return lean_results
+
+
+def compare_merging(
+    pages: List[GenericApiResponse], expected: Dict[str, SubmittedAnswers]
+) -> None:
+    # The submitted answers of each page, as merged per survey
+    page_results = [with_fold([api_response], False) for api_response in pages]
+
+    legacy_merged_results = timed(
+        "merging pages, rebuilding the answers",
+        lambda: merged(page_results, legacy_extend),
+    )
+    merged_results = timed(
+        "merging pages, SubmittedAnswers.extend",
+        lambda: merged(page_results, SubmittedAnswers.extend),
+    )
+    assert legacy_merged_results == expected
+    assert merged_results == expected
+
+
+def main() -> None:
+    pages = response_pages()
+    print(f"{RESPONSE_COUNT} responses to {QUESTION_COUNT} questions")
+    compare_merging(pages, compare_parsing(pages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark of collecting the answer rows of surveys into a dataframe.
+
+Compares the previous concatenation of the answer rows of each question onto
+a new list, followed by a dataframe of asdict rows, with extending one list
+and building the dataframe column by column, for surveys of growing size. Run
+with:
+
+    python -m benchmarks.benchmark_row_accumulation
+"""
+from dataclasses import asdict
+from typing import List
+
+import pandas as pd
+
+from benchmarks.utils import timed
+from lib.gs_combined.schemas import GsAnswerRow
+from lib.import_mechanics.utils import dataclass_rows_to_df
+
+ANSWER_OPTION_COUNT = 5
+QUESTION_COUNTS = [1_000, 4_000, 16_000]
+
+
+def answer_row(question_number: int, option: int) -> GsAnswerRow:
+    """An answer row with distinct values in each column"""
+    key = f"{question_number}:{option}"
+    return GsAnswerRow(
+        survey_id=question_number,
+        survey_name=f"survey_name {key}",
+        survey_question_id=f"survey_question_id {key}",
+        question_number=question_number,
+        question_text=f"question_text {key}",
+        answer=f"answer {key}",
+        correctness_of_answer_option=f"correctness_of_answer_option {key}",
+        auto_marked_correctness_of_answer=(f"auto_marked_correctness_of_answer {key}"),
+        answer_by_percent=f"answer_by_percent {key}",
+        correct_answer_at_time_of_import=f"correct_answer_at_time_of_import {key}",
+        very_wrong_answer_at_time_of_import=(
+            f"very_wrong_answer_at_time_of_import {key}"
+        ),
+        metadata=f"metadata {key}",
+        weighted_by=f"weighted_by {key}",
+    )
+
+
+def answer_rows(question_count: int) -> List[List[GsAnswerRow]]:
+    """The answer rows of each question of a survey"""
+    return [
+        [answer_row(question_number, option) for option in range(ANSWER_OPTION_COUNT)]
+        for question_number in range(question_count)
+    ]
+
+
+def legacy_answers_df(gs_answers_by_question: List[List[GsAnswerRow]]) -> pd.DataFrame:
+    all_gs_answers: List[GsAnswerRow] = []
+    for gs_answers in gs_answers_by_question:
+        all_gs_answers = all_gs_answers + gs_answers
+    return pd.DataFrame(asdict(gs_answer) for gs_answer in all_gs_answers)
+
+
+def answers_df(gs_answers_by_question: List[List[GsAnswerRow]]) -> pd.DataFrame:
+    all_gs_answers: List[GsAnswerRow] = []
+    for gs_answers in gs_answers_by_question:
+        all_gs_answers.extend(gs_answers)
+    return dataclass_rows_to_df(all_gs_answers, GsAnswerRow)
+
+
+def main() -> None:
+    for question_count in QUESTION_COUNTS:
+        gs_answers_by_question = answer_rows(question_count)
+        print(f"{question_count} questions of {ANSWER_OPTION_COUNT} answer options")
+        legacy_result = timed(
+            "  previous", lambda: legacy_answers_df(gs_answers_by_question)
+        )
+        result = timed("  current", lambda: answers_df(gs_answers_by_question))
+        pd.testing.assert_frame_equal(result, legacy_result)
+
+
+if __name__ == "__main__":
+    main()
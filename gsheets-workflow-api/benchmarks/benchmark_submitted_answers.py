@@ -0,0 +1,94 @@
+"""
+Benchmark of holding on to the submitted answers of slider questions.
+
+Compares the memory taken by the previous lists of Answer objects with the
+columnar SubmittedAnswers, and the time taken to read the slider values from
+either. Run with:
+
+    python -m benchmarks.benchmark_submitted_answers
+"""
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.utils import timed
+from lib.survey_monkey.response import Answer
+from lib.survey_monkey.submitted_answers import SubmittedAnswers
+
+RESPONSE_COUNT = 20_000
+QUESTION_COUNT = 10
+
+
+def answer_payloads(question: int, respondent: int) -> List[Dict[str, Any]]:
+    return [{"text": str((respondent * (question + 7)) % 101)}]
+
+
+def measured(label: str, func: Callable[[], Any]) -> Any:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label}: {seconds:.2f}s, {size / 1024 / 1024:.1f} MB")
+    return result
+
+
+def legacy_int_answers(submitted_answers: List[List[Answer]]) -> List[int]:
+    int_answers: List[int] = []
+    for submitted_answer in submitted_answers:
+        if submitted_answer[0].text:
+            int_answers.append(int(submitted_answer[0].text))
+    return int_answers
+
+
+def main() -> None:
+    print(f"{RESPONSE_COUNT} responses to {QUESTION_COUNT} slider questions")
+
+    def as_lists() -> Dict[str, List[List[Answer]]]:
+        return {
+            f"q{question}": [
+                [Answer(**payload) for payload in answer_payloads(question, respondent)]
+                for respondent in range(RESPONSE_COUNT)
+            ]
+            for question in range(QUESTION_COUNT)
+        }
+
+    def as_columns() -> Dict[str, SubmittedAnswers]:
+        submitted_answers_by_question_id: Dict[str, SubmittedAnswers] = {}
+        for question in range(QUESTION_COUNT):
+            submitted_answers = SubmittedAnswers()
+            for respondent in range(RESPONSE_COUNT):
+                submitted_answers.append_response(answer_payloads(question, respondent))
+            submitted_answers_by_question_id[f"q{question}"] = submitted_answers
+        return submitted_answers_by_question_id
+
+    lists = measured("lists of Answer objects", as_lists)
+    columns = measured("SubmittedAnswers", as_columns)
+
+    def read_values(
+        read: Callable[[Any], Any], submitted_answers_by_question_id: Dict[str, Any]
+    ) -> List[Tuple[str, List[int]]]:
+        return [
+            (question_id, list(read(submitted_answers)))
+            for question_id, submitted_answers in (
+                submitted_answers_by_question_id.items()
+            )
+        ]
+
+    legacy_values = timed(
+        "reading slider values from lists",
+        lambda: read_values(legacy_int_answers, lists),
+    )
+    values = timed(
+        "reading slider values from SubmittedAnswers",
+        lambda: read_values(
+            lambda submitted_answers: submitted_answers.first_answer_int_values(),
+            columns,
+        ),
+    )
+    assert values == legacy_values
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import time
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def timed(label: str, func: Callable[[], T]) -> T:
+    """Run func, printing how long it took."""
+    start = time.perf_counter()
+    result = func()
+    print(f"{label}: {time.perf_counter() - start:.2f}s")
+    return result
@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_concurrently(
+    func: Callable[[T], R], items: List[T], max_workers: int
+) -> List[R]:
+    """
+    Apply func to all items using a bounded pool of worker threads.
+
+    Results are returned in the same order as the items. The first exception
+    raised by func (in item order) is re-raised. With max_workers <= 1 the
+    items are processed serially in the calling thread.
+    """
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+def split_max_workers(max_workers: int, item_count: int) -> int:
+    """
+    Share max_workers between the items that map_concurrently processes at once.
+
+    For work that fans out again per item (e.g. prefetching pages of a survey),
+    so that no more than max_workers threads are busy in total.
+    """
+    concurrent_item_count = max(1, min(max_workers, item_count))
+    return max(1, max_workers // concurrent_item_count)
@@ -21,6 +21,14 @@ def read_config() -> dict[str, str]:
         "SERVICE_ACCOUNT_CREDENTIALS",
         "GS_COMBINED_SPREADSHEET_ID",
         "GS_DEV_COMBINED_SPREADSHEET_ID",
+        "SURVEY_MONKEY_API_MAX_WORKERS",
+        "SURVEY_MONKEY_CACHE_DIR",
+        "SURVEY_MONKEY_CACHE_MAX_MEGABYTES",
+        "SURVEY_MONKEY_CACHE_DISABLED",
+        "SURVEY_MONKEY_STRICT_VALIDATION",
+        "SURVEY_CONVERSION_MAX_WORKERS",
+        "GSHEETS_KEY_INDEX_ENABLED",
+        "GSHEETS_KEY_INDEX_DIR",
     ]:
         config[key] = os.getenv(key=key, default="")
     return config
@@ -1,7 +1,11 @@
 from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
 
 from lib.gsheets.gsheets_worksheet_editor import GsheetsWorksheetEditor
 
+if TYPE_CHECKING:
+    from lib.mapping.map_question_ids import ImportedIgnoQuestionsIndex
+
 imported_igno_questions_info_sheet_name = "imported_igno_questions_info"
 combined_questions_sheet_name = "questions_combo"
 combined_topline_sheet_name = "topline_combo"
@@ -73,6 +77,8 @@ class GsSurveyResultsData:
     imported_igno_questions_info: GsheetsWorksheetEditor
     questions_combo: GsheetsWorksheetEditor
     topline_combo: GsheetsWorksheetEditor
+    # See get_imported_igno_questions_index
+    imported_igno_questions_index: Optional["ImportedIgnoQuestionsIndex"] = None
 
 
 # Column specifications like these protects us from having to refactor the code when column names change
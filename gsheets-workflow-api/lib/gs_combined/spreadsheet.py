@@ -1,9 +1,81 @@
+from dataclasses import replace
+from typing import List, Optional, Tuple
+
 from gspread import Spreadsheet
 
 from lib.gdrive.auth import AuthorizedClients
 from lib.gs_combined.schemas import GsSurveyResultsData, attributes_to_columns_maps
+from lib.gsheets.gsheets_key_index import GsheetsKeyIndex
+from lib.gsheets.gsheets_spreadsheet_loader import (
+    GsheetsSpreadsheetLoader,
+    WorksheetSpec,
+)
 from lib.gsheets.gsheets_worksheet_editor import GsheetsWorksheetEditor
 
+surveys_worksheet_spec = WorksheetSpec(
+    worksheet_name="surveys",
+    header_row_number=0,
+    attributes_to_columns_map=attributes_to_columns_maps["gs_combined"]["surveys"],
+)
+imported_igno_questions_info_worksheet_spec = WorksheetSpec(
+    worksheet_name="imported_igno_questions_info",
+    header_row_number=1,
+    attributes_to_columns_map=attributes_to_columns_maps["gs_combined"][
+        "imported_igno_questions"
+    ],
+    evaluate_formulas=True,
+    columns=list(
+        attributes_to_columns_maps["gs_combined"]["imported_igno_questions"].keys()
+    ),
+)
+questions_combo_worksheet_spec = WorksheetSpec(
+    worksheet_name="questions_combo",
+    header_row_number=0,
+    attributes_to_columns_map=attributes_to_columns_maps["gs_combined"][
+        "questions_combo"
+    ],
+)
+topline_combo_worksheet_spec = WorksheetSpec(
+    worksheet_name="topline_combo",
+    header_row_number=0,
+    attributes_to_columns_map=attributes_to_columns_maps["gs_combined"][
+        "topline_combo"
+    ],
+    # Only used to look up which questions already have topline rows
+    columns=["survey_question_id"],
+)
+gs_survey_results_data_worksheet_specs = [
+    imported_igno_questions_info_worksheet_spec,
+    questions_combo_worksheet_spec,
+    topline_combo_worksheet_spec,
+]
+
+
+def gs_survey_results_data_worksheet_specs_with_key_index(
+    key_index: Optional[GsheetsKeyIndex],
+) -> List[WorksheetSpec]:
+    """
+    Without a key index, questions_combo and topline_combo are loaded as per
+    their specs. With one, only their survey_question_id column is loaded
+    (which is all the import needs to skip existing rows, besides the first
+    row of questions_combo), reading only the rows added since the last run.
+    """
+    if key_index is None:
+        return gs_survey_results_data_worksheet_specs
+    return [
+        imported_igno_questions_info_worksheet_spec,
+        replace(
+            questions_combo_worksheet_spec,
+            columns=["survey_question_id"],
+            key_index=key_index,
+        ),
+        replace(
+            topline_combo_worksheet_spec,
+            columns=["survey_question_id"],
+            key_index=key_index,
+        ),
+    ]
+
 
 def get_gs_combined_spreadsheet(
     authorized_clients: AuthorizedClients, gs_combined_spreadsheet_id: str
@@ -17,46 +89,43 @@ def get_gs_combined_spreadsheet(
 def read_surveys_listing(
     gs_combined_spreadsheet: Spreadsheet,
 ) -> GsheetsWorksheetEditor:
-    surveys = GsheetsWorksheetEditor(
-        sh=gs_combined_spreadsheet,
-        worksheet_name="surveys",
-        header_row_number=0,
-        attributes_to_columns_map=attributes_to_columns_maps["gs_combined"]["surveys"],
-    )
-    return surveys
+    loader = GsheetsSpreadsheetLoader(gs_combined_spreadsheet)
+    editors = loader.load_editors([surveys_worksheet_spec])
+    return editors[surveys_worksheet_spec.worksheet_name]
 
 
 def read_gs_survey_results_data(
     gs_combined_spreadsheet: Spreadsheet,
+    key_index: Optional[GsheetsKeyIndex] = None,
 ) -> GsSurveyResultsData:
-
-    imported_igno_questions_info = GsheetsWorksheetEditor(
-        sh=gs_combined_spreadsheet,
-        worksheet_name="imported_igno_questions_info",
-        header_row_number=1,
-        attributes_to_columns_map=attributes_to_columns_maps["gs_combined"][
-            "imported_igno_questions"
-        ],
-        evaluate_formulas=True,
-    )
-    questions_combo = GsheetsWorksheetEditor(
-        sh=gs_combined_spreadsheet,
-        worksheet_name="questions_combo",
-        header_row_number=0,
-        attributes_to_columns_map=attributes_to_columns_maps["gs_combined"][
-            "questions_combo"
-        ],
+    loader = GsheetsSpreadsheetLoader(gs_combined_spreadsheet)
+    editors = loader.load_editors(
+        gs_survey_results_data_worksheet_specs_with_key_index(key_index)
     )
-    topline_combo = GsheetsWorksheetEditor(
-        sh=gs_combined_spreadsheet,
-        worksheet_name="topline_combo",
-        header_row_number=0,
-        attributes_to_columns_map=attributes_to_columns_maps["gs_combined"][
-            "topline_combo"
-        ],
+    return gs_survey_results_data_from_editors(editors)
+
+
+def read_gs_combined_spreadsheet(
+    gs_combined_spreadsheet: Spreadsheet,
+    key_index: Optional[GsheetsKeyIndex] = None,
+) -> Tuple[GsheetsWorksheetEditor, GsSurveyResultsData]:
+    """Read the surveys listing and the survey results data all at once."""
+    loader = GsheetsSpreadsheetLoader(gs_combined_spreadsheet)
+    editors = loader.load_editors(
+        [surveys_worksheet_spec]
+        + gs_survey_results_data_worksheet_specs_with_key_index(key_index)
     )
+    surveys_worksheet_editor = editors[surveys_worksheet_spec.worksheet_name]
+    return surveys_worksheet_editor, gs_survey_results_data_from_editors(editors)
+
+
+def gs_survey_results_data_from_editors(
+    editors: dict,
+) -> GsSurveyResultsData:
     return GsSurveyResultsData(
-        imported_igno_questions_info=imported_igno_questions_info,
-        questions_combo=questions_combo,
-        topline_combo=topline_combo,
+        imported_igno_questions_info=editors[
+            imported_igno_questions_info_worksheet_spec.worksheet_name
+        ],
+        questions_combo=editors[questions_combo_worksheet_spec.worksheet_name],
+        topline_combo=editors[topline_combo_worksheet_spec.worksheet_name],
     )
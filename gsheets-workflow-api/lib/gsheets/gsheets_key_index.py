@@ -0,0 +1,257 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from gspread import Spreadsheet
+from gspread.utils import absolute_range_name, rowcol_to_a1
+
+from lib.app_singleton import app_logger
+from lib.gsheets.gsheets_worksheet_values import (
+    WorksheetValues,
+    WorksheetValuesRequest,
+    column_range,
+    header_column_names,
+)
+
+DEFAULT_KEY_INDEX_DIRECTORY = os.path.join(tempfile.gettempdir(), "gsheets-key-index")
+# The amount of known rows at the end of the column that are read again
+OVERLAP_ROW_COUNT = 20
+# The amount of known rows before those that are read again, spread evenly
+SAMPLE_ROW_COUNT = 10
+
+
+class GsheetsKeyIndex:
+    """
+    A directory of the values of key columns of worksheets that only ever grow,
+    e.g. the survey question ids in questions_combo and topline_combo.
+
+    The values are persisted between runs, so that only the rows added since
+    the last run need to be read. The last known rows, and a sample of the
+    other known rows, are read again along with them. When any of these (or
+    the column header) no longer match, e.g. since rows were removed or
+    sorted, the whole column is read again. Keys repeat in topline_combo, so
+    matching the last known row alone would not tell whether rows moved.
+    """
+
+    directory: str
+
+    def __init__(self, directory: str = DEFAULT_KEY_INDEX_DIRECTORY):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__} (directory={self.directory})"
+
+    def _path(self, spreadsheet_id: str, worksheet_name: str, column: str) -> str:
+        key = f"{spreadsheet_id}|{worksheet_name}|{column}"
+        key_hash = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"keys-{key_hash}.json.gz")
+
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+            keys = entry["keys"]
+            if entry["row_count"] != len(keys) or entry["checksum"] != keys_checksum(
+                keys
+            ):
+                raise ValueError("The keys do not match their row count or checksum")
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            app_logger.warning(
+                "Ignoring unreadable key index {path}: {error}",
+                {"path": path, "error": e},
+            )
+            return None
+
+    def _write(self, path: str, entry: Dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(json.dumps(entry).encode("utf-8")))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def clear(self) -> None:
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json.gz"):
+                os.remove(entry.path)
+
+    def worksheet_values(
+        self, sh: Spreadsheet, request: WorksheetValuesRequest
+    ) -> WorksheetValues:
+        """
+        The values of the one column of the request, plus the first data row in
+        full since it serves as the template for new rows.
+
+        Takes a single values:batchGet call when the index is up to date.
+        """
+        if request.columns is None or len(request.columns) != 1:
+            raise ValueError("A key index is kept for exactly one column")
+        worksheet = request.worksheet
+        first_data_row = request.header_row_number + 2
+        path = self._path(sh.id, worksheet.title, request.columns[0])
+        entry = self._read(path)
+
+        # The header rows and the first data row, the last known rows and the
+        # rows added since, and the sampled known rows
+        ranges = [absolute_range_name(worksheet.title, f"1:{first_data_row}")]
+        overlap_position = 0
+        sample_positions: List[int] = []
+        if entry is not None:
+            overlap_position = max(0, len(entry["keys"]) - OVERLAP_ROW_COUNT)
+            sample_positions = evenly_spaced_positions(
+                overlap_position, SAMPLE_ROW_COUNT
+            )
+            ranges.append(
+                column_range(
+                    worksheet,
+                    entry["column_number"],
+                    first_data_row + overlap_position,
+                )
+            )
+            ranges += [
+                absolute_range_name(
+                    worksheet.title,
+                    rowcol_to_a1(first_data_row + position, entry["column_number"]),
+                )
+                for position in sample_positions
+            ]
+        params = {
+            "valueRenderOption": request.value_render_option,
+            "dateTimeRenderOption": "FORMATTED_STRING",
+        }
+        value_ranges = sh.values_batch_get(ranges, params=params)["valueRanges"]
+
+        top_values = value_ranges[0].get("values", [])
+        column_names = header_column_names(
+            top_values, request.header_row_number, worksheet.col_count
+        )
+        column_number = next(
+            (
+                number
+                for number, column_name in enumerate(column_names, start=1)
+                if request.includes_column(column_name)
+            ),
+            None,
+        )
+        column_numbers = {
+            column_name: number
+            for number, column_name in enumerate(column_names, start=1)
+        }
+        if column_number is None:
+            return WorksheetValues(
+                values=[column_names],
+                header_row_number=0,
+                column_numbers=column_numbers,
+            )
+
+        keys = (
+            added_keys(
+                entry,
+                column_number,
+                overlap_position,
+                column_values(value_ranges[1]),
+                {
+                    position: column_values(value_range)
+                    for position, value_range in zip(sample_positions, value_ranges[2:])
+                },
+            )
+            if entry is not None
+            else None
+        )
+        if keys is None:
+            response = sh.values_batch_get(
+                [column_range(worksheet, column_number, first_data_row)],
+                params=params,
+            )
+            keys = column_values(response["valueRanges"][0])
+            app_logger.info(
+                "Read all {count} keys of worksheet {worksheet_name}",
+                {"count": len(keys), "worksheet_name": worksheet.title},
+            )
+        self._write(
+            path,
+            {
+                "column_number": column_number,
+                "keys": keys,
+                "row_count": len(keys),
+                "checksum": keys_checksum(keys),
+            },
+        )
+
+        # The first data row in full, then the keys only
+        rows = [column_names]
+        for key in keys:
+            if len(rows) == 1 and len(top_values) >= first_data_row:
+                row = list(top_values[first_data_row - 1])
+            else:
+                row = []
+            row += [""] * (column_number - len(row))
+            row[column_number - 1] = key
+            rows.append(row)
+        return WorksheetValues(
+            values=rows, header_row_number=0, column_numbers=column_numbers
+        )
+
+
+def column_values(value_range: Dict[str, Any]) -> List[Any]:
+    return [row[0] if len(row) > 0 else "" for row in value_range.get("values", [])]
+
+
+def keys_checksum(keys: List[Any]) -> str:
+    return hashlib.sha256(json.dumps(keys).encode("utf-8")).hexdigest()
+
+
+def evenly_spaced_positions(count: int, sample_count: int) -> List[int]:
+    """Up to sample_count positions spread evenly over range(count)"""
+    if count <= sample_count:
+        return list(range(count))
+    return sorted(
+        {
+            position * (count - 1) // (sample_count - 1)
+            for position in range(sample_count)
+        }
+    )
+
+
+def added_keys(
+    entry: Dict[str, Any],
+    column_number: int,
+    overlap_position: int,
+    read_keys: List[Any],
+    sampled_keys_by_position: Dict[int, List[Any]],
+) -> Optional[List[Any]]:
+    """
+    All keys, if the keys read again from overlap_position on, and the
+    sampled keys, still line up with the known keys.
+    """
+    if entry["column_number"] != column_number:
+        return None
+    known_keys = entry["keys"]
+    overlap_keys = known_keys[overlap_position:]
+    if read_keys[: len(overlap_keys)] != overlap_keys:
+        return None
+    for position, sampled_keys in sampled_keys_by_position.items():
+        if (sampled_keys[0] if sampled_keys else "") != known_keys[position]:
+            return None
+    return known_keys + read_keys[len(overlap_keys) :]
+
+
+def get_gsheets_key_index(config: Dict[str, str]) -> Optional[GsheetsKeyIndex]:
+    """
+    The key index, if enabled. It is opt-in since the default directory is in
+    the temp directory, which a Cloud Function loses on every cold start.
+    """
+    if config.get("GSHEETS_KEY_INDEX_ENABLED", "").lower() not in ["1", "true", "yes"]:
+        return None
+    return GsheetsKeyIndex(
+        directory=config.get("GSHEETS_KEY_INDEX_DIR") or DEFAULT_KEY_INDEX_DIRECTORY
+    )
@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from gspread import Spreadsheet, Worksheet, WorksheetNotFound
+
+from lib.app_singleton import app_logger
+from lib.gsheets.gsheets_key_index import GsheetsKeyIndex
+from lib.gsheets.gsheets_worksheet_editor import GsheetsWorksheetEditor
+from lib.gsheets.gsheets_worksheet_values import batch_get_worksheet_values
+from lib.gsheets.utils import spreadsheet_url
+
+
+@dataclass
+class WorksheetSpec:
+    worksheet_name: str
+    header_row_number: int
+    attributes_to_columns_map: dict
+    evaluate_formulas: bool = False
+    # Only load these columns (attribute names or column headers), all if None
+    columns: Optional[List[str]] = None
+    # Only fetch and load the worksheet when it is first used
+    lazy: bool = False
+    # Read the one column in columns incrementally
+    key_index: Optional[GsheetsKeyIndex] = None
+
+
+class GsheetsSpreadsheetLoader:
+    """
+    Reads several worksheets of a spreadsheet with as few API calls as possible.
+
+    The metadata of all worksheets is fetched once and cached. The values of
+    the worksheets are fetched with values:batchGet calls, see
+    batch_get_worksheet_values.
+    """
+
+    sh: Spreadsheet
+    _worksheets_by_name: Optional[Dict[str, Worksheet]]
+
+    def __init__(self, sh: Spreadsheet):
+        self.sh = sh
+        self._worksheets_by_name = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__} (sh.id={self.sh.id})"
+
+    def worksheet(self, worksheet_name: str) -> Worksheet:
+        if self._worksheets_by_name is None:
+            self._worksheets_by_name = {
+                worksheet.title: worksheet for worksheet in self.sh.worksheets()
+            }
+        if worksheet_name not in self._worksheets_by_name:
+            raise WorksheetNotFound(worksheet_name)
+        return self._worksheets_by_name[worksheet_name]
+
+    def load_editors(
+        self, worksheet_specs: List[WorksheetSpec]
+    ) -> Dict[str, GsheetsWorksheetEditor]:
+        editors = {
+            spec.worksheet_name: GsheetsWorksheetEditor(
+                sh=self.sh,
+                worksheet_name=spec.worksheet_name,
+                header_row_number=spec.header_row_number,
+                attributes_to_columns_map=spec.attributes_to_columns_map,
+                evaluate_formulas=spec.evaluate_formulas,
+                worksheet=self.worksheet(spec.worksheet_name),
+                columns=spec.columns,
+                lazy=True,
+                key_index=spec.key_index,
+            )
+            for spec in worksheet_specs
+        }
+        self.load(
+            [editors[spec.worksheet_name] for spec in worksheet_specs if not spec.lazy]
+        )
+        return editors
+
+    def load(self, editors: List[GsheetsWorksheetEditor]) -> None:
+        """Load the data of several editors at once."""
+        if len(editors) == 0:
+            return
+        # Editors with a key index read their rows incrementally on their own
+        batched_editors = [editor for editor in editors if editor.key_index is None]
+        all_worksheet_values = batch_get_worksheet_values(
+            self.sh, [editor.values_request() for editor in batched_editors]
+        )
+        for editor, worksheet_values in zip(batched_editors, all_worksheet_values):
+            editor.load(worksheet_values)
+        for editor in editors:
+            if editor.key_index is not None:
+                editor.load()
+        app_logger.info(
+            "Retrieved worksheets {worksheet_names} from "
+            "spreadsheet with URL: {spreadsheet_url}",
+            {
+                "worksheet_names": [editor.worksheet_name for editor in editors],
+                "spreadsheet_url": spreadsheet_url(self.sh.id),
+            },
+        )
@@ -1,10 +1,42 @@
 import re
+from typing import Callable
 
 import numpy as np
 import pandas as pd
 
 from lib.gsheets.utils import inv_dict
 
+# Digits that follow a column letter, i.e. the row number of a cell reference
+row_number_in_cell_reference_pattern = re.compile(r"(?<=[A-Z])\d+")
+
+
+def map_formulas(
+    df: pd.DataFrame, row_numbers: np.ndarray, func: Callable[[str, int], str]
+) -> pd.DataFrame:
+    """
+    Apply func(formula, row_number) to all cells that contain a formula.
+
+    Works column by column, and only on text columns that contain formulas.
+    """
+    df = df.copy()
+    for column_position in range(df.shape[1]):
+        column = df.iloc[:, column_position]
+        if column.dtype != object:
+            continue
+        values = column.to_numpy()
+        formula_positions = [
+            position
+            for position, value in enumerate(values)
+            if isinstance(value, str) and value[:1] == "="
+        ]
+        if not formula_positions:
+            continue
+        values = values.copy()
+        for position in formula_positions:
+            values[position] = func(values[position], row_numbers[position])
+        df.iloc[:, column_position] = values
+    return df
+
 
 class GsheetsWorksheetData:
     row_number_placeholder_in_formulas = "[[CURRENT_ROW]]"
@@ -24,45 +56,51 @@ class GsheetsWorksheetData:
         self.df = self.replace_current_row_numbers_in_formulas(renamed_df)
 
     def replace_current_row_numbers_in_formulas(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        df["__row_number"] = np.arange(len(df)) + self.header_row_number + 2
-
-        def replace_current_row_numbers(row: dict) -> dict:
-            for col_name in df.columns:
-                if col_name == "__row_number":
-                    continue
-                value = row[col_name]
-                if isinstance(value, str) and len(value) > 0 and value[0] == "=":
-                    row[col_name] = re.sub(
-                        r"([A-Z]+)" + str(row["__row_number"]),
-                        r"\1" + self.row_number_placeholder_in_formulas,
-                        value,
-                    )
-            return row
-
-        df = df.apply(replace_current_row_numbers, axis=1)
-        return df.drop(columns=["__row_number"])
-
-    def restore_current_row_numbers_in_formulas(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        df["__row_number"] = np.arange(len(df)) + self.header_row_number + 2
-
-        def restore_current_row_numbers(row: dict) -> dict:
-            for col_name in self.df.columns:
-                if col_name == "__row_number":
-                    continue
-                value = row[col_name]
-                if isinstance(value, str) and len(value) > 0 and value[0] == "=":
-                    row[col_name] = value.replace(
-                        self.row_number_placeholder_in_formulas,
-                        str(row["__row_number"]),
+        row_numbers = np.arange(len(df)) + self.header_row_number + 2
+
+        def replace_current_row_number(formula: str, row_number: int) -> str:
+            row_number_str = str(row_number)
+            if row_number_str not in formula:
+                return formula
+
+            # Cell references like A12 on row 12 become A[[CURRENT_ROW]], note
+            # that only the start of the digits has to match (A123 becomes
+            # A[[CURRENT_ROW]]3 on row 12)
+            def replace_reference(match: re.Match) -> str:
+                digits = match.group(0)
+                if digits.startswith(row_number_str):
+                    return (
+                        self.row_number_placeholder_in_formulas
+                        + digits[len(row_number_str) :]
                     )
-            return row
+                return digits
 
-        df = df.apply(restore_current_row_numbers, axis=1)
-        return df.drop(columns=["__row_number"])
+            return row_number_in_cell_reference_pattern.sub(replace_reference, formula)
+
+        return map_formulas(df, row_numbers, replace_current_row_number)
+
+    def restore_current_row_numbers_in_formulas(
+        self, df: pd.DataFrame, first_row_position: int = 0
+    ) -> pd.DataFrame:
+        row_numbers = (
+            np.arange(len(df)) + first_row_position + self.header_row_number + 2
+        )
+
+        def restore_current_row_number(formula: str, row_number: int) -> str:
+            return formula.replace(
+                self.row_number_placeholder_in_formulas, str(row_number)
+            )
+
+        return map_formulas(df, row_numbers, restore_current_row_number)
 
     def export(self) -> pd.DataFrame:
         return self.restore_current_row_numbers_in_formulas(self.df).rename(
             columns=self.attributes_to_columns_map
         )
+
+    def export_tail(self, row_count: int) -> pd.DataFrame:
+        """Same as export().tail(row_count), without exporting the other rows."""
+        tail_df = self.df.tail(row_count)
+        return self.restore_current_row_numbers_in_formulas(
+            tail_df, len(self.df) - len(tail_df)
+        ).rename(columns=self.attributes_to_columns_map)
@@ -1,25 +1,37 @@
-from typing import Any, Dict, Union
+import copy
+from typing import Any, Dict, List, Optional, Union
 
-from lib.app_singleton import app_logger
 import gspread_dataframe
 import pandas as pd
 from gspread import Spreadsheet, Worksheet
 from gspread.utils import rowcol_to_a1
 
+from lib.app_singleton import app_logger
+from lib.gsheets.gsheets_key_index import GsheetsKeyIndex
 from lib.gsheets.gsheets_worksheet_data import GsheetsWorksheetData
-from lib.gsheets.utils import get_worksheet
+from lib.gsheets.gsheets_worksheet_values import (
+    WorksheetValues,
+    WorksheetValuesRequest,
+    batch_get_worksheet_values,
+)
+from lib.gsheets.utils import dataframe_from_values, dataframe_to_values, get_worksheet
 
 
 class GsheetsWorksheetEditor:
     sh: Spreadsheet
-    data: GsheetsWorksheetData
-    worksheet: Worksheet
     worksheet_name: str
     header_row_number: int
     attributes_to_columns_map: dict
     evaluate_formulas: bool
     remove_empty_rows: bool
     remove_empty_columns: bool
+    columns: Optional[List[str]]
+    key_index: Optional[GsheetsKeyIndex]
+    column_numbers: Dict[str, int]
+    _worksheet: Optional[Worksheet]
+    _data: Optional[GsheetsWorksheetData]
+    _pending_cell_updates: Dict[str, Dict[str, Any]]
+    _pending_append_row_count: int
 
     def __init__(
         self,
@@ -30,25 +42,100 @@ class GsheetsWorksheetEditor:
         evaluate_formulas: bool = False,
         remove_empty_rows: bool = True,
         remove_empty_columns: bool = False,
+        worksheet: Optional[Worksheet] = None,
+        worksheet_values: Optional[WorksheetValues] = None,
+        columns: Optional[List[str]] = None,
+        lazy: bool = False,
+        key_index: Optional[GsheetsKeyIndex] = None,
     ):
+        """
+        The worksheet and its values can be supplied when already fetched,
+        e.g. by a GsheetsSpreadsheetLoader, to avoid fetching them again.
+
+        With columns, only those columns (attribute names or column headers) are
+        loaded. With lazy=True, the worksheet is only fetched and loaded when
+        first used. With a key index, the one column in columns is read
+        incrementally (see GsheetsKeyIndex).
+        """
         self.sh = sh
         self.worksheet_name = worksheet_name
-        self.worksheet = get_worksheet(self.sh, self.worksheet_name)
+        self._worksheet = worksheet
         self.header_row_number = header_row_number
         self.attributes_to_columns_map = attributes_to_columns_map
         self.evaluate_formulas = evaluate_formulas
         self.remove_empty_rows = remove_empty_rows
         self.remove_empty_columns = remove_empty_columns
-        self.load()
+        self.columns = columns
+        self.key_index = key_index
+        # Column numbers of the column headers in the worksheet, if known
+        self.column_numbers = {}
+        self._data = None
+        self._pending_cell_updates = {}
+        self._pending_append_row_count = 0
+        if worksheet_values is not None or not lazy:
+            self.load(worksheet_values)
+
+    @property
+    def worksheet(self) -> Worksheet:
+        if self._worksheet is None:
+            self._worksheet = get_worksheet(self.sh, self.worksheet_name)
+        return self._worksheet
+
+    @worksheet.setter
+    def worksheet(self, worksheet: Worksheet) -> None:
+        self._worksheet = worksheet
+
+    @property
+    def data(self) -> GsheetsWorksheetData:
+        if self._data is None:
+            self.load()
+        assert self._data is not None
+        return self._data
+
+    @data.setter
+    def data(self, data: GsheetsWorksheetData) -> None:
+        self._data = data
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._data is not None
+
+    def values_request(self) -> WorksheetValuesRequest:
+        return WorksheetValuesRequest(
+            worksheet=self.worksheet,
+            header_row_number=self.header_row_number,
+            evaluate_formulas=self.evaluate_formulas,
+            columns=self.columns,
+            attributes_to_columns_map=self.attributes_to_columns_map,
+        )
 
     def load(
         self,
+        worksheet_values: Optional[WorksheetValues] = None,
     ) -> None:
-        df = gspread_dataframe.get_as_dataframe(
-            self.worksheet,
-            header=self.header_row_number,
-            evaluate_formulas=self.evaluate_formulas,
-        )
+        if worksheet_values is None and self.key_index is not None:
+            worksheet_values = self.key_index.worksheet_values(
+                self.sh, self.values_request()
+            )
+        elif worksheet_values is None and self.columns is not None:
+            (worksheet_values,) = batch_get_worksheet_values(
+                self.sh, [self.values_request()]
+            )
+        if worksheet_values is None:
+            df = gspread_dataframe.get_as_dataframe(
+                self.worksheet,
+                header=self.header_row_number,
+                evaluate_formulas=self.evaluate_formulas,
+            )
+            self.column_numbers = {}
+        else:
+            df = dataframe_from_values(
+                worksheet_values.values,
+                len(worksheet_values.values),
+                max((len(row) for row in worksheet_values.values), default=0),
+                worksheet_values.header_row_number,
+            )
+            self.column_numbers = worksheet_values.column_numbers
         if self.remove_empty_rows:
             df = df.dropna(axis=0, how="all")
         if self.remove_empty_columns:
@@ -59,6 +146,14 @@ class GsheetsWorksheetEditor:
             attributes_to_columns_map=self.attributes_to_columns_map,
         )
 
+    def column_number(self, df_column_name: str) -> int:
+        column_header = self.attributes_to_columns_map.get(
+            df_column_name, df_column_name
+        )
+        if str(column_header) in self.column_numbers:
+            return self.column_numbers[str(column_header)]
+        return self.data.df.columns.get_loc(df_column_name) + 1
+
     def __repr__(self) -> str:
         return (
             f"{type(self).__name__} (sh.id={self.sh.id}, "
@@ -66,11 +161,37 @@ class GsheetsWorksheetEditor:
             f" header_row_number={self.header_row_number})"
         )
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # The spreadsheet is not passed to other processes, see read_only_copy
+        state = self.__dict__.copy()
+        state["sh"] = None
+        state["_worksheet"] = None
+        return state
+
+    def read_only_copy(
+        self, row_count: Optional[int] = None
+    ) -> "GsheetsWorksheetEditor":
+        """
+        A copy of the editor with its data, or the first row_count rows of it,
+        that can be passed to other processes to read the data there. Nothing
+        can be written with it once passed, since it is detached from the
+        spreadsheet then.
+        """
+        editor = copy.copy(self)
+        editor.data = copy.copy(self.data)
+        if row_count is not None:
+            editor.data.df = self.data.df.head(row_count)
+        editor._pending_cell_updates = {}
+        editor._pending_append_row_count = 0
+        return editor
+
     def append_row(self, row: dict) -> None:
         df_with_row = pd.DataFrame([row])
         self.append_data(df_with_row)
 
     def remove_row(self, df_row_index: int) -> None:
+        # Pending cell updates refer to the current row numbers
+        self.flush()
         start_index = df_row_index + self.data.header_row_number + 2
         self.worksheet.delete_rows(start_index)  # , end_index=None
         self.data.df = self.data.df.drop([df_row_index])
@@ -79,21 +200,34 @@ class GsheetsWorksheetEditor:
         self.data.df = df
         export_df = self.data.export()
         gspread_dataframe.set_with_dataframe(self.worksheet, export_df, resize=True)
+        self._pending_append_row_count = 0
+
+    def append_data(self, df: pd.DataFrame, defer: bool = False) -> None:
+        """
+        Append rows to the worksheet.
 
-    def append_data(self, df: pd.DataFrame) -> None:
+        With defer=True, the rows are only added to data.df (so that they are
+        taken into account by subsequent lookups) and written on flush().
+        """
         new_df = pd.concat([self.data.df, df], ignore_index=True)
         self.data.df = new_df
-        export_df = self.data.export()
-        appended_rows_export_df = export_df.tail(len(df))
-        gspread_dataframe.set_with_dataframe(
-            self.worksheet,
-            appended_rows_export_df,
-            resize=False,
-            row=self.worksheet.row_count + 1,
-            include_column_header=False,
+        self._pending_append_row_count += len(df)
+        if not defer:
+            self.flush_appends()
+
+    def flush_appends(self) -> None:
+        """Write all rows appended with defer=True in one request."""
+        if self._pending_append_row_count == 0:
+            return
+        appended_rows_export_df = self.data.export_tail(self._pending_append_row_count)
+        # Inserts the rows after the last row of the table that starts at the header
+        self.worksheet.append_rows(
+            dataframe_to_values(appended_rows_export_df, self.column_numbers),
+            value_input_option="USER_ENTERED",
+            insert_data_option="INSERT_ROWS",
+            table_range=rowcol_to_a1(self.header_row_number + 1, 1),
         )
-        # Gspread does not update the row count after a resize, so we must re-create the worksheet
-        self.worksheet = get_worksheet(self.sh, self.worksheet_name)
+        self._pending_append_row_count = 0
 
     def update_a_cell(
         self,
@@ -114,16 +248,29 @@ class GsheetsWorksheetEditor:
 
         # create the update request
         row_number = df_row_index + self.data.header_row_number + 2
-        column_number = self.data.df.columns.get_loc(df_column_name) + 1
+        column_number = self.column_number(df_column_name)
 
         gs_range = rowcol_to_a1(row_number, column_number)
         if batch:
-            return {"range": gs_range, "values": [[value]]}
-        self.worksheet.update_acell(gs_range, value)
+            # queued until flush(), later updates of the same cell replace earlier ones
+            update_request = {"range": gs_range, "values": [[value]]}
+            self._pending_cell_updates[gs_range] = update_request
+        else:
+            self.worksheet.update_acell(gs_range, value)
 
         # update the df as well so that it is up to date
-        # TODO: find a way to support this properly in batch mode
-        if not batch:
-            self.data.df.at[df_row_index, df_column_name] = value
+        self.data.df.at[df_row_index, df_column_name] = value
 
+        if batch:
+            return update_request
         return True
+
+    def flush(self) -> None:
+        """Write all deferred appends, then commit all queued cell updates in one request."""
+        # Queued cell updates may refer to appended rows
+        self.flush_appends()
+        if not self._pending_cell_updates:
+            return
+        update_requests = list(self._pending_cell_updates.values())
+        self.worksheet.batch_update(update_requests, value_input_option="USER_ENTERED")
+        self._pending_cell_updates = {}
@@ -0,0 +1,207 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from gspread import Spreadsheet, Worksheet
+from gspread.utils import absolute_range_name, fill_gaps, rowcol_to_a1
+from pandas.io.parsers import TextParser
+
+from lib.gsheets.utils import inv_dict
+
+
+@dataclass
+class WorksheetValuesRequest:
+    worksheet: Worksheet
+    header_row_number: int
+    evaluate_formulas: bool = False
+    # Only fetch these columns (attribute names or column headers), all if None
+    columns: Optional[List[str]] = None
+    attributes_to_columns_map: dict = field(default_factory=dict)
+
+    @property
+    def value_render_option(self) -> str:
+        return "UNFORMATTED_VALUE" if self.evaluate_formulas else "FORMULA"
+
+    def includes_column(self, column_header: str) -> bool:
+        if self.columns is None:
+            return True
+        attribute = inv_dict(self.attributes_to_columns_map).get(column_header)
+        return column_header in self.columns or attribute in self.columns
+
+
+@dataclass
+class WorksheetValues:
+    # The header rows and data rows of the fetched columns
+    values: List[List[Any]]
+    # The index of the row of values holding the column headers
+    header_row_number: int
+    # Column headers of all columns of the worksheet, by column number
+    column_numbers: Dict[str, int]
+
+
+def header_column_names(
+    values: List[List[Any]], header_row_number: int, col_count: int
+) -> List[str]:
+    """Column headers as parsed by pandas, e.g. with duplicates suffixed by .1, .2..."""
+    header_values = fill_gaps(
+        values[: header_row_number + 1], rows=header_row_number + 1, cols=col_count
+    )
+    return [
+        str(column)
+        for column in TextParser(header_values, header=header_row_number).read().columns
+    ]
+
+
+def column_range(worksheet: Worksheet, column_number: int, first_row: int) -> str:
+    column_letter = rowcol_to_a1(1, column_number)[:-1]
+    return absolute_range_name(
+        worksheet.title, f"{column_letter}{first_row}:{column_letter}"
+    )
+
+
+def batch_get_worksheet_values(
+    sh: Spreadsheet, requests: List[WorksheetValuesRequest]
+) -> List[WorksheetValues]:
+    """
+    Fetch the values of several worksheets in as few values:batchGet calls as possible.
+
+    Worksheets that are only fetched for some of their columns need their header
+    rows first, which are fetched for all such worksheets at once. The values are
+    then fetched with one call per value render option, since formulas and
+    evaluated values cannot be requested together.
+    """
+    projected_request_indices = [
+        index for index, request in enumerate(requests) if request.columns is not None
+    ]
+    header_values_by_request_index: Dict[int, List[List[Any]]] = {}
+    if len(projected_request_indices) > 0:
+        response = sh.values_batch_get(
+            [
+                absolute_range_name(
+                    requests[index].worksheet.title,
+                    f"1:{requests[index].header_row_number + 1}",
+                )
+                for index in projected_request_indices
+            ],
+            params={"valueRenderOption": "FORMULA"},
+        )
+        for index, value_range in zip(
+            projected_request_indices, response["valueRanges"]
+        ):
+            header_values_by_request_index[index] = value_range.get("values", [])
+
+    # The ranges to fetch for each request, whole worksheets or single columns
+    ranges_by_request_index: Dict[int, List[str]] = {}
+    column_names_by_request_index: Dict[int, List[str]] = {}
+    for index, request in enumerate(requests):
+        if index not in header_values_by_request_index:
+            ranges_by_request_index[index] = [
+                absolute_range_name(request.worksheet.title)
+            ]
+            continue
+        column_names = header_column_names(
+            header_values_by_request_index[index],
+            request.header_row_number,
+            request.worksheet.col_count,
+        )
+        column_names_by_request_index[index] = column_names
+        ranges_by_request_index[index] = [
+            column_range(
+                request.worksheet, column_number, request.header_row_number + 2
+            )
+            for column_number, column_name in enumerate(column_names, start=1)
+            if request.includes_column(column_name)
+        ]
+
+    value_ranges_by_request_index: Dict[int, List[Dict[str, Any]]] = {}
+    for value_render_option in ["FORMULA", "UNFORMATTED_VALUE"]:
+        request_indices = [
+            index
+            for index, request in enumerate(requests)
+            if request.value_render_option == value_render_option
+            and len(ranges_by_request_index[index]) > 0
+        ]
+        if len(request_indices) == 0:
+            continue
+        response = sh.values_batch_get(
+            [
+                range_name
+                for index in request_indices
+                for range_name in ranges_by_request_index[index]
+            ],
+            params={
+                "valueRenderOption": value_render_option,
+                "dateTimeRenderOption": "FORMATTED_STRING",
+            },
+        )
+        # Value ranges are returned in the order they were requested
+        value_ranges = iter(response["valueRanges"])
+        for index in request_indices:
+            value_ranges_by_request_index[index] = [
+                next(value_ranges) for _ in ranges_by_request_index[index]
+            ]
+
+    worksheet_values = []
+    for index, request in enumerate(requests):
+        value_ranges = value_ranges_by_request_index.get(index, [])
+        if index in column_names_by_request_index:
+            worksheet_values.append(
+                projected_worksheet_values(
+                    request,
+                    column_names_by_request_index[index],
+                    value_ranges,
+                )
+            )
+        else:
+            values = fill_gaps(
+                value_ranges[0].get("values", []),
+                rows=request.worksheet.row_count,
+                cols=request.worksheet.col_count,
+            )
+            column_names = header_column_names(
+                values, request.header_row_number, request.worksheet.col_count
+            )
+            worksheet_values.append(
+                WorksheetValues(
+                    values=values,
+                    header_row_number=request.header_row_number,
+                    column_numbers={
+                        column_name: column_number
+                        for column_number, column_name in enumerate(
+                            column_names, start=1
+                        )
+                    },
+                )
+            )
+    return worksheet_values
+
+
+def projected_worksheet_values(
+    request: WorksheetValuesRequest,
+    column_names: List[str],
+    value_ranges: List[Dict[str, Any]],
+) -> WorksheetValues:
+    included_column_names = [
+        column_name
+        for column_name in column_names
+        if request.includes_column(column_name)
+    ]
+    # Each value range holds one column, as rows of (at most) one value
+    columns = [
+        [row[0] if len(row) > 0 else "" for row in value_range.get("values", [])]
+        for value_range in value_ranges
+    ]
+    data_row_count = max((len(column) for column in columns), default=0)
+    data_rows = [
+        [column[row] if row < len(column) else "" for column in columns]
+        for row in range(data_row_count)
+    ]
+    # The header row holds the column headers as parsed from the complete header
+    # rows, so that duplicates are numbered the same as when fetching all columns
+    return WorksheetValues(
+        values=[included_column_names] + data_rows,
+        header_row_number=0,
+        column_numbers={
+            column_name: column_number
+            for column_number, column_name in enumerate(column_names, start=1)
+        },
+    )
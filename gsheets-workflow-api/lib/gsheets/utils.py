@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import re
+from numbers import Real
+from typing import Any, Dict, List, Optional
+
 import pandas as pd
 from gspread import Spreadsheet, Worksheet, WorksheetNotFound
+from gspread.utils import fill_gaps
 from gspread_dataframe import set_with_dataframe
+from pandas.io.parsers import TextParser
 
 from lib.app_singleton import app_logger
 
@@ -11,6 +17,73 @@ def inv_dict(my_dict: dict) -> dict:
     return {v: k for k, v in my_dict.items()}
 
 
+UNNAMED_COLUMN_NAME_PATTERN = re.compile(r"^Unnamed:\s\d+(?:_level_\d+)?$")
+
+
+def dataframe_from_values(
+    values: List[List[Any]], row_count: int, col_count: int, header: int
+) -> pd.DataFrame:
+    """
+    Parse the values of a worksheet the same way as gspread_dataframe.get_as_dataframe.
+
+    The values are padded to the size of the worksheet, and empty rows as well
+    as empty columns without a header are dropped.
+    """
+    rect_values = fill_gaps(values, rows=row_count, cols=col_count)
+    df = TextParser(rect_values, header=header).read()
+    df = df.dropna(how="all", axis=0)
+    empty_unnamed_columns = [
+        label
+        for label in df.columns
+        if isinstance(label, str)
+        and UNNAMED_COLUMN_NAME_PATTERN.search(label)
+        and df[label].isna().all()
+    ]
+    return df.drop(columns=empty_unnamed_columns)
+
+
+def dataframe_to_values(
+    df: pd.DataFrame, column_numbers: Optional[Dict[str, int]] = None
+) -> List[List[Any]]:
+    """
+    Represent the rows of a dataframe as cell values the same way as
+    gspread_dataframe.set_with_dataframe does (with formulas allowed).
+
+    With column_numbers, the values are placed in the columns with the same
+    header, and columns without a header are placed after those.
+    """
+    rows = [[cell_value(value) for value in row] for row in df.to_numpy("object")]
+    if not column_numbers:
+        return rows
+    positions = []
+    next_position = max(column_numbers.values())
+    for column in df.columns:
+        if str(column) in column_numbers:
+            positions.append(column_numbers[str(column)] - 1)
+        else:
+            positions.append(next_position)
+            next_position += 1
+    width = max(positions, default=-1) + 1
+    positioned_rows = []
+    for row in rows:
+        positioned_row = [""] * width
+        for position, value in zip(positions, row):
+            positioned_row[position] = value
+        positioned_rows.append(positioned_row)
+    return positioned_rows
+
+
+def cell_value(value: Any) -> Any:
+    if pd.isnull(value) is True:
+        return ""
+    if isinstance(value, Real):
+        return value
+    value = str(value)
+    if value.startswith("'"):
+        return f"'{value}"
+    return value
+
+
 def spreadsheet_url(spreadsheet_id: str) -> str:
     return f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}"
 
@@ -1,20 +1,31 @@
 import json
 import traceback
-from dataclasses import asdict
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
 from lib.app_singleton import app_logger
 from lib.gs_combined.schemas import GsAnswerRow, GsQuestionRow, GsSurveyResultsData
 from lib.gsheets.gsheets_worksheet_editor import GsheetsWorksheetEditor
-from lib.import_mechanics.utils import get_non_existing_rows_df
+from lib.import_mechanics.utils import (
+    dataclass_rows_to_df,
+    get_non_existing_rows_df,
+    stringified_id_set,
+)
 from lib.mapping.convert_survey_details_to_gs_question_and_answer_rows import (
     convert_survey_details_to_gs_question_and_answer_rows,
 )
+from lib.mapping.convert_surveys_in_process_pool import (
+    SurveyConversion,
+    WorkerResult,
+    convert_surveys_in_process_pool,
+    survey_conversion_result,
+)
 from lib.survey_monkey.question_rollup import QuestionRollup
-from lib.survey_monkey.response import Answer
+from lib.survey_monkey.submitted_answers import SubmittedAnswers
 from lib.survey_monkey.survey import Survey
 
 
@@ -23,44 +34,96 @@ def import_gs_question_and_answer_rows(
     gs_survey_results_data: GsSurveyResultsData,
     survey_details_by_survey_id: Dict[str, Survey],
     question_rollups_by_question_id: Dict[str, QuestionRollup],
-    submitted_answers_by_question_id: Dict[str, List[List[Answer]]],
+    submitted_answers_by_question_id: Dict[str, SubmittedAnswers],
     surveys_worksheet_editor: GsheetsWorksheetEditor,
+    max_workers: int = 1,
 ) -> Tuple[List[GsQuestionRow], List[GsAnswerRow], pd.DataFrame]:
+    """
+    With max_workers > 1, the surveys are converted in a pool of up to that
+    many processes up front, and imported one by one in survey order as their
+    conversions are done. If the worker processes cannot be started or stop,
+    the (remaining) surveys are converted in this process instead.
+    """
     all_gs_questions: List[GsQuestionRow] = []
     all_gs_answers: List[GsAnswerRow] = []
     surveys_to_import_data_for = surveys_to_import_data_for.copy()
     surveys_to_import_data_for["survey_was_fully_imported"] = False
-    for index, survey_row in surveys_to_import_data_for.iterrows():
+    # The surveys whose rows are written by the flush of each combo sheet
+    indices_of_surveys_with_appended_questions = []
+    indices_of_surveys_with_appended_answers = []
+    # Kept up to date with the appended rows, to not stringify all ids per survey
+    listed_question_ids = stringified_id_set(
+        gs_survey_results_data.questions_combo.data.df["survey_question_id"]
+    )
+    listed_answer_question_ids = stringified_id_set(
+        gs_survey_results_data.topline_combo.data.df["survey_question_id"]
+    )
+    surveys = [
+        survey_details_by_survey_id[survey_id]
+        for survey_id in surveys_to_import_data_for["survey_id"]
+        if survey_id in survey_details_by_survey_id
+    ]
+    survey_conversions: Optional[Iterator["Future[WorkerResult]"]] = None
+    if max_workers > 1 and len(surveys) > 1:
         try:
-            survey_id = survey_row["survey_id"]
-            survey_details = survey_details_by_survey_id[survey_id]
-            (
-                gs_questions,
-                gs_answers,
-                ignored_questions,
-            ) = convert_survey_details_to_gs_question_and_answer_rows(
-                survey_details,
+            survey_conversions = convert_surveys_in_process_pool(
+                surveys,
                 question_rollups_by_question_id,
                 submitted_answers_by_question_id,
                 gs_survey_results_data,
+                max_workers,
             )
+        except (OSError, BrokenProcessPool) as error:
+            app_logger.warning(
+                "Could not start the survey conversion worker processes, "
+                "converting the surveys in the main process: {error}",
+                {"error": error},
+            )
+    for index, survey_row in surveys_to_import_data_for.iterrows():
+        try:
+            survey_id = survey_row["survey_id"]
+            survey_details = survey_details_by_survey_id[survey_id]
+            survey_conversion: Optional[SurveyConversion] = None
+            if survey_conversions is not None:
+                try:
+                    survey_conversion = survey_conversion_result(
+                        next(survey_conversions)
+                    )
+                except BrokenProcessPool as error:
+                    app_logger.warning(
+                        "The survey conversion worker processes stopped, "
+                        "converting the remaining surveys in the main process: "
+                        "{error}",
+                        {"error": error},
+                    )
+                    survey_conversions = None
+            if survey_conversion is None:
+                survey_conversion = (
+                    convert_survey_details_to_gs_question_and_answer_rows(
+                        survey_details,
+                        question_rollups_by_question_id,
+                        submitted_answers_by_question_id,
+                        gs_survey_results_data,
+                    )
+                )
+            gs_questions, gs_answers, ignored_questions = survey_conversion
 
             # "Overview"
-            gs_questions_df = pd.DataFrame(
-                asdict(gs_question) for gs_question in gs_questions
-            )
+            gs_questions_df = dataclass_rows_to_df(gs_questions, GsQuestionRow)
             unlisted_gs_questions_df = get_non_existing_rows_df(
                 gs_questions_df,
                 gs_survey_results_data.questions_combo.data.df,
                 "survey_question_id",
+                listed_question_ids,
             )
 
             # "Topline"
-            gs_answers_df = pd.DataFrame(asdict(gs_answer) for gs_answer in gs_answers)
+            gs_answers_df = dataclass_rows_to_df(gs_answers, GsAnswerRow)
             unlisted_gs_answers_df = get_non_existing_rows_df(
                 gs_answers_df,
                 gs_survey_results_data.topline_combo.data.df,
                 "survey_question_id",
+                listed_answer_question_ids,
             )
 
             # Append previously non-imported questions and
@@ -71,7 +134,11 @@ def import_gs_question_and_answer_rows(
                     {"count": len(unlisted_gs_questions_df)},
                 )
                 gs_survey_results_data.questions_combo.append_data(
-                    unlisted_gs_questions_df
+                    unlisted_gs_questions_df, defer=True
+                )
+                indices_of_surveys_with_appended_questions.append(index)
+                listed_question_ids.update(
+                    stringified_id_set(unlisted_gs_questions_df["survey_question_id"])
                 )
             else:
                 app_logger.info("No unlisted questions to add to the spreadsheet")
@@ -80,7 +147,13 @@ def import_gs_question_and_answer_rows(
                     "Adding {count} yet " "unlisted answers to the spreadsheet",
                     {"count": len(unlisted_gs_answers_df)},
                 )
-                gs_survey_results_data.topline_combo.append_data(unlisted_gs_answers_df)
+                gs_survey_results_data.topline_combo.append_data(
+                    unlisted_gs_answers_df, defer=True
+                )
+                indices_of_surveys_with_appended_answers.append(index)
+                listed_answer_question_ids.update(
+                    stringified_id_set(unlisted_gs_answers_df["survey_question_id"])
+                )
             else:
                 app_logger.info("No unlisted answers to add to the spreadsheet")
 
@@ -94,11 +167,13 @@ def import_gs_question_and_answer_rows(
                     index,
                     "results_imported",
                     True,
+                    batch=True,
                 )
                 surveys_worksheet_editor.update_a_cell(
                     index,
                     "import_notes",
                     "Fully imported",
+                    batch=True,
                 )
                 now = datetime.now()
                 import_timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
@@ -106,6 +181,7 @@ def import_gs_question_and_answer_rows(
                     index,
                     "import_timestamp",
                     import_timestamp,
+                    batch=True,
                 )
             else:
                 ignored_question_headings = []
@@ -125,17 +201,57 @@ def import_gs_question_and_answer_rows(
                     index,
                     "import_notes",
                     import_notes,
+                    batch=True,
                 )
-            all_gs_questions = all_gs_questions + gs_questions
-            all_gs_answers = all_gs_answers + gs_answers
+            all_gs_questions.extend(gs_questions)
+            all_gs_answers.extend(gs_answers)
         except Exception as error:  # noqa B902
             error_string = f"Error occurred:\n\n{error}\n\n{traceback.format_exc()}\n"
             surveys_worksheet_editor.update_a_cell(
                 index,
                 "import_notes",
                 error_string,
+                batch=True,
             )
             app_logger.debug(error_string)
+
+    # Write the rows of all surveys at once, each sheet on its own, so that
+    # failing to write one sheet only fails the surveys with rows in it
+    error_strings_by_index: Dict[Any, List[str]] = {}
+    for combo, indices_of_surveys_with_appended_rows in [
+        (
+            gs_survey_results_data.questions_combo,
+            indices_of_surveys_with_appended_questions,
+        ),
+        (
+            gs_survey_results_data.topline_combo,
+            indices_of_surveys_with_appended_answers,
+        ),
+    ]:
+        try:
+            combo.flush()
+        except Exception as error:  # noqa B902
+            error_string = f"Error occurred:\n\n{error}\n\n{traceback.format_exc()}\n"
+            for index in indices_of_surveys_with_appended_rows:
+                error_strings_by_index.setdefault(index, []).append(error_string)
+            app_logger.debug(error_string)
+    for index, error_strings in error_strings_by_index.items():
+        surveys_to_import_data_for.loc[index, "survey_was_fully_imported"] = False
+        surveys_worksheet_editor.update_a_cell(
+            index,
+            "results_imported",
+            False,
+            batch=True,
+        )
+        surveys_worksheet_editor.update_a_cell(
+            index,
+            "import_notes",
+            "".join(error_strings),
+            batch=True,
+        )
+
+    # Write the import status of all surveys at once
+    surveys_worksheet_editor.flush()
     surveys_fully_imported_df = surveys_to_import_data_for[
         surveys_to_import_data_for["survey_was_fully_imported"]
     ]
@@ -1,17 +1,20 @@
-from typing import Dict, List, Tuple
+from typing import Dict, Optional, Tuple
 
 import pandas as pd
 
 from lib.gsheets.gsheets_worksheet_editor import GsheetsWorksheetEditor
+from lib.mapping.choicify_question import question_ids_needing_submitted_answers
 from lib.survey_monkey.api_client import (
+    DEFAULT_MAX_WORKERS,
     fetch_question_rollups_by_question_id,
     fetch_submitted_answers_by_question_id,
     fetch_survey_details,
     fetch_surveys,
 )
 from lib.survey_monkey.question_rollup import QuestionRollup
-from lib.survey_monkey.response import Answer
+from lib.survey_monkey.submitted_answers import SubmittedAnswers
 from lib.survey_monkey.survey import Survey
+from lib.survey_monkey.survey_cache import SurveyCache, survey_versions
 
 
 class NoNewSurveys(Exception):
@@ -19,15 +22,20 @@ class NoNewSurveys(Exception):
 
 
 def prepare_import_of_gs_question_and_answer_rows(
-    surveys_worksheet_editor: GsheetsWorksheetEditor, app_api_token: str
+    surveys_worksheet_editor: GsheetsWorksheetEditor,
+    app_api_token: str,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    survey_cache: Optional[SurveyCache] = None,
+    strict_validation: bool = False,
 ) -> Tuple[
     pd.DataFrame,
     Dict[str, Survey],
     Dict[str, QuestionRollup],
-    Dict[str, List[List[Answer]]],
+    Dict[str, SubmittedAnswers],
 ]:
     app_surveys = fetch_surveys(app_api_token)
     app_surveys_ids = app_surveys["id"].tolist()
+    app_survey_versions = survey_versions(app_surveys)
     surveys_to_import_data_for = surveys_worksheet_editor.data.df[
         # surveys in this app...
         surveys_worksheet_editor.data.df["survey_id"].astype(str).isin(app_surveys_ids)
@@ -47,12 +55,29 @@ def prepare_import_of_gs_question_and_answer_rows(
     survey_ids = surveys_to_import_data_for["survey_id"].tolist()
 
     # Do all SurveyMonkey API calls up front
-    survey_details_by_survey_id = fetch_survey_details(survey_ids, app_api_token)
+    survey_details_by_survey_id = fetch_survey_details(
+        survey_ids, app_api_token, max_workers, survey_cache, app_survey_versions
+    )
     question_rollups_by_question_id = fetch_question_rollups_by_question_id(
-        survey_details_by_survey_id, app_api_token
+        survey_details_by_survey_id,
+        app_api_token,
+        max_workers,
+        survey_cache,
+        app_survey_versions,
     )
+    # Individual responses are only needed for questions that are not
+    # multiple-choice, which is the most expensive part to fetch
     submitted_answers_by_question_id = fetch_submitted_answers_by_question_id(
-        survey_details_by_survey_id, app_api_token
+        survey_details_by_survey_id,
+        app_api_token,
+        max_workers,
+        survey_cache,
+        app_survey_versions,
+        {
+            survey_id: question_ids_needing_submitted_answers(survey_details)
+            for survey_id, survey_details in survey_details_by_survey_id.items()
+        },
+        strict_validation,
     )
 
     return (
@@ -1,13 +1,20 @@
+import traceback
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
 import pandas as pd
 
 from lib.app_singleton import app_logger
+from lib.concurrency import map_concurrently
 from lib.config import read_config
 from lib.gdrive.auth import AuthorizedClients
+from lib.gs_combined.schemas import GsSurveyResultsData
 from lib.gs_combined.spreadsheet import (
     get_gs_combined_spreadsheet,
-    read_gs_survey_results_data,
-    read_surveys_listing,
+    read_gs_combined_spreadsheet,
 )
+from lib.gsheets.gsheets_key_index import get_gsheets_key_index
+from lib.gsheets.gsheets_worksheet_editor import GsheetsWorksheetEditor
 from lib.import_mechanics.import_gs_question_and_answer_rows import (
     import_gs_question_and_answer_rows,
 )
@@ -16,7 +23,41 @@ from lib.import_mechanics.prepare_import_of_gs_question_and_answer_rows import (
     prepare_import_of_gs_question_and_answer_rows,
 )
 from lib.import_mechanics.utils import get_non_existing_rows_df
-from lib.survey_monkey.api_client import fetch_survey_details, fetch_surveys
+from lib.mapping.convert_surveys_in_process_pool import get_conversion_max_workers
+from lib.parsing.parsing_cache import log_parsing_cache_stats
+from lib.survey_monkey.api_client import (
+    DEFAULT_MAX_WORKERS,
+    fetch_survey_details,
+    fetch_surveys,
+    get_strict_validation,
+)
+from lib.survey_monkey.http_session import log_sm_request_stats, reset_sm_request_stats
+from lib.survey_monkey.question_rollup import QuestionRollup
+from lib.survey_monkey.submitted_answers import SubmittedAnswers
+from lib.survey_monkey.survey import Survey
+from lib.survey_monkey.survey_cache import (
+    SurveyCache,
+    get_survey_cache,
+    survey_versions,
+)
+
+
+@dataclass
+class AppFetchResult:
+    """Everything fetched from one SurveyMonkey app, ready to be written to the sheet."""
+
+    app_api_token: str
+    survey_rows_to_add_df: pd.DataFrame
+    surveys_to_import_data_for: Optional[pd.DataFrame] = None
+    survey_details_by_survey_id: Dict[str, Survey] = field(default_factory=dict)
+    question_rollups_by_question_id: Dict[str, QuestionRollup] = field(
+        default_factory=dict
+    )
+    submitted_answers_by_question_id: Dict[str, SubmittedAnswers] = field(
+        default_factory=dict
+    )
+    # The error that fetching from the app failed with, if any
+    error: Optional[Exception] = None
 
 
 def refresh_surveys_and_combined_listings(
@@ -24,32 +65,98 @@ def refresh_surveys_and_combined_listings(
 ) -> None:
     # run for multiple apps
     config = read_config()
+    reset_sm_request_stats()
 
     tokens = config["SURVEY_MONKEY_API_TOKEN"].split(";")
+    max_workers = int(config["SURVEY_MONKEY_API_MAX_WORKERS"] or DEFAULT_MAX_WORKERS)
+    survey_cache = get_survey_cache(config)
+    strict_validation = get_strict_validation(config)
 
-    for token in tokens:
-        refresh_surveys_and_combined_listings_from_one_app(
-            authorized_clients, gs_combined_spreadsheet_id, token
-        )
+    # Read the spreadsheet once for all apps
+    gs_combined_spreadsheet = get_gs_combined_spreadsheet(
+        authorized_clients, gs_combined_spreadsheet_id
+    )
+    surveys_worksheet_editor, gs_survey_results_data = read_gs_combined_spreadsheet(
+        gs_combined_spreadsheet, get_gsheets_key_index(config)
+    )
 
-    pass
+    # Fetch from all apps concurrently, each app has its own rate limit
+    app_fetch_results = map_concurrently(
+        lambda token: fetch_surveys_and_combined_listings_from_one_app_or_error(
+            surveys_worksheet_editor,
+            token,
+            max_workers,
+            survey_cache,
+            strict_validation,
+        ),
+        tokens,
+        len(tokens),
+    )
+
+    # The apps that were fetched are written even if fetching others failed
+    write_surveys_and_combined_listings(
+        app_fetch_results,
+        surveys_worksheet_editor,
+        gs_survey_results_data,
+        get_conversion_max_workers(config),
+    )
+
+    log_sm_request_stats()
+    log_parsing_cache_stats()
 
+    for app_fetch_result in app_fetch_results:
+        if app_fetch_result.error is not None:
+            raise app_fetch_result.error
 
-def refresh_surveys_and_combined_listings_from_one_app(
-    authorized_clients: AuthorizedClients,
-    gs_combined_spreadsheet_id: str,
+
+def fetch_surveys_and_combined_listings_from_one_app_or_error(
+    surveys_worksheet_editor: GsheetsWorksheetEditor,
     app_api_token: str,
-) -> None:
-    sm_surveys_df = fetch_surveys(app_api_token)
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    survey_cache: Optional[SurveyCache] = None,
+    strict_validation: bool = False,
+) -> AppFetchResult:
+    """
+    As fetch_surveys_and_combined_listings_from_one_app, returning the error
+    that fetching failed with instead of raising it, so that failing to fetch
+    from one app does not keep the others from being written.
+    """
+    try:
+        return fetch_surveys_and_combined_listings_from_one_app(
+            surveys_worksheet_editor,
+            app_api_token,
+            max_workers,
+            survey_cache,
+            strict_validation,
+        )
+    except Exception as error:  # noqa B902
+        app_logger.error(
+            "Failed to fetch from app {app}: {error}\n\n{traceback}",
+            {
+                "app": f"{app_api_token[:3]}...",
+                "error": error,
+                "traceback": traceback.format_exc(),
+            },
+        )
+        return AppFetchResult(app_api_token, pd.DataFrame(), error=error)
 
-    gs_combined_spreadsheet = get_gs_combined_spreadsheet(
-        authorized_clients, gs_combined_spreadsheet_id
-    )
-    gs_survey_results_data = read_gs_survey_results_data(gs_combined_spreadsheet)
 
-    surveys_worksheet_editor = read_surveys_listing(gs_combined_spreadsheet)
+def fetch_surveys_and_combined_listings_from_one_app(
+    surveys_worksheet_editor: GsheetsWorksheetEditor,
+    app_api_token: str,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    survey_cache: Optional[SurveyCache] = None,
+    strict_validation: bool = False,
+) -> AppFetchResult:
+    """
+    Fetch the data of one app that is to be written to the spreadsheet.
 
-    # appends rows with new surveys in survey monkey, if not already in the surveys sheet
+    Only reads from the surveys worksheet editor, so that this can run
+    concurrently for multiple apps.
+    """
+    sm_surveys_df = fetch_surveys(app_api_token)
+
+    # rows with new surveys in survey monkey, if not already in the surveys sheet
     sm_surveys_df["survey_id"] = sm_surveys_df["id"]
     unlisted_surveys_df = get_non_existing_rows_df(
         sm_surveys_df,
@@ -59,7 +166,11 @@ def refresh_surveys_and_combined_listings_from_one_app(
 
     unlisted_survey_ids = unlisted_surveys_df["id"].tolist()
     unlisted_survey_details_by_survey_id = fetch_survey_details(
-        unlisted_survey_ids, app_api_token
+        unlisted_survey_ids,
+        app_api_token,
+        max_workers,
+        survey_cache,
+        survey_versions(sm_surveys_df),
     )
 
     survey_rows_to_add = []
@@ -83,9 +194,6 @@ def refresh_surveys_and_combined_listings_from_one_app(
         sorted(survey_rows_to_add, key=lambda d: d["survey_date"])
     )
 
-    if len(survey_rows_to_add_df) > 0:
-        surveys_worksheet_editor.append_data(survey_rows_to_add_df)
-
     try:
         (
             surveys_to_import_data_for,
@@ -93,30 +201,82 @@ def refresh_surveys_and_combined_listings_from_one_app(
             question_rollups_by_question_id,
             submitted_answers_by_question_id,
         ) = prepare_import_of_gs_question_and_answer_rows(
-            surveys_worksheet_editor, app_api_token
+            surveys_worksheet_editor,
+            app_api_token,
+            max_workers,
+            survey_cache,
+            strict_validation,
         )
     except NoNewSurveys:
         msg = f"No new surveys to import from this app: {app_api_token[:3]}..."
         app_logger.info(msg)
-        return
+        return AppFetchResult(app_api_token, survey_rows_to_add_df)
 
-    (
-        gs_questions,
-        gs_answers,
-        surveys_fully_imported_df,
-    ) = import_gs_question_and_answer_rows(
+    return AppFetchResult(
+        app_api_token,
+        survey_rows_to_add_df,
         surveys_to_import_data_for,
-        gs_survey_results_data,
         survey_details_by_survey_id,
         question_rollups_by_question_id,
         submitted_answers_by_question_id,
-        surveys_worksheet_editor,
     )
 
-    app_logger.info(
-        "Found {question_count} supported question rows "
-        "and {answer_count} answer rows in the selected surveys",
-        {"question_count": len(gs_questions), "answer_count": len(gs_answers)},
-    )
 
-    pass
+def write_surveys_and_combined_listings(
+    app_fetch_results: List[AppFetchResult],
+    surveys_worksheet_editor: GsheetsWorksheetEditor,
+    gs_survey_results_data: GsSurveyResultsData,
+    conversion_max_workers: int = 1,
+) -> None:
+    """
+    Write the merged results of all apps to the spreadsheet, converting the
+    surveys in up to conversion_max_workers processes.
+    """
+    results_to_import = [
+        result
+        for result in app_fetch_results
+        if result.surveys_to_import_data_for is not None
+    ]
+    if len(results_to_import) > 0:
+        survey_details_by_survey_id: Dict[str, Survey] = {}
+        question_rollups_by_question_id: Dict[str, QuestionRollup] = {}
+        submitted_answers_by_question_id: Dict[str, SubmittedAnswers] = {}
+        for result in results_to_import:
+            survey_details_by_survey_id.update(result.survey_details_by_survey_id)
+            question_rollups_by_question_id.update(
+                result.question_rollups_by_question_id
+            )
+            submitted_answers_by_question_id.update(
+                result.submitted_answers_by_question_id
+            )
+
+        # Import before appending new survey rows, since appending re-indexes
+        # the surveys that the import status is written to
+        (
+            gs_questions,
+            gs_answers,
+            surveys_fully_imported_df,
+        ) = import_gs_question_and_answer_rows(
+            pd.concat(
+                [result.surveys_to_import_data_for for result in results_to_import]
+            ),
+            gs_survey_results_data,
+            survey_details_by_survey_id,
+            question_rollups_by_question_id,
+            submitted_answers_by_question_id,
+            surveys_worksheet_editor,
+            conversion_max_workers,
+        )
+
+        app_logger.info(
+            "Found {question_count} supported question rows "
+            "and {answer_count} answer rows in the selected surveys",
+            {"question_count": len(gs_questions), "answer_count": len(gs_answers)},
+        )
+
+    survey_rows_to_add_df = pd.concat(
+        [result.survey_rows_to_add_df for result in app_fetch_results],
+        ignore_index=True,
+    )
+    if len(survey_rows_to_add_df) > 0:
+        surveys_worksheet_editor.append_data(survey_rows_to_add_df)
@@ -1,9 +1,14 @@
-from typing import Any
+from dataclasses import fields
+from typing import Any, Optional, Sequence, Set
 
+import numpy as np
 import pandas as pd
 
 from lib.parsing.extract_numerical_parts_of_answer_option import is_numeric
 
+# Floats up to this magnitude are integers that convert exactly to int64
+MAX_EXACT_FLOAT_INTEGER = 2**53
+
 
 def stringify_id(id: Any) -> str:
     if is_numeric(id):
@@ -11,25 +16,64 @@ def stringify_id(id: Any) -> str:
     return str(id)
 
 
+def stringify_ids(ids: pd.Series) -> pd.Series:
+    """
+    The same as ids.apply(stringify_id), vectorized for the common cases of
+    integers, integral floats and strings of digits.
+    """
+    if pd.api.types.is_integer_dtype(ids.dtype):
+        return ids.astype(str)
+    if pd.api.types.is_float_dtype(ids.dtype):
+        if (np.abs(ids) < MAX_EXACT_FLOAT_INTEGER).all():
+            return ids.astype("int64").astype(str)
+        return ids.apply(stringify_id)
+    strings = ids.astype(str)
+    is_digits = strings.str.fullmatch(r"\d+").fillna(False).astype(bool)
+    # int() drops leading zeros
+    stringified_ids = strings.str.lstrip("0").replace("", "0")
+    if not is_digits.all():
+        stringified_ids[~is_digits] = ids[~is_digits].apply(stringify_id)
+    return stringified_ids
+
+
+def stringified_id_set(ids: pd.Series) -> Set[str]:
+    return set(stringify_ids(ids.dropna()))
+
+
+def dataclass_rows_to_df(rows: Sequence[Any], row_class: type) -> pd.DataFrame:
+    """
+    The same as pd.DataFrame(asdict(row) for row in rows), built column by
+    column instead of copying each row into a dict first. Has the columns of
+    row_class even without any rows.
+    """
+    return pd.DataFrame(
+        {
+            field.name: [getattr(row, field.name) for row in rows]
+            for field in fields(row_class)
+        }
+    )
+
+
 def get_non_existing_rows_df(
-    new_df: pd.DataFrame, existing_df: pd.DataFrame, unique_id_attribute: str
+    new_df: pd.DataFrame,
+    existing_df: pd.DataFrame,
+    unique_id_attribute: str,
+    existing_ids: Optional[Set[str]] = None,
 ) -> pd.DataFrame:
-    new_df["_merge_id"] = new_df[unique_id_attribute].dropna().apply(stringify_id)
-    existing_df["_merge_id"] = (
-        existing_df[unique_id_attribute].dropna().apply(stringify_id)
-    )
-    if not existing_df["_merge_id"].dropna().empty:
-        merged_df = pd.merge(
-            new_df,
-            existing_df,
-            on=["_merge_id"],
-            how="outer",
-            indicator=True,
-            suffixes=("", "_existing"),
-        )
-        res = merged_df.loc[merged_df["_merge"] == "left_only", new_df.columns].drop(
-            columns=["_merge_id"]
-        )
-    else:
-        res = new_df.drop(columns=["_merge_id"])
-    return res
+    """
+    The rows of new_df whose unique id is not among those of existing_df.
+
+    Ids are compared as stringified by stringify_id. Pass existing_ids (see
+    stringified_id_set) to reuse them across calls. Neither dataframe is
+    modified.
+    """
+    if existing_ids is None:
+        existing_ids = stringified_id_set(existing_df[unique_id_attribute])
+    if len(existing_ids) == 0:
+        return new_df.copy()
+    new_ids = new_df[unique_id_attribute]
+    has_id = new_ids.notna().to_numpy()
+    is_existing = np.zeros(len(new_df), dtype=bool)
+    # Set lookups, since isin would hash all existing ids again
+    is_existing[has_id] = [id in existing_ids for id in stringify_ids(new_ids[has_id])]
+    return new_df[~is_existing]
@@ -1,9 +1,13 @@
+from dataclasses import dataclass
+from typing import Any
+
 from lib.gs_combined.schemas import (
     GsAnswerRow,
     GsQuestionRow,
     GsSurveyResultsData,
     imported_igno_questions_info_sheet_name,
 )
+from lib.mapping.map_question_ids import get_imported_igno_questions_index
 from lib.parsing.answer_option_matches_factual_answer import (
     answer_option_is_the_same_as_factual_answer,
     answer_option_matches_factual_answer,
@@ -13,179 +17,149 @@ from lib.parsing.chosen_answer_option_distance import (
 )
 
 
-def determine_auto_marked_correctness(
-    gs_answer: GsAnswerRow,
-    gs_answers: list[GsAnswerRow],
-    gs_questions: list[GsQuestionRow],
+def determine_factual_answers(
+    corresponding_gs_question: GsQuestionRow,
     gs_survey_results_data: GsSurveyResultsData,
-) -> tuple[str, str, str, list[GsAnswerRow]]:
-    def match_question(q: GsQuestionRow) -> bool:
-        return (
-            q.survey_id is not None
-            and q.survey_id == gs_answer.survey_id
-            and q.question_number == gs_answer.question_number
-        )
-
-    corresponding_gs_questions = list(filter(match_question, gs_questions))
-
-    if not corresponding_gs_questions or len(corresponding_gs_questions) == 0:
-        raise ValueError("(No corresponding question entry found)")
-    corresponding_gs_question = corresponding_gs_questions[0]
-
-    def match_answer(a: GsAnswerRow) -> bool:
-        return (
-            a.survey_id is not None
-            and a.survey_id == gs_answer.survey_id
-            and a.question_number == gs_answer.question_number
-        )
-
-    corresponding_gs_answers = list(filter(match_answer, gs_answers))
-
-    if not corresponding_gs_answers or len(corresponding_gs_answers) == 0:
-        raise ValueError("(No corresponding answer option entries found)")
-
-    factual_correct_answer = None
-    factual_very_wrong_answer = None
-    igno_questions_df = gs_survey_results_data.imported_igno_questions_info.data.df
+) -> tuple[Any, Any]:
+    """The factual correct and very wrong answers to the question."""
+    index = get_imported_igno_questions_index(gs_survey_results_data)
     if corresponding_gs_question.igno_index_question_id.strip() != "":
-        matches = igno_questions_df.apply(
-            lambda x: x["igno_index_question_id"]
-            and x["igno_index_question_id"]
-            == corresponding_gs_question.igno_index_question_id,
-            axis=1,
+        entry = index.entry(
+            "igno_index_question_id", corresponding_gs_question.igno_index_question_id
         )
-        matching_igno_questions_df = igno_questions_df[matches].fillna("")
-
-        if len(matching_igno_questions_df) == 0:
+        if entry is None:
             raise ValueError(
                 f"(No matching imported igno_index_question info "
                 f"entry found in {imported_igno_questions_info_sheet_name})"
             )
-        factual_correct_answer = matching_igno_questions_df.iloc[0][
-            "igno_index_question_correct_answer"
-        ]
-        factual_very_wrong_answer = matching_igno_questions_df.iloc[0][
-            "igno_index_question_very_wrong_answer"
-        ]
+        factual_correct_answer = entry["igno_index_question_correct_answer"]
+        factual_very_wrong_answer = entry["igno_index_question_very_wrong_answer"]
     elif corresponding_gs_question.foreign_country_igno_question_id.strip() != "":
-        matches = igno_questions_df.apply(
-            lambda x: x["foreign_country_igno_question_id"]
-            and x["foreign_country_igno_question_id"]
-            == corresponding_gs_question.foreign_country_igno_question_id,
-            axis=1,
+        entry = index.entry(
+            "foreign_country_igno_question_id",
+            corresponding_gs_question.foreign_country_igno_question_id,
         )
-        matching_igno_questions_df = igno_questions_df[matches].fillna("")
-
-        if len(matching_igno_questions_df) == 0:
+        if entry is None:
             raise ValueError(
                 f"(No matching imported foreign_country_igno_question "
                 f"info entry found in {imported_igno_questions_info_sheet_name})"
             )
-        factual_correct_answer = matching_igno_questions_df.iloc[0][
+        factual_correct_answer = entry[
             "foreign_country_igno_index_question_correct_answer"
         ]
-        factual_very_wrong_answer = matching_igno_questions_df.iloc[0][
+        factual_very_wrong_answer = entry[
             "foreign_country_igno_index_question_very_wrong_answer"
         ]
     elif corresponding_gs_question.step5_question_id.strip() != "":
-        matches = igno_questions_df.apply(
-            lambda x: x["step5_question_id"]
-            and x["step5_question_id"] == corresponding_gs_question.step5_question_id,
-            axis=1,
+        entry = index.entry(
+            "step5_question_id", corresponding_gs_question.step5_question_id
         )
-        matching_igno_questions_df = igno_questions_df[matches].fillna("")
-
-        if len(matching_igno_questions_df) == 0:
+        if entry is None:
             raise ValueError(
                 f"(No matching imported step5_question info entry "
                 f"found in {imported_igno_questions_info_sheet_name})"
             )
-        corresponding_imported_igno_questions_info_entry = (
-            matching_igno_questions_df.iloc[0]
-        )
         factual_correct_answer = (
-            corresponding_imported_igno_questions_info_entry[
-                "step5_question_correct_answer"
-            ]
-            if corresponding_imported_igno_questions_info_entry[
-                "step5_question_asking_language"
-            ]
-            == "en"
-            else corresponding_imported_igno_questions_info_entry[
-                "step5_question_translated_question_correct_answer"
-            ]
+            entry["step5_question_correct_answer"]
+            if entry["step5_question_asking_language"] == "en"
+            else entry["step5_question_translated_question_correct_answer"]
         )
         factual_very_wrong_answer = (
-            corresponding_imported_igno_questions_info_entry[
-                "step5_question_very_wrong_answer"
-            ]
-            if corresponding_imported_igno_questions_info_entry[
-                "step5_question_asking_language"
-            ]
-            == "en"
-            else corresponding_imported_igno_questions_info_entry[
-                "step5_question_translated_question_very_wrong_answer"
-            ]
+            entry["step5_question_very_wrong_answer"]
+            if entry["step5_question_asking_language"] == "en"
+            else entry["step5_question_translated_question_very_wrong_answer"]
         )
     elif corresponding_gs_question.custom_igno_index_question_id.strip() != "":
-        matches = igno_questions_df.apply(
-            lambda x: x["custom_igno_index_question_id"]
-            and x["custom_igno_index_question_id"]
-            == corresponding_gs_question.custom_igno_index_question_id,
-            axis=1,
+        entry = index.entry(
+            "custom_igno_index_question_id",
+            corresponding_gs_question.custom_igno_index_question_id,
         )
-        matching_custom_igno_questions_df = igno_questions_df[matches].fillna("")
-
-        if len(matching_custom_igno_questions_df) == 0:
+        if entry is None:
             raise ValueError(
                 f"(No matching imported custom_igno_index_question info "
                 f"entry found in {imported_igno_questions_info_sheet_name})"
             )
-        factual_correct_answer = matching_custom_igno_questions_df.iloc[0][
-            "custom_igno_index_question_correct_answer"
-        ]
-        factual_very_wrong_answer = matching_custom_igno_questions_df.iloc[0][
+        factual_correct_answer = entry["custom_igno_index_question_correct_answer"]
+        factual_very_wrong_answer = entry[
             "custom_igno_index_question_very_wrong_answer"
         ]
     else:
         raise ValueError("(Question ID not mapped)")
     if factual_correct_answer is None or str(factual_correct_answer).strip() == "":
         raise ValueError("(No factual answer provided in input sheet)")
+    return factual_correct_answer, factual_very_wrong_answer
+
+
+@dataclass
+class QuestionCorrectness:
+    """What is needed to auto-mark the answer options of one question."""
 
-    # Find correctness of this answer option
+    answer_options: list[str]
+    correct_answer_options: list[str]
+    factual_correct_answer: Any
+    factual_very_wrong_answer: Any
+
+    @property
+    def very_wrong_answer_is_derived_numerically(self) -> bool:
+        return (
+            self.factual_very_wrong_answer is None
+            or str(self.factual_very_wrong_answer).strip() == ""
+        )
+
+
+def determine_question_correctness(
+    corresponding_gs_question: GsQuestionRow,
+    corresponding_gs_answers: list[GsAnswerRow],
+    gs_survey_results_data: GsSurveyResultsData,
+) -> QuestionCorrectness:
+    factual_correct_answer, factual_very_wrong_answer = determine_factual_answers(
+        corresponding_gs_question, gs_survey_results_data
+    )
     answer_options = [
         corresponding_gs_answer.answer
         for corresponding_gs_answer in corresponding_gs_answers
     ]
+    correct_answer_options = [
+        answer_option
+        for answer_option in answer_options
+        if answer_option_matches_factual_answer(answer_option, factual_correct_answer)
+    ]
+    question_correctness = QuestionCorrectness(
+        answer_options=answer_options,
+        correct_answer_options=correct_answer_options,
+        factual_correct_answer=factual_correct_answer,
+        factual_very_wrong_answer=factual_very_wrong_answer,
+    )
+    if len(correct_answer_options) == 0:
+        if question_correctness.very_wrong_answer_is_derived_numerically:
+            raise ValueError(
+                f"(No answer option numerically matching "
+                f'the correct answer "{factual_correct_answer}" found)'
+            )
+        raise ValueError(
+            f"(No answer option matching the "
+            f'correct answer "{factual_correct_answer}" found)'
+        )
+    return question_correctness
+
 
+def determine_auto_marked_correctness(
+    gs_answer: GsAnswerRow,
+    question_correctness: QuestionCorrectness,
+) -> str:
     auto_marked_as_correct = False
     auto_marked_as_wrong = False
     auto_marked_as_very_wrong = False
-    correct_answer_options = []
 
     # Determine numerically if very wrong is not specified
-    if (
-        factual_very_wrong_answer is None
-        or str(factual_very_wrong_answer).strip() == ""
-    ):
-        # Determine correct answer numerically if possible
-        correct_answer_options = [
-            answer_option
-            for answer_option in answer_options
-            if answer_option_matches_factual_answer(
-                answer_option, factual_correct_answer
-            )
-        ]
-        if len(correct_answer_options) == 0:
-            raise ValueError(
-                f"(No answer option numerically matching "
-                f'the correct answer "{factual_correct_answer}" found)'
-            )
+    if question_correctness.very_wrong_answer_is_derived_numerically:
         # Determine very wrong answer numerically if possible
         try:
             func = chosen_answer_option_is_this_many_answer_options_away_from_factual_answer
             answer_options_away_from_factual_answer = func(
-                gs_answer.answer, answer_options, factual_correct_answer
+                gs_answer.answer,
+                question_correctness.answer_options,
+                question_correctness.factual_correct_answer,
             )
             auto_marked_as_very_wrong = answer_options_away_from_factual_answer > 1
         except ValueError as e:
@@ -196,28 +170,16 @@ def determine_auto_marked_correctness(
             ]:
                 raise e
     else:
-        correct_answer_options = [
-            answer_option
-            for answer_option in answer_options
-            if answer_option_matches_factual_answer(
-                answer_option, factual_correct_answer
-            )
-        ]
-        if len(correct_answer_options) == 0:
-            raise ValueError(
-                f"(No answer option matching the "
-                f'correct answer "{factual_correct_answer}" found)'
-            )
         auto_marked_as_very_wrong = answer_option_is_the_same_as_factual_answer(
-            gs_answer.answer, factual_very_wrong_answer
+            gs_answer.answer, question_correctness.factual_very_wrong_answer
         )
 
-    if gs_answer.answer in correct_answer_options:
+    if gs_answer.answer in question_correctness.correct_answer_options:
         auto_marked_as_correct = True
     else:
         auto_marked_as_wrong = True
 
-    auto_marked_correctness = (
+    return (
         "1"
         if auto_marked_as_correct
         else "3"
@@ -227,51 +189,64 @@ def determine_auto_marked_correctness(
         else ""
     )
 
-    return (
-        auto_marked_correctness,
-        factual_correct_answer,
-        factual_very_wrong_answer,
-        corresponding_gs_answers,
-    )
-
 
 def auto_mark_correctness(
-    gs_answer: GsAnswerRow,
-    gs_answers_before_marking_correctness: list[GsAnswerRow],
+    gs_answers: list[GsAnswerRow],
     gs_questions: list[GsQuestionRow],
     gs_survey_results_data: GsSurveyResultsData,
 ) -> None:
-    try:
-        (
-            auto_marked_correctness,
-            factual_correct_answer,
-            factual_very_wrong_answer,
-            corresponding_gs_answers,
-        ) = determine_auto_marked_correctness(
-            gs_answer=gs_answer,
-            gs_answers=gs_answers_before_marking_correctness,
-            gs_questions=gs_questions,
-            gs_survey_results_data=gs_survey_results_data,
-        )
-        gs_answer.auto_marked_correctness_of_answer = auto_marked_correctness
-
-        # Update the actual x markings if no correct or
-        # very wrong answers had been marked previously
-        def match_non_empty_answers(a: GsAnswerRow) -> bool:
-            return (
-                a.correctness_of_answer_option is not None
-                and a.correctness_of_answer_option.strip() != ""
+    """
+    Auto-mark the correctness of the answer options, determining the correct
+    answer options once per question.
+    """
+    gs_questions_by_key: dict[tuple[int, int], GsQuestionRow] = {}
+    for gs_question in gs_questions:
+        # Answers without a survey id have no corresponding question
+        if gs_question.survey_id is not None:
+            gs_questions_by_key.setdefault(
+                (gs_question.survey_id, gs_question.question_number), gs_question
             )
-
-        non_empty_answers = list(
-            filter(match_non_empty_answers, corresponding_gs_answers)
+    gs_answers_by_key: dict[tuple[int, int], list[GsAnswerRow]] = {}
+    for gs_answer in gs_answers:
+        gs_answers_by_key.setdefault(
+            (gs_answer.survey_id, gs_answer.question_number), []
+        ).append(gs_answer)
+
+    for key, corresponding_gs_answers in gs_answers_by_key.items():
+        # Only update the actual x markings if no correct or
+        # very wrong answers had been marked previously
+        has_marked_answers = any(
+            gs_answer.correctness_of_answer_option is not None
+            and gs_answer.correctness_of_answer_option.strip() != ""
+            for gs_answer in corresponding_gs_answers
         )
-        if len(non_empty_answers) == 0:
-            gs_answer.correctness_of_answer_option = auto_marked_correctness
-            gs_answer.correct_answer_at_time_of_import = str(factual_correct_answer)
-            gs_answer.very_wrong_answer_at_time_of_import = str(
-                factual_very_wrong_answer
+        try:
+            if key not in gs_questions_by_key:
+                raise ValueError("(No corresponding question entry found)")
+            question_correctness = determine_question_correctness(
+                gs_questions_by_key[key],
+                corresponding_gs_answers,
+                gs_survey_results_data,
             )
-
-    except ValueError as e:
-        gs_answer.auto_marked_correctness_of_answer = str(e)
+        except ValueError as e:
+            for gs_answer in corresponding_gs_answers:
+                gs_answer.auto_marked_correctness_of_answer = str(e)
+            continue
+
+        for gs_answer in corresponding_gs_answers:
+            try:
+                auto_marked_correctness = determine_auto_marked_correctness(
+                    gs_answer, question_correctness
+                )
+            except ValueError as e:
+                gs_answer.auto_marked_correctness_of_answer = str(e)
+                continue
+            gs_answer.auto_marked_correctness_of_answer = auto_marked_correctness
+            if not has_marked_answers:
+                gs_answer.correctness_of_answer_option = auto_marked_correctness
+                gs_answer.correct_answer_at_time_of_import = str(
+                    question_correctness.factual_correct_answer
+                )
+                gs_answer.very_wrong_answer_at_time_of_import = str(
+                    question_correctness.factual_very_wrong_answer
+                )
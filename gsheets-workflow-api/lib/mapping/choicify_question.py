@@ -1,11 +1,12 @@
-from typing import List, Tuple
+from typing import List, Set, Tuple
 
+import numpy as np
 import pandas as pd
 
 from lib.mapping.utils import print_question_import_details
 from lib.survey_monkey.question_rollup import ChoiceSummary, QuestionRollup
-from lib.survey_monkey.response import Answer
-from lib.survey_monkey.survey import Answers, Choice, Question
+from lib.survey_monkey.submitted_answers import SubmittedAnswers
+from lib.survey_monkey.survey import Answers, Choice, Question, Survey
 
 NUMBER_OF_SIMULATED_CHOICES = 9
 
@@ -13,7 +14,7 @@ NUMBER_OF_SIMULATED_CHOICES = 9
 def choicify_question(
     question: Question,
     rollup: QuestionRollup,
-    submitted_answers: List[List[Answer]],
+    submitted_answers: SubmittedAnswers,
 ) -> Tuple[Question, QuestionRollup]:
     """
     Supplies multiple-choice choices for non multiple-choice questions.
@@ -22,15 +23,39 @@ def choicify_question(
     not multiple-choice questions into a corresponding answer summary as
     if they were multiple-choice questions
     """
-    if question.display_options and question.display_options.display_type == "slider":
+    if is_slider_question(question):
         return choicify_slider_question(question, rollup, submitted_answers)
     return question, rollup
 
 
+def is_slider_question(question: Question) -> bool:
+    return bool(
+        question.display_options and question.display_options.display_type == "slider"
+    )
+
+
+def question_needs_submitted_answers(question: Question) -> bool:
+    """
+    Whether choicify_question needs the individual submitted answers of a question.
+
+    Multiple-choice questions are fully described by their rollup.
+    """
+    return is_slider_question(question)
+
+
+def question_ids_needing_submitted_answers(survey: Survey) -> Set[str]:
+    return {
+        question.id
+        for page in survey.pages
+        for question in page.questions
+        if question_needs_submitted_answers(question)
+    }
+
+
 def choicify_slider_question(
     original_question: Question,
     original_rollup: QuestionRollup,
-    original_submitted_answers: List[List[Answer]],
+    original_submitted_answers: SubmittedAnswers,
 ) -> Tuple[Question, QuestionRollup]:
 
     if (
@@ -49,12 +74,9 @@ def choicify_slider_question(
     slider_max = int(original_question.validation.max)
 
     # Convert original submitted answers to integers
-    original_submitted_int_answers: List[int] = []
-    for original_submitted_answer in original_submitted_answers:
-        if original_submitted_answer[0].text:
-            original_submitted_int_answers.append(
-                int(original_submitted_answer[0].text)
-            )
+    original_submitted_int_answers = (
+        original_submitted_answers.first_answer_int_values()
+    )
 
     df = pd.DataFrame(
         {"original_submitted_int_answers": original_submitted_int_answers}
@@ -75,35 +97,35 @@ def choicify_slider_question(
     ):
         divided_into_brackets_df["label"] = divided_into_brackets_df["label"] + "%"
 
-    # Inject the corresponding choices as if this was a multiple choice question
+    # Inject the corresponding choices as if this was a multiple choice question,
+    # and the corresponding question rollup statistics
     question: Question = original_question.copy()
     choices: List[Choice] = []
-    for row_index, bracket in divided_into_brackets_df.iterrows():
+    choice_summaries: List[ChoiceSummary] = []
+    for row_index, label, answer_count in zip(
+        divided_into_brackets_df.index.tolist(),
+        divided_into_brackets_df["label"].tolist(),
+        divided_into_brackets_df["answer_counts"].tolist(),
+    ):
         choice_id = f"{original_question.id}:{row_index}"
         choice: Choice = Choice(
             id=choice_id,
             position=row_index,
-            text=bracket["label"],
+            text=label,
             visible=True,
         )
         choices.append(choice)
+        choice_summary: ChoiceSummary = ChoiceSummary(
+            id=choice_id,
+            count=answer_count,
+        )
+        choice_summaries.append(choice_summary)
     question.answers = Answers(
         choices=choices,
     )
 
-    # Inject the corresponding question rollup statistics
     rollup: QuestionRollup = original_rollup.copy()
     summary_item = rollup.summary[0].copy()
-    choice_summaries: List[ChoiceSummary] = []
-    for row_index, bracket in divided_into_brackets_df.iterrows():
-        choice_id = f"{original_question.id}:{row_index}"
-        choice_summary: ChoiceSummary = ChoiceSummary(
-            id=choice_id,
-            count=bracket["answer_counts"]
-            if not pd.isna(bracket["answer_counts"])
-            else 0,
-        )
-        choice_summaries.append(choice_summary)
     summary_item.choices = choice_summaries
     rollup.summary[0] = summary_item
 
@@ -113,48 +135,61 @@ def choicify_slider_question(
 def divide_into_brackets(
     int_answers: pd.Series, num_brackets: int, min_value: int, max_value: int
 ) -> pd.DataFrame:
-    """Divide the slider choices into a set of as-equal-as-possible slider values."""
-    # Divide the slider values into n equal-sized bins using cut
-    slider_values = pd.Series(data=range(min_value, max_value + 1))
-    slider_bins = pd.cut(slider_values, num_brackets, labels=False, retbins=True)
-    slider_bin_indices = slider_bins[0]
-    slider_bins_min = slider_values.groupby(slider_bin_indices).apply(
-        lambda x: min(list(x))
-    )
-    slider_bins_max = slider_values.groupby(slider_bin_indices).apply(
-        lambda x: max(list(x))
+    """
+    Divide the slider choices into a set of as-equal-as-possible slider values.
+
+    The brackets are those that pd.cut divides the slider values into, indexed
+    by bracket number, leaving out brackets without any slider values. Each
+    has a label, the amount of answers in it and their min and max values.
+    """
+    slider_values = np.arange(min_value, max_value + 1)
+    bin_edges = cut_bin_edges(slider_values, num_brackets)
+    slider_bin_indices = np.searchsorted(bin_edges, slider_values, side="left") - 1
+    # Slider values are sorted, so the bins hold consecutive slider values
+    bin_indices, first_positions, slider_value_counts = np.unique(
+        slider_bin_indices, return_index=True, return_counts=True
     )
-    slider_bins_df = pd.DataFrame(
+    slider_bins_min = slider_values[first_positions]
+    slider_bins_max = slider_values[first_positions + slider_value_counts - 1]
+
+    # Assign the answers to the bins, excluding those outside of the bin edges
+    answers = int_answers.to_numpy(dtype=np.int64)
+    answer_bin_indices = np.searchsorted(bin_edges, answers, side="left") - 1
+    is_binned = (answer_bin_indices >= 0) & (answer_bin_indices < num_brackets)
+    answers = answers[is_binned]
+    answer_bin_indices = answer_bin_indices[is_binned]
+    answer_counts = np.bincount(answer_bin_indices, minlength=num_brackets)
+    bin_min = np.full(num_brackets, np.inf)
+    np.minimum.at(bin_min, answer_bin_indices, answers)
+    bin_max = np.full(num_brackets, -np.inf)
+    np.maximum.at(bin_max, answer_bin_indices, answers)
+    has_answers = answer_counts > 0
+
+    return pd.DataFrame(
         {
-            "slider_bins_min": slider_bins_min,
-            "slider_bins_max": slider_bins_max,
-        }
+            "label": [
+                f"{slider_bin_min}-{slider_bin_max}"
+                for slider_bin_min, slider_bin_max in zip(
+                    slider_bins_min, slider_bins_max
+                )
+            ],
+            "bin_min": np.where(has_answers, bin_min, np.nan)[bin_indices],
+            "bin_max": np.where(has_answers, bin_max, np.nan)[bin_indices],
+            "answer_counts": answer_counts[bin_indices],
+        },
+        index=bin_indices,
     )
-    slider_bins_df["slider_bins_label"] = (
-        slider_bins_df["slider_bins_min"].astype(str)
-        + "-"
-        + slider_bins_df["slider_bins_max"].astype(str)
-    )
-
-    # Assign the series the bins, again using cut, but with the bin edges from above
-    bins = pd.cut(int_answers, bins=slider_bins[1], labels=False, retbins=True)
-    bin_indices = bins[0]
 
-    # Use the bin indices to index the original series
-    binned_int_answers = int_answers.groupby(bin_indices).apply(
-        lambda x: sorted(list(x))
-    )
-    bin_min = int_answers.groupby(bin_indices).apply(lambda x: min(list(x)))
-    bin_max = int_answers.groupby(bin_indices).apply(lambda x: max(list(x)))
-    answer_counts = int_answers.groupby(bin_indices).apply(lambda x: len(x))
 
-    df = pd.DataFrame(
-        {
-            "label": slider_bins_df["slider_bins_label"],
-            "binned_int_answers": binned_int_answers,
-            "bin_min": bin_min,
-            "bin_max": bin_max,
-            "answer_counts": answer_counts,
-        }
-    )
-    return df
+def cut_bin_edges(values: np.ndarray, num_bins: int) -> np.ndarray:
+    """The edges of the bins that pd.cut(values, num_bins) divides values into."""
+    min_value = values.min() + 0.0
+    max_value = values.max() + 0.0
+    if min_value == max_value:
+        min_value -= 0.001 * abs(min_value) if min_value != 0 else 0.001
+        max_value += 0.001 * abs(max_value) if max_value != 0 else 0.001
+        return np.linspace(min_value, max_value, num_bins + 1, endpoint=True)
+    bin_edges = np.linspace(min_value, max_value, num_bins + 1, endpoint=True)
+    # The lowest edge is lowered to include the min value, the bins being (a, b]
+    bin_edges[0] -= (max_value - min_value) * 0.001
+    return bin_edges
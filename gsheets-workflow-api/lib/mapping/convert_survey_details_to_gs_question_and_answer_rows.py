@@ -1,6 +1,5 @@
-import copy
 from json import dumps
-from typing import Dict, List, Tuple
+from typing import Dict, Tuple
 
 from lib.app_singleton import app_logger
 from lib.find_by_attribute import find_by_attribute
@@ -10,7 +9,7 @@ from lib.mapping.choicify_question import choicify_question
 from lib.mapping.summarize_gs_answer import summarize_gs_answer
 from lib.mapping.summarize_gs_question import summarize_gs_question
 from lib.survey_monkey.question_rollup import QuestionRollup
-from lib.survey_monkey.response import Answer
+from lib.survey_monkey.submitted_answers import SubmittedAnswers
 from lib.survey_monkey.survey import Question, Survey
 
 # from lib.mapping.utils import print_question_import_details
@@ -25,7 +24,7 @@ def convert_survey_question_info_to_gs_question_and_answers(
     question_number: int,
     question: Question,
     rollup: QuestionRollup,
-    submitted_answers: List[List[Answer]],
+    submitted_answers: SubmittedAnswers,
     gs_survey_results_data: GsSurveyResultsData,
 ) -> Tuple[GsQuestionRow, list[GsAnswerRow]]:
     gs_answers = []
@@ -74,7 +73,7 @@ def convert_survey_question_info_to_gs_question_and_answers(
 def convert_survey_details_to_gs_question_and_answer_rows(
     survey_details: Survey,
     question_rollups_by_question_id: Dict[str, QuestionRollup],
-    submitted_answers_by_question_id: Dict[str, List[List[Answer]]],
+    submitted_answers_by_question_id: Dict[str, SubmittedAnswers],
     gs_survey_results_data: GsSurveyResultsData,
 ) -> Tuple[list[GsQuestionRow], list[GsAnswerRow], list[Question]]:
     """Convert survey monkey data to rows that are to be imported in gs_combined."""
@@ -102,7 +101,7 @@ def convert_survey_details_to_gs_question_and_answer_rows(
             submitted_answers = (
                 submitted_answers_by_question_id[question.id]
                 if question.id in submitted_answers_by_question_id
-                else []
+                else SubmittedAnswers()
             )
             try:
                 (
@@ -116,7 +115,7 @@ def convert_survey_details_to_gs_question_and_answer_rows(
                     submitted_answers=submitted_answers,
                     gs_survey_results_data=gs_survey_results_data,
                 )
-                all_gs_answers = all_gs_answers + gs_answers
+                all_gs_answers.extend(gs_answers)
                 all_gs_questions.append(gs_question)
             except UnsupportedQuestionException as e:
                 ignored_questions.append(question)
@@ -134,13 +133,10 @@ def convert_survey_details_to_gs_question_and_answer_rows(
                 # print_question_import_details(question, rollup, submitted_answers)
 
     # Auto-mark correctness
-    gs_answers_before_marking_correctness = copy.deepcopy(all_gs_answers)
-    for gs_answer in all_gs_answers:
-        auto_mark_correctness(
-            gs_answer=gs_answer,
-            gs_answers_before_marking_correctness=gs_answers_before_marking_correctness,
-            gs_questions=all_gs_questions,
-            gs_survey_results_data=gs_survey_results_data,
-        )
+    auto_mark_correctness(
+        gs_answers=all_gs_answers,
+        gs_questions=all_gs_questions,
+        gs_survey_results_data=gs_survey_results_data,
+    )
 
     return all_gs_questions, all_gs_answers, ignored_questions
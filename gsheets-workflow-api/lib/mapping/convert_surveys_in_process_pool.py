@@ -0,0 +1,194 @@
+import copy
+import logging
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from lib.app_singleton import app_logger
+from lib.gs_combined.schemas import GsAnswerRow, GsQuestionRow, GsSurveyResultsData
+from lib.mapping.convert_survey_details_to_gs_question_and_answer_rows import (
+    convert_survey_details_to_gs_question_and_answer_rows,
+)
+from lib.mapping.map_question_ids import get_imported_igno_questions_index
+from lib.survey_monkey.question_rollup import QuestionRollup
+from lib.survey_monkey.submitted_answers import SubmittedAnswers
+from lib.survey_monkey.survey import Question, Survey
+
+SurveyConversion = Tuple[List[GsQuestionRow], List[GsAnswerRow], List[Question]]
+# The conversion (or the error message and traceback) and the log records of a survey
+WorkerResult = Tuple[
+    Optional[SurveyConversion], List[logging.LogRecord], Optional[Tuple[str, str]]
+]
+
+
+class SurveyConversionError(Exception):
+    """
+    An error raised by the conversion of a survey in a worker process, with
+    the traceback of the original exception, which need not be picklable.
+    """
+
+    pass
+
+
+class LogRecordCollector(logging.Handler):
+    """Collects log records, to be emitted by another process."""
+
+    records: List[logging.LogRecord]
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # The arguments and exception info are merged into the message, since
+        # they need not be picklable, as by logging.handlers.QueueHandler
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        self.records.append(record)
+
+
+# The state of a worker process, see init_conversion_worker
+worker_gs_survey_results_data: Optional[GsSurveyResultsData] = None
+worker_log_record_collector = LogRecordCollector()
+
+
+def get_conversion_max_workers(config: Dict[str, str]) -> int:
+    """
+    The amount of worker processes to convert surveys in, 1 (in the main
+    process) unless configured, since worker processes may not be able to
+    start where the function is deployed.
+    """
+    if config.get("SURVEY_CONVERSION_MAX_WORKERS"):
+        return int(config["SURVEY_CONVERSION_MAX_WORKERS"])
+    return 1
+
+
+def conversion_reference_data(
+    gs_survey_results_data: GsSurveyResultsData,
+) -> GsSurveyResultsData:
+    """
+    What the conversion of surveys reads of gs_survey_results_data, to be
+    passed to the worker processes: the index of imported_igno_questions_info
+    and the first row of questions_combo, the template of new question rows.
+    """
+    return GsSurveyResultsData(
+        # Only read through the index
+        imported_igno_questions_info=(
+            gs_survey_results_data.imported_igno_questions_info.read_only_copy(0)
+        ),
+        questions_combo=gs_survey_results_data.questions_combo.read_only_copy(1),
+        topline_combo=gs_survey_results_data.topline_combo.read_only_copy(0),
+        imported_igno_questions_index=get_imported_igno_questions_index(
+            gs_survey_results_data
+        ),
+    )
+
+
+def init_conversion_worker(
+    gs_survey_results_data: GsSurveyResultsData, log_level: int
+) -> None:
+    """Keep the reference data once per worker process, and collect its logs."""
+    global worker_gs_survey_results_data
+    worker_gs_survey_results_data = gs_survey_results_data
+    for handler in list(app_logger.handlers):
+        app_logger.removeHandler(handler)
+    app_logger.addHandler(worker_log_record_collector)
+    app_logger.setLevel(log_level)
+
+
+def convert_survey_in_worker(
+    survey_details: Survey,
+    question_rollups_by_question_id: Dict[str, QuestionRollup],
+    submitted_answers_by_question_id: Dict[str, SubmittedAnswers],
+) -> WorkerResult:
+    assert worker_gs_survey_results_data is not None
+    worker_log_record_collector.records = []
+    try:
+        survey_conversion = convert_survey_details_to_gs_question_and_answer_rows(
+            survey_details,
+            question_rollups_by_question_id,
+            submitted_answers_by_question_id,
+            worker_gs_survey_results_data,
+        )
+    except Exception as error:  # noqa B902
+        return (
+            None,
+            worker_log_record_collector.records,
+            (str(error), traceback.format_exc()),
+        )
+    return survey_conversion, worker_log_record_collector.records, None
+
+
+def survey_question_ids(survey_details: Survey) -> List[str]:
+    return [question.id for page in survey_details.pages for question in page.questions]
+
+
+def convert_surveys_in_process_pool(
+    surveys: List[Survey],
+    question_rollups_by_question_id: Dict[str, QuestionRollup],
+    submitted_answers_by_question_id: Dict[str, SubmittedAnswers],
+    gs_survey_results_data: GsSurveyResultsData,
+    max_workers: int,
+    mp_context: Optional[BaseContext] = None,
+) -> Iterator["Future[WorkerResult]"]:
+    """
+    Convert the surveys as by convert_survey_details_to_gs_question_and_answer_rows,
+    in a pool of up to max_workers processes, started by mp_context if given.
+
+    The reference data is passed to each worker process once, and each survey
+    along with its own question rollups and submitted answers only. Returns the
+    futures of the conversions in survey order, see survey_conversion_result.
+    Raises BrokenProcessPool (from the futures too) if the worker processes
+    stop unexpectedly.
+    """
+    executor = ProcessPoolExecutor(
+        max_workers=max(1, min(max_workers, len(surveys))),
+        mp_context=mp_context,
+        initializer=init_conversion_worker,
+        initargs=(conversion_reference_data(gs_survey_results_data), app_logger.level),
+    )
+    try:
+        futures = []
+        for survey_details in surveys:
+            question_ids = survey_question_ids(survey_details)
+            futures.append(
+                executor.submit(
+                    convert_survey_in_worker,
+                    survey_details,
+                    {
+                        question_id: question_rollups_by_question_id[question_id]
+                        for question_id in question_ids
+                        if question_id in question_rollups_by_question_id
+                    },
+                    {
+                        question_id: submitted_answers_by_question_id[question_id]
+                        for question_id in question_ids
+                        if question_id in submitted_answers_by_question_id
+                    },
+                )
+            )
+    finally:
+        # The submitted conversions are still carried out
+        executor.shutdown(wait=False)
+    return iter(futures)
+
+
+def survey_conversion_result(future: "Future[WorkerResult]") -> SurveyConversion:
+    """
+    The rows of a survey converted in a worker process, once converted, emitting
+    the log messages of its conversion first. Raises SurveyConversionError if
+    the conversion failed.
+    """
+    survey_conversion, log_records, error = future.result()
+    for log_record in log_records:
+        app_logger.handle(log_record)
+    if error is not None:
+        message, formatted_traceback = error
+        raise SurveyConversionError(f"{message}\n\n{formatted_traceback}")
+    assert survey_conversion is not None
+    return survey_conversion
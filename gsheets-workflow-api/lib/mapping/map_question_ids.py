@@ -1,3 +1,7 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
 from lib.app_singleton import app_logger
 from lib.gs_combined.schemas import GsQuestionRow, GsSurveyResultsData
 from lib.parsing.key_normalizer_for_slightly_fuzzy_lookups import (
@@ -6,13 +10,121 @@ from lib.parsing.key_normalizer_for_slightly_fuzzy_lookups import (
 from lib.parsing.parse_survey_name import parse_survey_name
 
 
+class ImportedIgnoQuestionsIndex:
+    """
+    The question ids in imported_igno_questions_info by survey batch number and
+    fuzzy question text, so that questions can be mapped without going through
+    all of imported_igno_questions_info for each of them.
+
+    Also finds the entries of questions by their ids, e.g. to look up their
+    factual answers.
+
+    The index of each group of columns (Igno Index, Foreign Country...) is built
+    when first used.
+    """
+
+    igno_questions_df: pd.DataFrame
+    _question_ids_by_key: Dict[Tuple[str, str, str], Dict[Tuple[str, str], List[Any]]]
+    _entry_positions_by_question_id: Dict[str, Dict[Any, int]]
+    _filled_igno_questions_df: Optional[pd.DataFrame]
+
+    def __init__(self, igno_questions_df: pd.DataFrame):
+        self.igno_questions_df = igno_questions_df
+        self._question_ids_by_key = {}
+        self._entry_positions_by_question_id = {}
+        self._filled_igno_questions_df = None
+
+    def entry(
+        self, question_id_attribute: str, question_id: str
+    ) -> Optional[pd.Series]:
+        """The first entry with the question id, with empty cells as ""."""
+        if question_id_attribute not in self._entry_positions_by_question_id:
+            entry_positions: Dict[Any, int] = {}
+            for position, entry_question_id in enumerate(
+                self.igno_questions_df[question_id_attribute]
+            ):
+                if entry_question_id:
+                    entry_positions.setdefault(entry_question_id, position)
+            self._entry_positions_by_question_id[
+                question_id_attribute
+            ] = entry_positions
+        entry_position = self._entry_positions_by_question_id[
+            question_id_attribute
+        ].get(question_id)
+        if entry_position is None:
+            return None
+        if self._filled_igno_questions_df is None:
+            self._filled_igno_questions_df = self.igno_questions_df.fillna("")
+        return self._filled_igno_questions_df.iloc[entry_position]
+
+    def question_ids(
+        self,
+        batch_number_attribute: str,
+        question_text_attribute: str,
+        question_id_attribute: str,
+        survey_batch_number: str,
+        fuzzy_question_text: str,
+    ) -> List[Any]:
+        attributes = (
+            batch_number_attribute,
+            question_text_attribute,
+            question_id_attribute,
+        )
+        if attributes not in self._question_ids_by_key:
+            self._question_ids_by_key[attributes] = self._build(*attributes)
+        return self._question_ids_by_key[attributes].get(
+            (survey_batch_number, fuzzy_question_text), []
+        )
+
+    def _build(
+        self,
+        batch_number_attribute: str,
+        question_text_attribute: str,
+        question_id_attribute: str,
+    ) -> Dict[Tuple[str, str], List[Any]]:
+        df = self.igno_questions_df
+        question_ids_by_key: Dict[Tuple[str, str], List[Any]] = {}
+        for batch_number, question_text, question_id in zip(
+            df[batch_number_attribute],
+            df[question_text_attribute],
+            df[question_id_attribute],
+        ):
+            if not question_text or not batch_number:
+                continue
+            key = (
+                key_normalizer_for_slightly_fuzzy_lookups(batch_number),
+                key_normalizer_for_slightly_fuzzy_lookups(question_text),
+            )
+            question_ids_by_key.setdefault(key, []).append(question_id)
+        return question_ids_by_key
+
+
+def get_imported_igno_questions_index(
+    gs_survey_results_data: GsSurveyResultsData,
+) -> ImportedIgnoQuestionsIndex:
+    """The index of imported_igno_questions_info, built once per run."""
+    if gs_survey_results_data.imported_igno_questions_index is None:
+        gs_survey_results_data.imported_igno_questions_index = (
+            ImportedIgnoQuestionsIndex(
+                gs_survey_results_data.imported_igno_questions_info.data.df
+            )
+        )
+    return gs_survey_results_data.imported_igno_questions_index
+
+
 def map_question_id(
     survey_batch_number_attribute: str,
     question_text_attribute: str,
     question_id_attribute: str,
     gs_question_row: GsQuestionRow,
     gs_survey_results_data: GsSurveyResultsData,
+    batch_number_attribute: Optional[str] = None,
 ) -> list[str]:
+    """
+    batch_number_attribute is the attribute of the survey batch number in
+    imported_igno_questions_info, if different from the one in the parsed
+    survey name.
+    """
     if (
         gs_question_row.survey_name == "#N/A"
         or gs_question_row.survey_name == ""
@@ -35,30 +147,22 @@ def map_question_id(
         gs_question_row.question_text
     )
 
-    igno_questions_df = gs_survey_results_data.imported_igno_questions_info.data.df
-    matches = igno_questions_df.apply(
-        lambda x: x[question_text_attribute]
-        and key_normalizer_for_slightly_fuzzy_lookups(x[question_text_attribute])
-        == fuzzy_question_text
-        and x[survey_batch_number_attribute]
-        and key_normalizer_for_slightly_fuzzy_lookups(x[survey_batch_number_attribute])
-        == str(survey_batch_number),
-        axis=1,
+    auto_mapped_ids = get_imported_igno_questions_index(
+        gs_survey_results_data
+    ).question_ids(
+        batch_number_attribute or survey_batch_number_attribute,
+        question_text_attribute,
+        question_id_attribute,
+        str(survey_batch_number),
+        fuzzy_question_text,
     )
-    matching_imported_igno_questions_info_entries = igno_questions_df[matches]
 
-    if len(matching_imported_igno_questions_info_entries) == 0:
+    if len(auto_mapped_ids) == 0:
         raise ValueError(
             f"(No questions found within {survey_batch_number_attribute}"
             f' {survey_batch_number}, fuzzy-searching for "{fuzzy_question_text}")'
         )
 
-    rows = matching_imported_igno_questions_info_entries.iterrows()
-    auto_mapped_ids = [
-        imported_igno_questions_info_entry[question_id_attribute]
-        for row_number, imported_igno_questions_info_entry in rows
-    ]
-
     return auto_mapped_ids
 
 
@@ -123,6 +227,7 @@ def map_step5_question_id(
             "step5_question_id",
             gs_question_row,
             gs_survey_results_data,
+            batch_number_attribute="step5_study_survey_batch_number",
         )
         gs_question_row.auto_mapped_step5_question_id = "; ".join(auto_mapped_ids)
         if (
@@ -1,16 +1,15 @@
 from json import dumps
-from typing import List
 
 from lib.app_singleton import app_logger
 from lib.survey_monkey.question_rollup import QuestionRollup
-from lib.survey_monkey.response import Answer
+from lib.survey_monkey.submitted_answers import SubmittedAnswers
 from lib.survey_monkey.survey import Question
 
 
 def print_question_import_details(
     question: Question,
     rollup: QuestionRollup,
-    submitted_answers: List[List[Answer]],
+    submitted_answers: SubmittedAnswers,
 ) -> None:
     app_logger.debug(
         "question: {question}", {"question": dumps(question.dict(), indent=2)}
@@ -1,8 +1,13 @@
+import numpy as np
+import pandas as pd
+
 from lib.parsing.extract_numerical_parts_of_answer_option import (
     extract_numerical_parts_of_answer_option,
+    extract_numerical_parts_of_answer_option_series,
 )
 from lib.parsing.key_normalizer_for_slightly_fuzzy_lookups import (
     key_normalizer_for_slightly_fuzzy_lookups,
+    key_normalizer_for_slightly_fuzzy_lookups_series,
 )
 
 
@@ -50,3 +55,49 @@ def answer_option_matches_factual_answer_numerically(
             ):
                 return True
     return False
+
+
+def answer_option_matches_factual_answer_series(
+    answer_options: pd.Series, factual_answers: pd.Series
+) -> pd.Series:
+    """
+    The same as answer_option_matches_factual_answer for each answer option and
+    the factual answer at the same position, e.g. to re-mark the correctness of
+    all answers in topline_combo.
+    """
+    if len(factual_answers) != len(answer_options):
+        raise ValueError("As many factual answers as answer options are needed")
+    matches = (
+        key_normalizer_for_slightly_fuzzy_lookups_series(answer_options).to_numpy()
+        == key_normalizer_for_slightly_fuzzy_lookups_series(factual_answers).to_numpy()
+    )
+    # Only the others are matched numerically, like the scalar function does
+    positions = np.flatnonzero(~matches)
+    matches[positions] = answer_option_matches_factual_answer_numerically_series(
+        answer_options.iloc[positions], factual_answers.iloc[positions]
+    )
+    return pd.Series(matches, index=answer_options.index)
+
+
+def answer_option_matches_factual_answer_numerically_series(
+    answer_options: pd.Series, factual_answers: pd.Series
+) -> np.ndarray:
+    numerical_parts_of_answer_options = extract_numerical_parts_of_answer_option_series(
+        answer_options
+    )
+    numerical_parts_of_factual_answers = (
+        extract_numerical_parts_of_answer_option_series(factual_answers)
+    )
+    part_count = numerical_parts_of_answer_options["part_count"].to_numpy()
+    first_part = numerical_parts_of_answer_options["first_part"].to_numpy()
+    second_part = numerical_parts_of_answer_options["second_part"].to_numpy()
+    factual_answer_numeric = numerical_parts_of_factual_answers["first_part"].to_numpy()
+    return (numerical_parts_of_factual_answers["part_count"].to_numpy() > 0) & (
+        ((part_count == 1) & (first_part == factual_answer_numeric))
+        # Support matching eg "34%" to "30-40%"
+        | (
+            (part_count == 2)
+            & (first_part <= factual_answer_numeric)
+            & (second_part >= factual_answer_numeric)
+        )
+    )
@@ -1,14 +1,30 @@
 import re
-from typing import Any
+from typing import Any, Tuple
+
+import numpy as np
+import pandas as pd
 
 from lib.parsing.key_normalizer_for_slightly_fuzzy_lookups import (
     key_normalizer_for_slightly_fuzzy_lookups,
+    key_normalizer_for_slightly_fuzzy_lookups_series,
 )
+from lib.parsing.parsing_cache import memoized
+
+# Numeric contents in a string ("1%", "1000€", "14 pounds, "$1", "About 10",
+# "$1 billion" etc), possibly a range ("12-15%")
+numeric_pattern = re.compile(r"(-?\d[\d.,]*)(%)?(-(\d[\d.,]*)(%)?)?")
+# Numbers that float() parses for sure, which most numeric strings are
+plain_number_pattern = re.compile(r"\s*-?(\d+\.?\d*|\.\d+)\s*")
 
 
 def is_numeric(n: Any) -> bool:
+    return is_numeric_string(str(n))
+
+
+@memoized
+def is_numeric_string(n: str) -> bool:
     # support commas, like parseFloat in js does
-    sanitized_n = str(n).replace(",", "")
+    sanitized_n = n.replace(",", "")
     # print("sanitized_n", sanitized_n)
     try:
         float(sanitized_n)
@@ -25,18 +41,20 @@ def to_float(number: str, is_percentage: bool) -> float:
     return float(number.replace(",", ""))
 
 
-def extract_numerical_parts_of_answer_option(answer_option: str) -> list[float]:
+def extract_numerical_parts_of_answer_option(answer_option: Any) -> list[float]:
+    return list(extract_numerical_parts(str(answer_option)))
+
+
+@memoized
+def extract_numerical_parts(answer_option: str) -> Tuple[float, ...]:
     answer_option = key_normalizer_for_slightly_fuzzy_lookups(
-        str(answer_option).strip().lower()
+        answer_option.strip().lower()
     )
 
     if is_numeric(answer_option):
-        return [float(answer_option)]
+        return (float(answer_option),)
 
-    # Look for numeric contents in the string
-    # ("1%", "1000€", "14 pounds, "$1", "About 10", "$1 billion" etc)
-    numeric_regex = r"(-?\d[\d.,]*)(%)?(-(\d[\d.,]*)(%)?)?"
-    numeric_match_result = re.search(numeric_regex, answer_option)
+    numeric_match_result = numeric_pattern.search(answer_option)
     if numeric_match_result:
         first_part_number = numeric_match_result.group(1)
         first_part_is_percentage = numeric_match_result.group(2) == "%"
@@ -49,8 +67,103 @@ def extract_numerical_parts_of_answer_option(answer_option: str) -> list[float]:
                 first_part_is_percentage = True
         first_part = to_float(first_part_number, first_part_is_percentage)
         if not second_part_number:
-            return [first_part]
+            return (first_part,)
         else:
             second_part = to_float(second_part_number, second_part_is_percentage)
-            return [first_part, second_part]
-    return []
+            return (first_part, second_part)
+    return ()
+
+
+def is_numeric_series(values: pd.Series) -> pd.Series:
+    """The same as values.apply(is_numeric)"""
+    sanitized_values = values.astype(str).str.replace(",", "", regex=False)
+    result = sanitized_values.str.fullmatch(plain_number_pattern).astype(bool)
+    # Others, like "1e5", "nan" or "inf", may still be numeric
+    if not result.all():
+        result[~result] = sanitized_values[~result].map(is_numeric_string)
+    return result.astype(bool)
+
+
+def to_float_series(numbers: pd.Series, is_percentage: np.ndarray) -> np.ndarray:
+    """The same as to_float for each number and percentage flag"""
+    is_numeric_number = is_numeric_series(numbers)
+    if not is_numeric_number.all():
+        number = numbers[~is_numeric_number].iloc[0]
+        raise Exception(f'The number "{number}" is not deemed numeric')
+    values = numbers.str.replace(",", "", regex=False).astype(float).to_numpy()
+    return np.where(is_percentage, values / 100, values)
+
+
+def extract_numerical_parts_of_answer_option_series(
+    answer_options: pd.Series,
+) -> pd.DataFrame:
+    """
+    The numerical parts of each answer option, the same as extracted by
+    extract_numerical_parts_of_answer_option, with the columns:
+
+    - part_count: the number of parts (0, 1 or 2, for a range)
+    - first_part and second_part: the parts, NaN when missing
+    - first_part_is_percentage and second_part_is_percentage
+
+    Raises for the answer options that the scalar function raises for.
+    """
+    # Columns of answer options repeat the same few ones over and over
+    codes, distinct_answer_options = pd.factorize(answer_options.astype(str))
+    numerical_parts = _extract_numerical_parts_of_distinct_answer_options(
+        pd.Series(distinct_answer_options, dtype=object)
+    ).take(codes)
+    numerical_parts.index = answer_options.index
+    return numerical_parts
+
+
+def _extract_numerical_parts_of_distinct_answer_options(
+    answer_options: pd.Series,
+) -> pd.DataFrame:
+    answer_option_count = len(answer_options)
+    part_count = np.zeros(answer_option_count, dtype=int)
+    first_part = np.full(answer_option_count, np.nan)
+    second_part = np.full(answer_option_count, np.nan)
+    first_part_is_percentage = np.zeros(answer_option_count, dtype=bool)
+    second_part_is_percentage = np.zeros(answer_option_count, dtype=bool)
+
+    normalized_answer_options = key_normalizer_for_slightly_fuzzy_lookups_series(
+        answer_options.str.strip().str.lower()
+    )
+    is_numeric_answer_option = is_numeric_series(normalized_answer_options).to_numpy()
+    # Without removing commas, like the scalar function
+    first_part[is_numeric_answer_option] = normalized_answer_options[
+        is_numeric_answer_option
+    ].astype(float)
+    part_count[is_numeric_answer_option] = 1
+
+    # Look for numeric contents in the other answer options
+    positions = np.flatnonzero(~is_numeric_answer_option)
+    matches = normalized_answer_options.iloc[positions].str.extract(numeric_pattern)
+    has_first_part = matches[0].notna().to_numpy()
+    has_second_part = matches[3].notna().to_numpy()
+    second_part_is_percentage[positions] = (matches[4] == "%").to_numpy()
+    # A percentage at the end makes both parts a percentage (e.g. 12-15%)
+    first_part_is_percentage[positions] = (matches[1] == "%").to_numpy() | (
+        has_second_part & second_part_is_percentage[positions]
+    )
+
+    first_part_positions = positions[has_first_part]
+    first_part[first_part_positions] = to_float_series(
+        matches[0][has_first_part], first_part_is_percentage[first_part_positions]
+    )
+    part_count[first_part_positions] = 1
+    second_part_positions = positions[has_second_part]
+    second_part[second_part_positions] = to_float_series(
+        matches[3][has_second_part], second_part_is_percentage[second_part_positions]
+    )
+    part_count[second_part_positions] = 2
+
+    return pd.DataFrame(
+        {
+            "part_count": part_count,
+            "first_part": first_part,
+            "second_part": second_part,
+            "first_part_is_percentage": first_part_is_percentage,
+            "second_part_is_percentage": second_part_is_percentage,
+        }
+    )
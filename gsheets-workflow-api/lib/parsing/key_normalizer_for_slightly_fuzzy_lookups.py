@@ -1,9 +1,36 @@
 import re
 from typing import Any
 
+import numpy as np
+import pandas as pd
 from unidecode import unidecode
 
+from lib.parsing.parsing_cache import memoized
+
+non_key_characters_pattern = re.compile(r"[^a-z0-9%\-.,<> ()]")
+
 
 def key_normalizer_for_slightly_fuzzy_lookups(lookup_key: Any) -> str:
-    trimmed_lower_cased_without_diacritics = unidecode(str(lookup_key).strip().lower())
-    return re.sub(r"[^a-z0-9%\-.,<> ()]", "", trimmed_lower_cased_without_diacritics)
+    return normalize_lookup_key(str(lookup_key))
+
+
+@memoized
+def normalize_lookup_key(lookup_key: str) -> str:
+    trimmed_lower_cased_without_diacritics = unidecode(lookup_key.strip().lower())
+    return non_key_characters_pattern.sub("", trimmed_lower_cased_without_diacritics)
+
+
+def key_normalizer_for_slightly_fuzzy_lookups_series(
+    lookup_keys: pd.Series,
+) -> pd.Series:
+    """The same as lookup_keys.apply(key_normalizer_for_slightly_fuzzy_lookups)"""
+    # Distinct keys are few, so only those are normalized
+    codes, distinct_lookup_keys = pd.factorize(lookup_keys.astype(str))
+    normalized_lookup_keys = [
+        normalize_lookup_key(lookup_key) for lookup_key in distinct_lookup_keys
+    ]
+    return pd.Series(
+        np.array(normalized_lookup_keys, dtype=object)[codes],
+        index=lookup_keys.index,
+        dtype=object,
+    )
@@ -1,13 +1,22 @@
 from typing import Dict, Union
 
 from lib.parsing.extract_numerical_parts_of_answer_option import (
-    extract_numerical_parts_of_answer_option
+    extract_numerical_parts_of_answer_option,
 )
+from lib.parsing.parsing_cache import memoized
 
 BatchNumberParseResult = Union[str, None, bool]
 
 
 def parse_survey_name(survey_name: str) -> Dict[str, BatchNumberParseResult]:
+    # A copy, since the memoized result is shared between calls
+    return dict(parse_survey_name_memoized(survey_name))
+
+
+@memoized
+def parse_survey_name_memoized(
+    survey_name: str,
+) -> Dict[str, BatchNumberParseResult]:
     world_views_text_found = (
         "World Views " in survey_name or "Worldviews " in survey_name
     )
@@ -32,9 +41,7 @@ def parse_survey_name(survey_name: str) -> Dict[str, BatchNumberParseResult]:
         else False
     )
     custom_igno_index_world_views_survey_batch_number: BatchNumberParseResult = (
-        str(int(numerical_parts_of_survey_name[0]))
-        if custom_igno_text_found
-        else False
+        str(int(numerical_parts_of_survey_name[0])) if custom_igno_text_found else False
     )
 
     # Some special cases
@@ -65,5 +72,7 @@ def parse_survey_name(survey_name: str) -> Dict[str, BatchNumberParseResult]:
         "igno_index_world_views_survey_batch_number": world_views_survey_batch_number,
         "country_views_survey_batch_number": country_views_survey_batch_number,
         "study_survey_batch_number": study_survey_batch_number,
-        "custom_igno_index_world_views_survey_batch_number": custom_igno_index_world_views_survey_batch_number,
+        "custom_igno_index_world_views_survey_batch_number": (
+            custom_igno_index_world_views_survey_batch_number
+        ),
     }
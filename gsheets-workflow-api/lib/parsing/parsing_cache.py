@@ -0,0 +1,51 @@
+from functools import _CacheInfo, lru_cache
+from typing import Any, Callable, Dict, TypeVar
+
+from lib.app_singleton import app_logger
+
+# The same answer options and question texts are parsed over and over
+# during an import, but there are only so many distinct ones
+PARSING_CACHE_MAX_SIZE = 16384
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_memoized_functions_by_name: Dict[str, Any] = {}
+
+
+def memoized(func: F) -> F:
+    """
+    Memoize a pure parsing function in a bounded LRU cache.
+
+    Arguments need to be hashable and the result must not be mutated by
+    callers, since it is shared between calls.
+    """
+    memoized_func: Any = lru_cache(maxsize=PARSING_CACHE_MAX_SIZE, typed=True)(func)
+    _memoized_functions_by_name[func.__name__] = memoized_func
+    return memoized_func
+
+
+def get_parsing_cache_stats() -> Dict[str, _CacheInfo]:
+    return {
+        name: memoized_func.cache_info()
+        for name, memoized_func in _memoized_functions_by_name.items()
+    }
+
+
+def clear_parsing_caches() -> None:
+    for memoized_func in _memoized_functions_by_name.values():
+        memoized_func.cache_clear()
+
+
+def log_parsing_cache_stats() -> None:
+    for name, cache_info in sorted(get_parsing_cache_stats().items()):
+        app_logger.info(
+            "Parsing cache of {name}: {hits} hits, {misses} misses, "
+            "{size} of at most {max_size} entries",
+            {
+                "name": name,
+                "hits": cache_info.hits,
+                "misses": cache_info.misses,
+                "size": cache_info.currsize,
+                "max_size": cache_info.maxsize,
+            },
+        )
@@ -1,15 +1,46 @@
+import hashlib
 import json
-from typing import Any, Dict, List, Type, TypeVar
+import math
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Type,
+    TypeVar,
+)
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
-import requests
 from pandas import json_normalize
 from pydantic import ValidationError
 
 from lib.app_singleton import app_logger
+from lib.concurrency import map_concurrently, split_max_workers
 from lib.survey_monkey.api_response_wrapper import GenericApiResponse
+from lib.survey_monkey.http_session import SurveyMonkeyApiError, request_with_retries
 from lib.survey_monkey.question_rollup import QuestionRollup
-from lib.survey_monkey.response import Answer, Response
+from lib.survey_monkey.rate_limiter import get_rate_limiter
+from lib.survey_monkey.submitted_answers import SubmittedAnswers
 from lib.survey_monkey.survey import Survey
+from lib.survey_monkey.survey_cache import SurveyCache
+
+SURVEY_MONKEY_API_BASE_URL = "https://api.surveymonkey.com/v3"
+
+# Amount of surveys to fetch data for in parallel
+DEFAULT_MAX_WORKERS = 4
+
+
+def get_strict_validation(config: Dict[str, str]) -> bool:
+    """Whether to validate the submitted answers, see parse_answers"""
+    strict_validation = config.get("SURVEY_MONKEY_STRICT_VALIDATION", "")
+    return strict_validation.lower() in ["1", "true", "yes"]
 
 
 def sm_request(url: str, app_api_token: str) -> Any:
@@ -18,86 +49,288 @@ def sm_request(url: str, app_api_token: str) -> Any:
         "Authorization": f"bearer {app_api_token}",
     }
 
-    response = requests.request("GET", url, headers=headers, data=None)
-    parsed_response = response.json()
+    response = request_with_retries(url, headers, get_rate_limiter(app_api_token))
+    try:
+        parsed_response = response.json()
+    except ValueError:
+        raise SurveyMonkeyApiError(
+            f"SurveyMonkey API Error Response: {response} {response.text[:500]}"
+        )
 
-    if "error" in parsed_response:
-        raise Exception(f"SurveyMonkey API Error Response: {response}")
+    if not response.ok or "error" in parsed_response:
+        raise SurveyMonkeyApiError(
+            f"SurveyMonkey API Error Response: {response} "
+            f"{json.dumps(parsed_response.get('error'))}"
+        )
 
     return parsed_response
 
 
 def fetch_surveys(app_api_token: str) -> Any:
-    url = "https://api.surveymonkey.com/v3/surveys"
+    # date_modified and response_count are used as cache keys
+    url = f"{SURVEY_MONKEY_API_BASE_URL}/surveys?include=date_modified,response_count"
     surveys_response = sm_request(url, app_api_token)
 
     sm_surveys_df = json_normalize(surveys_response["data"]).sort_values(by="title")
     return sm_surveys_df
 
 
-def fetch_survey_details(survey_ids: list, app_api_token: str) -> Dict[str, Survey]:
-    survey_details_by_survey_id = {}
+def cached_survey_payload(
+    kind: str,
+    survey_id: str,
+    fetch: Callable[[], Any],
+    survey_cache: Optional[SurveyCache],
+    survey_versions: Optional[Dict[str, str]],
+) -> Any:
+    """Serve the payload from the cache if this version of the survey is cached."""
+    version = survey_versions.get(str(survey_id)) if survey_versions else None
+    if survey_cache is None or version is None:
+        return fetch()
+    payload = survey_cache.get(survey_id, version, kind)
+    if payload is None:
+        payload = fetch()
+        survey_cache.put(survey_id, version, kind, payload)
+    else:
+        app_logger.debug(
+            "Using cached {kind} of survey with id {survey_id}",
+            {"kind": kind, "survey_id": survey_id},
+        )
+    return payload
+
 
-    for survey_id in survey_ids:
+def fetch_one_survey_details(
+    survey_id: str,
+    app_api_token: str,
+    survey_cache: Optional[SurveyCache] = None,
+    survey_versions: Optional[Dict[str, str]] = None,
+) -> Survey:
+    url = f"{SURVEY_MONKEY_API_BASE_URL}/surveys/{survey_id}/details"
+    response = cached_survey_payload(
+        "details",
+        survey_id,
+        lambda: sm_request(url, app_api_token),
+        survey_cache,
+        survey_versions,
+    )
 
-        url = f"https://api.surveymonkey.com/v3/surveys/{survey_id}/details"
-        response = sm_request(url, app_api_token)
+    try:
+        return Survey(**response)
+    except ValidationError as e:
+        app_logger.warning(
+            "ValidationError in survey with id {survey_id}",
+            {"survey_id": survey_id},
+        )
+        app_logger.info(json.dumps(response, indent=2))
+        raise e
 
-        try:
-            survey_details = Survey(**response)
-            survey_details_by_survey_id[survey_id] = survey_details
-        except ValidationError as e:
-            app_logger.warning(
-                "ValidationError in survey with id {survey_id}",
-                {"survey_id": survey_id},
-            )
-            app_logger.info(json.dumps(response, indent=2))
-            raise e
 
-    return survey_details_by_survey_id
+def fetch_survey_details(
+    survey_ids: list,
+    app_api_token: str,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    survey_cache: Optional[SurveyCache] = None,
+    survey_versions: Optional[Dict[str, str]] = None,
+) -> Dict[str, Survey]:
+    survey_details = map_concurrently(
+        lambda survey_id: fetch_one_survey_details(
+            survey_id, app_api_token, survey_cache, survey_versions
+        ),
+        survey_ids,
+        max_workers,
+    )
+    return dict(zip(survey_ids, survey_details))
+
+
+def fetch_question_rollups_of_one_survey(
+    survey_id: str,
+    app_api_token: str,
+    max_workers: int = 1,
+    survey_cache: Optional[SurveyCache] = None,
+    survey_versions: Optional[Dict[str, str]] = None,
+) -> List[QuestionRollup]:
+    url = f"{SURVEY_MONKEY_API_BASE_URL}/surveys/{survey_id}/rollups?per_page=100"
+    rollup_payloads = cached_survey_payload(
+        "rollups",
+        survey_id,
+        lambda: [
+            rollup_payload
+            for api_response in iterate_through_response_pages(
+                url, app_api_token, max_workers
+            )
+            for rollup_payload in api_response.data
+        ],
+        survey_cache,
+        survey_versions,
+    )
+    return [QuestionRollup(**rollup_payload) for rollup_payload in rollup_payloads]
 
 
 def fetch_question_rollups_by_question_id(
-    survey_details_by_survey_id: Dict[str, Survey], app_api_token: str
+    survey_details_by_survey_id: Dict[str, Survey],
+    app_api_token: str,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    survey_cache: Optional[SurveyCache] = None,
+    survey_versions: Optional[Dict[str, str]] = None,
 ) -> Dict[str, QuestionRollup]:
     question_rollups_by_question_id: Dict[str, QuestionRollup] = {}
 
-    for survey_id, survey in survey_details_by_survey_id.items():
-        # app_logger.debug(survey_id)
-
-        url = (
-            f"https://api.surveymonkey.com/v3/surveys/{survey_id}/rollups?per_page=100"
-        )
-        response = sm_request(url, app_api_token)
-        for rollup_payload in response["data"]:
-            rollup = QuestionRollup(**rollup_payload)
+    survey_ids = list(survey_details_by_survey_id.keys())
+    page_max_workers = split_max_workers(max_workers, len(survey_ids))
+    rollups_by_survey = map_concurrently(
+        lambda survey_id: fetch_question_rollups_of_one_survey(
+            survey_id, app_api_token, page_max_workers, survey_cache, survey_versions
+        ),
+        survey_ids,
+        max_workers,
+    )
+    for rollups in rollups_by_survey:
+        for rollup in rollups:
             question_rollups_by_question_id[rollup.id] = rollup
 
     return question_rollups_by_question_id
 
 
-def fetch_submitted_answers_by_question_id(
-    survey_details_by_survey_id: Dict[str, Survey], app_api_token: str
-) -> Dict[str, List[List[Answer]]]:
-    submitted_answers_by_question_id: Dict[str, List[List[Answer]]] = {}
-    for survey_id, survey in survey_details_by_survey_id.items():
-
-        url = f"https://api.surveymonkey.com/v3/surveys/{survey_id}/responses/bulk?per_page=100"
-        responses: List[Response] = paginate_through_all_response_pages(
-            url, app_api_token, Response
+def fold_response_page_into_submitted_answers(
+    api_response: GenericApiResponse,
+    submitted_answers_by_question_id: Dict[str, SubmittedAnswers],
+    question_ids: Optional[Set[str]] = None,
+    strict_validation: bool = False,
+) -> None:
+    """
+    Add the answers of all responses in a page of /responses/bulk results.
+
+    Only the question ids and answers are parsed, so that we never hold on to
+    complete Response objects (or pages of them) while aggregating. If
+    question_ids is given, the answers to other questions are skipped. The
+    answers are only validated with strict_validation, see parse_answers.
+    """
+    for response_payload in api_response.data:
+        for response_page_payload in response_payload["pages"]:
+            for question_payload in response_page_payload["questions"]:
+                question_id = str(question_payload["id"])
+                if question_ids is not None and question_id not in question_ids:
+                    continue
+                if question_id not in submitted_answers_by_question_id:
+                    submitted_answers_by_question_id[question_id] = SubmittedAnswers()
+                submitted_answers_by_question_id[question_id].append_response(
+                    question_payload["answers"], strict_validation
+                )
+
+
+def fetch_submitted_answers_of_one_survey(
+    survey_id: str,
+    app_api_token: str,
+    max_workers: int = 1,
+    survey_cache: Optional[SurveyCache] = None,
+    survey_versions: Optional[Dict[str, str]] = None,
+    question_ids: Optional[Set[str]] = None,
+    strict_validation: bool = False,
+) -> Dict[str, SubmittedAnswers]:
+    # Named after the columnar payloads, to not read earlier list payloads
+    kind = "submitted_answer_columns"
+    if question_ids is not None:
+        # Cache the answers to each selection of questions separately, as a
+        # kind of its own so that the selections do not replace each other
+        selection = ",".join(sorted(question_ids)).encode("utf-8")
+        kind += f"_{hashlib.sha256(selection).hexdigest()[:16]}"
+    submitted_answer_payloads_by_question_id = cached_survey_payload(
+        kind,
+        survey_id,
+        lambda: {
+            question_id: submitted_answers.to_payload()
+            for question_id, submitted_answers in download_submitted_answers(
+                survey_id, app_api_token, max_workers, question_ids, strict_validation
+            ).items()
+        },
+        survey_cache,
+        survey_versions,
+    )
+    return {
+        question_id: SubmittedAnswers.from_payload(submitted_answer_payload)
+        for question_id, submitted_answer_payload in (
+            submitted_answer_payloads_by_question_id.items()
         )
+        if question_ids is None or question_id in question_ids
+    }
+
+
+def download_submitted_answers(
+    survey_id: str,
+    app_api_token: str,
+    max_workers: int,
+    question_ids: Optional[Set[str]] = None,
+    strict_validation: bool = False,
+) -> Dict[str, SubmittedAnswers]:
+    submitted_answers_by_question_id: Dict[str, SubmittedAnswers] = {}
+
+    url = (
+        f"{SURVEY_MONKEY_API_BASE_URL}/surveys/{survey_id}/responses/bulk?per_page=100"
+    )
+    for api_response in iterate_through_response_pages(url, app_api_token, max_workers):
+        try:
+            fold_response_page_into_submitted_answers(
+                api_response,
+                submitted_answers_by_question_id,
+                question_ids,
+                strict_validation,
+            )
+        except (KeyError, TypeError, AttributeError, ValidationError) as e:
+            app_logger.warning(
+                "Unexpected response structure in response from {url}", {"url": url}
+            )
+            app_logger.info(json.dumps(api_response.data, indent=2))
+            raise e
+
+    return submitted_answers_by_question_id
+
 
-        for response in responses:
-            for response_page in response.pages:
-                for question in response_page.questions:
-                    if question.id in submitted_answers_by_question_id:
-                        submitted_answers_by_question_id[question.id].append(
-                            question.answers
-                        )
-                    else:
-                        submitted_answers_by_question_id[question.id] = [
-                            question.answers
-                        ]
+def fetch_submitted_answers_by_question_id(
+    survey_details_by_survey_id: Dict[str, Survey],
+    app_api_token: str,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    survey_cache: Optional[SurveyCache] = None,
+    survey_versions: Optional[Dict[str, str]] = None,
+    question_ids_by_survey_id: Optional[Dict[str, Set[str]]] = None,
+    strict_validation: bool = False,
+) -> Dict[str, SubmittedAnswers]:
+    """
+    Fetch the individual answers submitted to the questions of the surveys.
+
+    If question_ids_by_survey_id is given, only the answers to those questions
+    are kept, and surveys without any such questions are not fetched at all.
+    The answers are only validated with strict_validation.
+    """
+    submitted_answers_by_question_id: Dict[str, SubmittedAnswers] = {}
+
+    survey_ids = list(survey_details_by_survey_id.keys())
+    if question_ids_by_survey_id is not None:
+        survey_ids = [
+            survey_id
+            for survey_id in survey_ids
+            if question_ids_by_survey_id.get(survey_id)
+        ]
+    page_max_workers = split_max_workers(max_workers, len(survey_ids))
+    submitted_answers_by_survey = map_concurrently(
+        lambda survey_id: fetch_submitted_answers_of_one_survey(
+            survey_id,
+            app_api_token,
+            page_max_workers,
+            survey_cache,
+            survey_versions,
+            question_ids_by_survey_id[survey_id]
+            if question_ids_by_survey_id is not None
+            else None,
+            strict_validation,
+        ),
+        survey_ids,
+        max_workers,
+    )
+    for survey_submitted_answers_by_question_id in submitted_answers_by_survey:
+        for question_id, answers in survey_submitted_answers_by_question_id.items():
+            if question_id in submitted_answers_by_question_id:
+                submitted_answers_by_question_id[question_id].extend(answers)
+            else:
+                submitted_answers_by_question_id[question_id] = answers
 
     return submitted_answers_by_question_id
 
@@ -105,25 +338,83 @@ def fetch_submitted_answers_by_question_id(
 T = TypeVar("T")
 
 
+def fetch_response_page(url: str, app_api_token: str) -> GenericApiResponse:
+    response = sm_request(url, app_api_token)
+    try:
+        return GenericApiResponse(**response)
+    except ValidationError as e:
+        app_logger.warning("ValidationError in response from {url}", {"url": url})
+        app_logger.info(json.dumps(response, indent=2))
+        raise e
+
+
+def url_with_page_number(url: str, page: int) -> str:
+    parsed_url = urlparse(url)
+    query = dict(parse_qsl(parsed_url.query))
+    query["page"] = str(page)
+    return urlunparse(parsed_url._replace(query=urlencode(query)))
+
+
+def iterate_through_response_pages(
+    url: str, app_api_token: str, max_workers: int = 1
+) -> Iterator[GenericApiResponse]:
+    """
+    Lazily fetch one page at a time, following the links.next urls.
+
+    With max_workers > 1, the remaining pages are requested by page number
+    once the total is known from the first page, with up to max_workers
+    pages being fetched (and validated) in the background while the
+    consumer processes the current page.
+    """
+    api_response = fetch_response_page(url, app_api_token)
+    if api_response.total == 0:
+        return
+    page_count = math.ceil(api_response.total / api_response.per_page)
+    if max_workers > 1 and api_response.links.next and page_count > api_response.page:
+        page_urls = iter(
+            url_with_page_number(url, page)
+            for page in range(api_response.page + 1, page_count + 1)
+        )
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            prefetched_pages: Deque[Future] = deque(
+                executor.submit(fetch_response_page, page_url, app_api_token)
+                for page_url in islice(page_urls, max_workers)
+            )
+            yield api_response
+            while prefetched_pages:
+                api_response = prefetched_pages.popleft().result()
+                for page_url in islice(page_urls, 1):
+                    prefetched_pages.append(
+                        executor.submit(fetch_response_page, page_url, app_api_token)
+                    )
+                yield api_response
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    else:
+        yield api_response
+    # Responses submitted after the first page was fetched may have added pages
+    while api_response.links.next:
+        api_response = fetch_response_page(api_response.links.next, app_api_token)
+        yield api_response
+
+
+def iterate_through_all_response_items(
+    url: str, app_api_token: str, model: Type[T]
+) -> Iterator[T]:
+    for api_response in iterate_through_response_pages(url, app_api_token):
+        for item in api_response.data:
+            try:
+                yield model(**item)
+            except ValidationError as e:
+                app_logger.warning(
+                    "ValidationError in response from {url}", {"url": url}
+                )
+                app_logger.info(json.dumps(item, indent=2))
+                raise e
+
+
 def paginate_through_all_response_pages(
     url: str, app_api_token: str, model: Type[T]
 ) -> List[T]:
-    all_items: List[T] = []
-    still_more_to_fetch = True
-    while still_more_to_fetch:
-        response = sm_request(url, app_api_token)
-        try:
-            api_response: GenericApiResponse = GenericApiResponse(**response)
-            if api_response.total == 0:
-                return all_items
-            for item in api_response.data:
-                all_items.append(model(**item))
-            if api_response.links.next:
-                url = api_response.links.next
-            else:
-                still_more_to_fetch = False
-        except ValidationError as e:
-            app_logger.warning("ValidationError in response from {url}", {"url": url})
-            app_logger.info(json.dumps(response, indent=2))
-            raise e
-    return all_items
+    return list(iterate_through_all_response_items(url, app_api_token, model))
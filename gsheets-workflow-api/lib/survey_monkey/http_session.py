@@ -0,0 +1,216 @@
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from lib.app_singleton import app_logger
+from lib.survey_monkey.rate_limiter import RateLimiter
+
+# Enough connections for all concurrent workers to reuse their connection
+POOL_MAXSIZE = 16
+REQUEST_TIMEOUT_SECONDS = 60
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+# Spreads the retries of rate limited workers over a while after the reset
+RATE_LIMIT_JITTER_SECONDS = 2.0
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# https://developer.surveymonkey.com/api/v3/#request-and-response-limits
+MINUTE_REMAINING_HEADER = "X-Ratelimit-App-Global-Minute-Remaining"
+MINUTE_RESET_HEADER = "X-Ratelimit-App-Global-Minute-Reset"
+
+
+class SurveyMonkeyApiError(Exception):
+    pass
+
+
+@dataclass
+class SmRequestStats:
+    request_count: int = 0
+    retry_count: int = 0
+    failed_count: int = 0
+    total_latency_seconds: float = 0.0
+    max_latency_seconds: float = 0.0
+    total_backoff_seconds: float = 0.0
+
+    @property
+    def average_latency_seconds(self) -> float:
+        if self.request_count == 0:
+            return 0.0
+        return self.total_latency_seconds / self.request_count
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_stats_by_endpoint: Dict[str, SmRequestStats] = {}
+_stats_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """A shared session, so that connections are kept alive and reused across calls."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def endpoint_of_url(url: str) -> str:
+    """Group urls like .../surveys/123/details as /surveys/{id}/details."""
+    path = re.sub(r"^https?://[^/]+(/v3)?", "", url.split("?")[0])
+    return re.sub(r"/\d+", "/{id}", path)
+
+
+def get_sm_request_stats() -> Dict[str, SmRequestStats]:
+    with _stats_lock:
+        return {
+            endpoint: SmRequestStats(**vars(stats))
+            for endpoint, stats in _stats_by_endpoint.items()
+        }
+
+
+def reset_sm_request_stats() -> None:
+    with _stats_lock:
+        _stats_by_endpoint.clear()
+
+
+def log_sm_request_stats() -> None:
+    for endpoint, stats in sorted(get_sm_request_stats().items()):
+        app_logger.info(
+            "SurveyMonkey API {endpoint}: {request_count} requests, "
+            "{retry_count} retries, {failed_count} failed, "
+            "{total_latency:.1f}s total, {average_latency:.2f}s average, "
+            "{max_latency:.2f}s max latency, {total_backoff:.1f}s spent backing off",
+            {
+                "endpoint": endpoint,
+                "request_count": stats.request_count,
+                "retry_count": stats.retry_count,
+                "failed_count": stats.failed_count,
+                "total_latency": stats.total_latency_seconds,
+                "average_latency": stats.average_latency_seconds,
+                "max_latency": stats.max_latency_seconds,
+                "total_backoff": stats.total_backoff_seconds,
+            },
+        )
+
+
+def _record(
+    endpoint: str,
+    latency_seconds: float = 0.0,
+    retry: bool = False,
+    failed: bool = False,
+    backoff_seconds: float = 0.0,
+) -> None:
+    with _stats_lock:
+        stats = _stats_by_endpoint.setdefault(endpoint, SmRequestStats())
+        stats.request_count += 1
+        stats.total_latency_seconds += latency_seconds
+        stats.max_latency_seconds = max(stats.max_latency_seconds, latency_seconds)
+        stats.retry_count += int(retry)
+        stats.failed_count += int(failed)
+        stats.total_backoff_seconds += backoff_seconds
+
+
+def _header_seconds(headers: Mapping[str, str], name: str) -> Optional[float]:
+    try:
+        return float(headers[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def is_rate_limited(status_code: Optional[int], headers: Mapping[str, str]) -> bool:
+    """
+    Whether the app ran out of quota. The rate limit headers are sent with
+    every response, so the reset header alone does not tell.
+    """
+    remaining = _header_seconds(headers, MINUTE_REMAINING_HEADER)
+    return status_code == 429 or (remaining is not None and remaining <= 0)
+
+
+def backoff_seconds(
+    attempt: int, headers: Mapping[str, str], rate_limited: bool = False
+) -> float:
+    """
+    Determine how long to wait before retrying.
+
+    When rate limited, waits as long as the server tells us (Retry-After or the
+    rate limit reset header), plus some jitter so that not all workers retry at
+    the same moment. Otherwise, e.g. after server or connection errors, falls
+    back to exponential backoff with full jitter.
+    """
+    if rate_limited:
+        for header in ["Retry-After", MINUTE_RESET_HEADER]:
+            seconds = _header_seconds(headers, header)
+            if seconds is not None:
+                return min(seconds, BACKOFF_MAX_SECONDS) + random.uniform(  # noqa: S311
+                    0, RATE_LIMIT_JITTER_SECONDS
+                )
+    return random.uniform(  # noqa: S311
+        0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt)
+    )
+
+
+def request_with_retries(
+    url: str,
+    headers: Dict[str, str],
+    rate_limiter: RateLimiter,
+    max_retries: int = MAX_RETRIES,
+) -> requests.Response:
+    endpoint = endpoint_of_url(url)
+    attempt = 0
+    while True:
+        rate_limiter.acquire()
+        started = time.monotonic()
+        status_code: Optional[int] = None
+        try:
+            response = get_session().get(
+                url, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS
+            )
+            status_code = response.status_code
+            error: Optional[str] = None
+            if status_code in RETRYABLE_STATUS_CODES:
+                error = f"HTTP {status_code}"
+            response_headers: Mapping[str, str] = response.headers
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = str(e)
+            response_headers = {}
+        latency_seconds = time.monotonic() - started
+
+        if error is None:
+            _record(endpoint, latency_seconds)
+            # Pause all requests for this app until the rate limit resets
+            remaining = _header_seconds(response_headers, MINUTE_REMAINING_HEADER)
+            reset = _header_seconds(response_headers, MINUTE_RESET_HEADER)
+            if remaining is not None and remaining <= 0 and reset is not None:
+                rate_limiter.pause(reset)
+            return response
+
+        if attempt >= max_retries:
+            _record(endpoint, latency_seconds, failed=True)
+            raise SurveyMonkeyApiError(
+                f"SurveyMonkey API request to {url} failed after "
+                f"{attempt} retries: {error}"
+            )
+
+        rate_limited = is_rate_limited(status_code, response_headers)
+        wait_seconds = backoff_seconds(attempt, response_headers, rate_limited)
+        _record(endpoint, latency_seconds, retry=True, backoff_seconds=wait_seconds)
+        app_logger.debug(
+            "Retrying SurveyMonkey API request to {url} in {wait_seconds:.1f}s "
+            "after error: {error}",
+            {"url": url, "wait_seconds": wait_seconds, "error": error},
+        )
+        if rate_limited:
+            # Pause all requests for this app, the quota is shared
+            rate_limiter.pause(wait_seconds)
+        time.sleep(wait_seconds)
+        attempt += 1
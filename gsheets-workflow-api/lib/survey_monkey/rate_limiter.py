@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+
+# SurveyMonkey allows 120 requests per minute per app
+# https://developer.surveymonkey.com/api/v3/#request-and-response-limits
+DEFAULT_MAX_REQUESTS_PER_MINUTE = 120
+
+
+class RateLimiter:
+    """Sliding window rate limiter that is safe to share between threads."""
+
+    max_requests: int
+    period_seconds: float
+    _request_timestamps: Deque[float]
+    _paused_until: float
+    _lock: threading.Lock
+
+    def __init__(self, max_requests: int, period_seconds: float = 60.0):
+        self.max_requests = max_requests
+        self.period_seconds = period_seconds
+        self._request_timestamps = deque()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all requests for a while, e.g. when the API reports no quota left."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self) -> None:
+        """Block until another request can be made without exceeding the limit."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while (
+                    self._request_timestamps
+                    and now - self._request_timestamps[0] >= self.period_seconds
+                ):
+                    self._request_timestamps.popleft()
+                if now < self._paused_until:
+                    wait_seconds = self._paused_until - now
+                elif len(self._request_timestamps) < self.max_requests:
+                    self._request_timestamps.append(now)
+                    return
+                else:
+                    wait_seconds = self.period_seconds - (
+                        now - self._request_timestamps[0]
+                    )
+            time.sleep(wait_seconds)
+
+
+_rate_limiters_by_app_api_token: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    app_api_token: str, max_requests_per_minute: int = DEFAULT_MAX_REQUESTS_PER_MINUTE
+) -> RateLimiter:
+    """Rate limits apply per SurveyMonkey app, so we keep one limiter per token."""
+    with _rate_limiters_lock:
+        if app_api_token not in _rate_limiters_by_app_api_token:
+            _rate_limiters_by_app_api_token[app_api_token] = RateLimiter(
+                max_requests_per_minute
+            )
+        return _rate_limiters_by_app_api_token[app_api_token]
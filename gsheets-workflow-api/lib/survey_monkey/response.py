@@ -55,3 +55,27 @@ class Response(BaseModel):
     date_created: str
     href: str
     pages: List[Page]
+
+
+def construct_answer(answer_payload: Dict[str, Any]) -> Answer:
+    """
+    An Answer from a trusted payload, without validating it, which is several
+    times faster when parsing the answers of thousands of responses.
+
+    The choice id and text are converted to strings as validation would.
+    """
+    choice_id = answer_payload.get("choice_id")
+    text = answer_payload.get("text")
+    return Answer.construct(
+        choice_id=choice_id if choice_id is None else str(choice_id),
+        tag_data=answer_payload.get("tag_data"),
+        text=text if text is None else str(text),
+    )
+
+
+def parse_answers(
+    answer_payloads: List[Dict[str, Any]], strict_validation: bool = False
+) -> List[Answer]:
+    if strict_validation:
+        return [Answer.parse_obj(answer_payload) for answer_payload in answer_payloads]
+    return [construct_answer(answer_payload) for answer_payload in answer_payloads]
@@ -0,0 +1,176 @@
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from lib.survey_monkey.response import Answer, construct_answer, parse_answers
+
+
+class SubmittedAnswers:
+    """
+    The answers submitted to one question, by all responses, stored column-wise.
+
+    The answers of response number r are those from offsets[r] up to
+    offsets[r + 1]. Their choice ids and texts are stored as codes into the
+    lists of distinct choice ids and texts (-1 for none), since the answers to a
+    question repeat the same few values over and over. This takes a few bytes
+    per answer instead of an Answer object each. The tag data of the answers is
+    not kept, since it is not used.
+    """
+
+    offsets: array
+    choice_id_codes: array
+    text_codes: array
+    choice_ids: List[str]
+    texts: List[str]
+
+    def __init__(self) -> None:
+        self.offsets = array("q", [0])
+        self.choice_id_codes = array("i")
+        self.text_codes = array("i")
+        self.choice_ids = []
+        self.texts = []
+        self._choice_id_codes_by_choice_id: Dict[str, int] = {}
+        self._text_codes_by_text: Dict[str, int] = {}
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__} (responses={len(self)}, "
+            f"answers={len(self.choice_id_codes)})"
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, response_index: int) -> List[Answer]:
+        """The answers of a response, as Answer objects"""
+        if response_index < 0:
+            response_index += len(self)
+        if not 0 <= response_index < len(self):
+            raise IndexError("response index out of range")
+        return self.response_answers(response_index)
+
+    def __iter__(self) -> Iterator[List[Answer]]:
+        for response_index in range(len(self)):
+            yield self.response_answers(response_index)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SubmittedAnswers):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def _choice_id_code(self, choice_id: Optional[str]) -> int:
+        if choice_id is None:
+            return -1
+        code = self._choice_id_codes_by_choice_id.get(choice_id)
+        if code is None:
+            code = len(self.choice_ids)
+            self._choice_id_codes_by_choice_id[choice_id] = code
+            self.choice_ids.append(choice_id)
+        return code
+
+    def _text_code(self, text: Optional[str]) -> int:
+        if text is None:
+            return -1
+        code = self._text_codes_by_text.get(text)
+        if code is None:
+            code = len(self.texts)
+            self._text_codes_by_text[text] = code
+            self.texts.append(text)
+        return code
+
+    def append_response(
+        self, answer_payloads: Iterable[Dict[str, Any]], strict_validation: bool = False
+    ) -> None:
+        """Add the answers of one response, parsed as by parse_answers."""
+        for answer in parse_answers(list(answer_payloads), strict_validation):
+            self.choice_id_codes.append(self._choice_id_code(answer.choice_id))
+            self.text_codes.append(self._text_code(answer.text))
+        self.offsets.append(len(self.choice_id_codes))
+
+    def extend(self, other: "SubmittedAnswers") -> None:
+        """
+        Add the responses of other, with its codes remapped to the distinct
+        choice ids and texts of these answers.
+        """
+        choice_id_code_map = [self._choice_id_code(c) for c in other.choice_ids]
+        text_code_map = [self._text_code(text) for text in other.texts]
+        offsets = np.frombuffer(other.offsets, dtype=np.int64)[1:] + self.offsets[-1]
+        choice_id_codes = remapped_codes(other.choice_id_codes, choice_id_code_map)
+        text_codes = remapped_codes(other.text_codes, text_code_map)
+        self.offsets.frombytes(offsets.tobytes())
+        self.choice_id_codes.frombytes(choice_id_codes.tobytes())
+        self.text_codes.frombytes(text_codes.tobytes())
+
+    def response_answers(self, response_index: int) -> List[Answer]:
+        start, end = self.offsets[response_index], self.offsets[response_index + 1]
+        return [
+            construct_answer(
+                {
+                    "choice_id": self.choice_ids[choice_id_code]
+                    if choice_id_code >= 0
+                    else None,
+                    "text": self.texts[text_code] if text_code >= 0 else None,
+                }
+            )
+            for choice_id_code, text_code in zip(
+                self.choice_id_codes[start:end], self.text_codes[start:end]
+            )
+        ]
+
+    def first_answer_int_values(self) -> np.ndarray:
+        """
+        The texts of the first answer of each response as integers, e.g. the
+        values chosen on a slider, skipping responses without such a text.
+        """
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        # Responses with at least one answer
+        first_answer_positions = offsets[:-1][offsets[1:] > offsets[:-1]]
+        text_codes = np.frombuffer(self.text_codes, dtype=np.int32)[
+            first_answer_positions
+        ]
+        # Only the distinct texts are converted
+        used_text_codes = np.unique(text_codes[text_codes >= 0])
+        has_text = np.zeros(len(self.texts), dtype=bool)
+        int_values = np.zeros(len(self.texts), dtype=np.int64)
+        for text_code in used_text_codes:
+            text = self.texts[text_code]
+            if text:
+                has_text[text_code] = True
+                int_values[text_code] = int(text)
+        text_codes = text_codes[text_codes >= 0]
+        return int_values[text_codes[has_text[text_codes]]]
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {
+            "offsets": self.offsets.tolist(),
+            "choice_id_codes": self.choice_id_codes.tolist(),
+            "text_codes": self.text_codes.tolist(),
+            "choice_ids": self.choice_ids,
+            "texts": self.texts,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "SubmittedAnswers":
+        submitted_answers = cls()
+        submitted_answers.offsets = array("q", payload["offsets"])
+        submitted_answers.choice_id_codes = array("i", payload["choice_id_codes"])
+        submitted_answers.text_codes = array("i", payload["text_codes"])
+        submitted_answers.choice_ids = list(payload["choice_ids"])
+        submitted_answers.texts = list(payload["texts"])
+        submitted_answers._choice_id_codes_by_choice_id = {
+            choice_id: code
+            for code, choice_id in enumerate(submitted_answers.choice_ids)
+        }
+        submitted_answers._text_codes_by_text = {
+            text: code for code, text in enumerate(submitted_answers.texts)
+        }
+        return submitted_answers
+
+
+def remapped_codes(codes: array, code_map: List[int]) -> np.ndarray:
+    """The codes mapped through code_map, keeping -1 (none) as is."""
+    # -1 indexes the -1 appended last
+    return np.array(code_map + [-1], dtype=np.int32)[
+        np.frombuffer(codes, dtype=np.int32)
+    ]
@@ -0,0 +1,145 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from lib.app_singleton import app_logger
+
+DEFAULT_MAX_MEGABYTES = 256
+
+
+class SurveyCache:
+    """
+    A directory of gzipped JSON payloads fetched from the SurveyMonkey API.
+
+    Entries are keyed by survey id and a version string derived from the
+    survey listing (see survey_versions), so that an entry is only ever
+    served for a survey that has not changed since it was cached. When the
+    directory grows beyond max_bytes, the least recently used entries are
+    evicted.
+    """
+
+    directory: str
+    max_bytes: int
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = DEFAULT_MAX_MEGABYTES * 1024 * 1024,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__} (directory={self.directory}, "
+            f"max_bytes={self.max_bytes})"
+        )
+
+    def _path(self, survey_id: str, version: str, kind: str) -> str:
+        version_hash = hashlib.sha256(version.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(
+            self.directory, f"{kind}-{survey_id}-{version_hash}.json.gz"
+        )
+
+    def get(self, survey_id: str, version: str, kind: str) -> Optional[Any]:
+        path = self._path(survey_id, version, kind)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            app_logger.warning(
+                "Ignoring unreadable cache entry {path}: {error}",
+                {"path": path, "error": e},
+            )
+            return None
+        # Mark as recently used
+        os.utime(path)
+        return payload
+
+    def put(self, survey_id: str, version: str, kind: str, payload: Any) -> None:
+        path = self._path(survey_id, version, kind)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(json.dumps(payload).encode("utf-8")))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._remove_other_versions(survey_id, kind, path)
+        self.evict()
+
+    def _remove_other_versions(self, survey_id: str, kind: str, path: str) -> None:
+        prefix = f"{kind}-{survey_id}-"
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(prefix) and entry.path != path:
+                self._remove(entry.path)
+
+    def evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json.gz"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            self._remove(path)
+            total_bytes -= size
+
+    def clear(self) -> None:
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json.gz"):
+                self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Already removed by another worker
+            pass
+
+
+def survey_versions(sm_surveys_df: pd.DataFrame) -> Dict[str, str]:
+    """
+    Versions of the surveys in a survey listing as fetched by fetch_surveys.
+
+    The response count is included since new responses to a survey do not
+    change its date_modified.
+    """
+    if not {"date_modified", "response_count"}.issubset(sm_surveys_df.columns):
+        return {}
+    return {
+        str(survey["id"]): f"{survey['date_modified']}|{survey['response_count']}"
+        for _, survey in sm_surveys_df.iterrows()
+        if not pd.isna(survey["date_modified"])
+    }
+
+
+def get_survey_cache(config: Dict[str, str]) -> Optional[SurveyCache]:
+    """
+    The cache is opt-in, since the obvious default location, the temp
+    directory, is kept in memory on Cloud Functions.
+    """
+    directory = config.get("SURVEY_MONKEY_CACHE_DIR")
+    if not directory:
+        return None
+    if config.get("SURVEY_MONKEY_CACHE_DISABLED", "").lower() in ["1", "true", "yes"]:
+        return None
+    max_megabytes = int(
+        config.get("SURVEY_MONKEY_CACHE_MAX_MEGABYTES") or DEFAULT_MAX_MEGABYTES
+    )
+    return SurveyCache(directory=directory, max_bytes=max_megabytes * 1024 * 1024)
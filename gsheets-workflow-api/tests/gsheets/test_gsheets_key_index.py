@@ -0,0 +1,215 @@
+import gzip
+import json
+import unittest.mock
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+from gspread.utils import a1_range_to_grid_range
+
+import lib.gsheets.gsheets_key_index
+from lib.gsheets.gsheets_key_index import GsheetsKeyIndex, get_gsheets_key_index
+from lib.gsheets.gsheets_spreadsheet_loader import (
+    GsheetsSpreadsheetLoader,
+    WorksheetSpec,
+)
+from lib.gsheets.gsheets_worksheet_values import WorksheetValuesRequest
+
+
+def mock_spreadsheet(values: List[List[Any]]) -> unittest.mock.MagicMock:
+    """A spreadsheet with a single worksheet "combo" holding the given values"""
+    sh = unittest.mock.MagicMock()
+    sh.id = "spreadsheet-id"
+    worksheet = unittest.mock.MagicMock()
+    worksheet.title = "combo"
+    worksheet.col_count = 4
+    sh.worksheets.return_value = [worksheet]
+
+    def values_batch_get(ranges: List[str], params: dict) -> dict:
+        value_ranges = []
+        for range_name in ranges:
+            grid_range = a1_range_to_grid_range(range_name.partition("!")[2])
+            rows = values[
+                grid_range.get("startRowIndex", 0) : grid_range.get("endRowIndex")
+            ]
+            start_column = grid_range.get("startColumnIndex", 0)
+            end_column = grid_range.get("endColumnIndex")
+            value_ranges.append(
+                {"values": [row[start_column:end_column] for row in rows]}
+            )
+        return {"valueRanges": value_ranges}
+
+    sh.values_batch_get.side_effect = values_batch_get
+    return sh
+
+
+def key_values_request(sh: unittest.mock.MagicMock) -> WorksheetValuesRequest:
+    return WorksheetValuesRequest(
+        worksheet=sh.worksheets()[0],
+        header_row_number=0,
+        columns=["survey_question_id"],
+        attributes_to_columns_map={"survey_question_id": "Survey Question ID"},
+    )
+
+
+def test_only_added_rows_are_read(tmp_path: Path) -> None:
+    values = [
+        ["Survey ID", "Survey Name", "Survey Question ID", "Answer"],
+        ["1", "First", "q1", "=A2"],
+        ["1", "First", "q2", "=A3"],
+    ]
+    sh = mock_spreadsheet(values)
+    key_index = GsheetsKeyIndex(str(tmp_path))
+
+    worksheet_values = key_index.worksheet_values(sh, key_values_request(sh))
+    assert sh.values_batch_get.call_count == 2
+    assert worksheet_values.values == [
+        ["Survey ID", "Survey Name", "Survey Question ID", "Answer"],
+        ["1", "First", "q1", "=A2"],
+        ["", "", "q2"],
+    ]
+    assert worksheet_values.column_numbers["Answer"] == 4
+
+    values.append(["2", "Second", "q3", "=A4"])
+    sh.values_batch_get.reset_mock()
+    worksheet_values = key_index.worksheet_values(sh, key_values_request(sh))
+    # The header and first rows, and the known rows and those added since, at once
+    sh.values_batch_get.assert_called_once()
+    assert sh.values_batch_get.call_args.args[0] == ["'combo'!1:2", "'combo'!C2:C"]
+    assert [row[2] for row in worksheet_values.values[1:]] == ["q1", "q2", "q3"]
+
+    # Same keys when read by a new index from scratch
+    assert (
+        GsheetsKeyIndex(str(tmp_path / "new")).worksheet_values(
+            sh, key_values_request(sh)
+        )
+        == worksheet_values
+    )
+
+
+def test_all_rows_are_read_when_they_no_longer_line_up(tmp_path: Path) -> None:
+    values = [
+        ["Survey ID", "Survey Name", "Survey Question ID"],
+        ["1", "First", "q1"],
+        ["1", "First", "q2"],
+        ["1", "First", "q3"],
+    ]
+    sh = mock_spreadsheet(values)
+    key_index = GsheetsKeyIndex(str(tmp_path))
+    key_index.worksheet_values(sh, key_values_request(sh))
+
+    # A row was removed
+    del values[2]
+    sh.values_batch_get.reset_mock()
+    worksheet_values = key_index.worksheet_values(sh, key_values_request(sh))
+    assert sh.values_batch_get.call_count == 2
+    assert [row[2] for row in worksheet_values.values[1:]] == ["q1", "q3"]
+
+    # A column was inserted before the key column
+    for row in values:
+        row.insert(0, "")
+    sh.values_batch_get.reset_mock()
+    worksheet_values = key_index.worksheet_values(sh, key_values_request(sh))
+    assert sh.values_batch_get.call_count == 2
+    assert [row[3] for row in worksheet_values.values[1:]] == ["q1", "q3"]
+
+
+def test_all_rows_are_read_when_known_rows_were_reordered(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(lib.gsheets.gsheets_key_index, "OVERLAP_ROW_COUNT", 1)
+    values = [
+        ["Survey ID", "Survey Name", "Survey Question ID"],
+        ["1", "First", "q1"],
+        ["1", "First", "q2"],
+        ["1", "First", "q1"],
+        ["1", "First", "q2"],
+        ["2", "Second", "q3"],
+    ]
+    sh = mock_spreadsheet(values)
+    key_index = GsheetsKeyIndex(str(tmp_path))
+    key_index.worksheet_values(sh, key_values_request(sh))
+
+    # Sorted, so that the last known row still matches
+    values[1:5] = sorted(values[1:5], key=lambda row: row[2])
+    sh.values_batch_get.reset_mock()
+    worksheet_values = key_index.worksheet_values(sh, key_values_request(sh))
+    # The last known row along with the other known rows as samples
+    assert sh.values_batch_get.call_args_list[0].args[0] == [
+        "'combo'!1:2",
+        "'combo'!C6:C",
+        "'combo'!C2",
+        "'combo'!C3",
+        "'combo'!C4",
+        "'combo'!C5",
+    ]
+    assert sh.values_batch_get.call_count == 2
+    assert [row[2] for row in worksheet_values.values[1:]] == [
+        "q1",
+        "q1",
+        "q2",
+        "q2",
+        "q3",
+    ]
+
+
+def test_all_rows_are_read_when_the_stored_keys_do_not_match_their_checksum(
+    tmp_path: Path,
+) -> None:
+    values = [
+        ["Survey ID", "Survey Name", "Survey Question ID"],
+        ["1", "First", "q1"],
+        ["1", "First", "q2"],
+    ]
+    sh = mock_spreadsheet(values)
+    key_index = GsheetsKeyIndex(str(tmp_path))
+    key_index.worksheet_values(sh, key_values_request(sh))
+
+    (path,) = tmp_path.glob("keys-*.json.gz")
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        entry = json.load(f)
+    entry["keys"] = ["q2", "q1"]
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(entry, f)
+
+    sh.values_batch_get.reset_mock()
+    worksheet_values = key_index.worksheet_values(sh, key_values_request(sh))
+    assert sh.values_batch_get.call_args_list[0].args[0] == ["'combo'!1:2"]
+    assert [row[2] for row in worksheet_values.values[1:]] == ["q1", "q2"]
+
+
+def test_the_key_index_is_opt_in(tmp_path: Path) -> None:
+    assert get_gsheets_key_index({}) is None
+    assert get_gsheets_key_index({"GSHEETS_KEY_INDEX_ENABLED": ""}) is None
+    key_index = get_gsheets_key_index(
+        {"GSHEETS_KEY_INDEX_ENABLED": "true", "GSHEETS_KEY_INDEX_DIR": str(tmp_path)}
+    )
+    assert key_index is not None
+    assert key_index.directory == str(tmp_path)
+
+
+def test_editors_with_a_key_index_append_full_rows(tmp_path: Path) -> None:
+    values = [
+        ["Survey ID", "Survey Name", "Survey Question ID", "Answer"],
+        ["1", "First", "q1", "=A2"],
+        ["1", "First", "q2", "=A3"],
+    ]
+    sh = mock_spreadsheet(values)
+
+    loader = GsheetsSpreadsheetLoader(sh)
+    editor = loader.load_editors(
+        [
+            WorksheetSpec(
+                "combo",
+                0,
+                {"survey_question_id": "Survey Question ID"},
+                columns=["survey_question_id"],
+                key_index=GsheetsKeyIndex(str(tmp_path)),
+            )
+        ]
+    )["combo"]
+
+    assert editor.data.df["survey_question_id"].tolist() == ["q1", "q2"]
+    assert editor.data.df.iloc[0]["Answer"] == "=A[[CURRENT_ROW]]"
+    editor.append_row({"survey_question_id": "q3", "Answer": "=A4"})
+    assert editor.worksheet.append_rows.call_args.args[0] == [["", "", "q3", "=A4"]]
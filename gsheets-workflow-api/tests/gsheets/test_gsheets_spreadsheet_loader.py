@@ -0,0 +1,160 @@
+import unittest.mock
+from typing import Any, Dict, List
+
+import gspread_dataframe
+import pandas as pd
+from gspread.utils import a1_range_to_grid_range
+
+from lib.gsheets.gsheets_spreadsheet_loader import (
+    GsheetsSpreadsheetLoader,
+    WorksheetSpec,
+)
+
+values_by_worksheet_name: Dict[str, List[List[Any]]] = {
+    "surveys": [
+        ["Survey ID", "Survey name", ""],
+        ["1", "First", ""],
+        [],
+        ["2", "=CONCAT(B2, B2)"],
+    ],
+    "info": [
+        ["Some title row"],
+        ["Question ID", "Correct answer", "", "Notes"],
+        ["q1", 42, "", ""],
+        ["q2", "", "", "Note"],
+    ],
+}
+
+
+def mock_worksheet(title: str) -> unittest.mock.MagicMock:
+    worksheet = unittest.mock.MagicMock()
+    worksheet.title = title
+    worksheet.row_count = 10
+    worksheet.col_count = 5
+    worksheet.spreadsheet.values_get.return_value = {
+        "values": values_by_worksheet_name[title]
+    }
+    return worksheet
+
+
+def values_in_range(range_name: str) -> List[List[Any]]:
+    """The values the Sheets API returns for a range like 'info'!B3:B or 'info'!1:2"""
+    title, _, a1_range = range_name.partition("!")
+    values = values_by_worksheet_name[title.strip("'")]
+    if a1_range == "":
+        return values
+    grid_range = a1_range_to_grid_range(a1_range)
+    rows = values[grid_range.get("startRowIndex", 0) : grid_range.get("endRowIndex")]
+    start_column = grid_range.get("startColumnIndex", 0)
+    end_column = grid_range.get("endColumnIndex")
+    range_values = [row[start_column:end_column] for row in rows]
+    # Trailing empty rows are left out
+    while len(range_values) > 0 and all(value == "" for value in range_values[-1]):
+        range_values.pop()
+    return range_values
+
+
+def mock_spreadsheet() -> unittest.mock.MagicMock:
+    sh = unittest.mock.MagicMock()
+    sh.worksheets.return_value = [mock_worksheet("surveys"), mock_worksheet("info")]
+
+    def values_batch_get(ranges: List[str], params: dict) -> dict:
+        return {"valueRanges": [{"values": values_in_range(range)} for range in ranges]}
+
+    sh.values_batch_get.side_effect = values_batch_get
+    return sh
+
+
+def test_worksheets_are_loaded_like_gspread_dataframe_does() -> None:
+    sh = mock_spreadsheet()
+
+    loader = GsheetsSpreadsheetLoader(sh)
+    editors = loader.load_editors(
+        [
+            WorksheetSpec("surveys", 0, {"survey_id": "Survey ID"}),
+            WorksheetSpec("info", 1, {}, evaluate_formulas=True),
+        ]
+    )
+
+    assert sh.worksheets.call_count == 1
+    assert sh.values_batch_get.call_count == 2
+    assert [
+        call.kwargs["params"]["valueRenderOption"]
+        for call in sh.values_batch_get.call_args_list
+    ] == ["FORMULA", "UNFORMATTED_VALUE"]
+
+    surveys_df = gspread_dataframe.get_as_dataframe(
+        mock_worksheet("surveys"), header=0
+    ).dropna(axis=0, how="all")
+    pd.testing.assert_frame_equal(
+        editors["surveys"].data.df,
+        surveys_df.rename(columns={"Survey ID": "survey_id"}),
+    )
+    assert editors["surveys"].data.df["survey_id"].tolist() == [1, 2]
+
+    info_df = gspread_dataframe.get_as_dataframe(
+        mock_worksheet("info"), header=1, evaluate_formulas=True
+    ).dropna(axis=0, how="all")
+    pd.testing.assert_frame_equal(editors["info"].data.df, info_df)
+
+
+def test_only_the_requested_columns_are_fetched() -> None:
+    sh = mock_spreadsheet()
+
+    loader = GsheetsSpreadsheetLoader(sh)
+    editors = loader.load_editors(
+        [
+            WorksheetSpec("surveys", 0, {"survey_id": "Survey ID"}),
+            WorksheetSpec(
+                "info",
+                1,
+                {"question_id": "Question ID", "notes": "Notes"},
+                evaluate_formulas=True,
+                columns=["question_id", "Notes"],
+            ),
+        ]
+    )
+
+    # Header rows, then one call per value render option
+    assert sh.values_batch_get.call_count == 3
+    assert sh.values_batch_get.call_args_list[0].args[0] == ["'info'!1:2"]
+    assert sh.values_batch_get.call_args_list[2].args[0] == [
+        "'info'!A3:A",
+        "'info'!D3:D",
+    ]
+    info_editor = editors["info"]
+    assert info_editor.data.df.fillna("").to_dict("list") == {
+        "question_id": ["q1", "q2"],
+        "notes": ["", "Note"],
+    }
+    assert info_editor.column_numbers["Notes"] == 4
+
+    info_editor.update_a_cell(0, "notes", "Updated", batch=True)
+    info_editor.append_row({"question_id": "q3", "notes": "New"})
+    info_editor.flush()
+    append_rows_call = info_editor.worksheet.append_rows.call_args
+    assert append_rows_call.args[0] == [["q3", "", "", "New"]]
+    assert info_editor.worksheet.batch_update.call_args.args[0] == [
+        {"range": "D3", "values": [["Updated"]]}
+    ]
+
+
+def test_lazy_worksheets_are_loaded_when_first_used() -> None:
+    sh = mock_spreadsheet()
+
+    loader = GsheetsSpreadsheetLoader(sh)
+    editors = loader.load_editors(
+        [
+            WorksheetSpec("surveys", 0, {}),
+            WorksheetSpec("info", 1, {}, columns=["Question ID"], lazy=True),
+        ]
+    )
+    assert sh.values_batch_get.call_count == 1
+    assert [name for name, editor in editors.items() if editor.is_loaded] == ["surveys"]
+
+    assert editors["info"].data.df["Question ID"].tolist() == ["q1", "q2"]
+    assert [name for name, editor in editors.items() if editor.is_loaded] == [
+        "surveys",
+        "info",
+    ]
+    assert sh.values_batch_get.call_count == 3
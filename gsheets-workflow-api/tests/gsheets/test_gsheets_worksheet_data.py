@@ -38,3 +38,44 @@ def test_gsheets_worksheet_data() -> None:
     actual = dumps(data.export().to_json(orient="records"), indent=2)
     expected = dumps(original_df.to_json(orient="records"), indent=2)
     assert actual == expected
+
+
+def test_export_tail_matches_the_tail_of_export() -> None:
+    data = GsheetsWorksheetData(
+        df=pd.DataFrame(
+            [
+                {"Foo": "=C2", "bar": "Cat"},
+                {"Foo": "=C3+D3", "bar": "Mouse"},
+                {"Foo": "=C$2:C4", "bar": "Dog"},
+                {"Foo": "C5", "bar": "Eagle"},
+            ]
+        ),
+        header_row_number=1,
+        attributes_to_columns_map={"foo": "Foo"},
+    )
+    pd.testing.assert_frame_equal(data.export_tail(2), data.export().tail(2))
+    pd.testing.assert_frame_equal(data.export_tail(10), data.export())
+
+
+def test_row_numbers_in_cell_references_only() -> None:
+    data = GsheetsWorksheetData(
+        df=pd.DataFrame(
+            [
+                {"Foo": "=A2+AB2+A$2+$A2", "bar": 2},
+                {"Foo": "=A3+A31+B13+A2+3", "bar": 3},
+                {"Foo": "=SUM(A$2:A4)*4", "bar": "=4"},
+            ]
+        ),
+        header_row_number=0,
+    )
+    assert data.df["Foo"].tolist() == [
+        "=A[[CURRENT_ROW]]+AB[[CURRENT_ROW]]+A$2+$A[[CURRENT_ROW]]",
+        "=A[[CURRENT_ROW]]+A[[CURRENT_ROW]]1+B13+A2+3",
+        "=SUM(A$2:A[[CURRENT_ROW]])*4",
+    ]
+    assert data.df["bar"].tolist() == [2, 3, "=4"]
+    assert data.export()["Foo"].tolist() == [
+        "=A2+AB2+A$2+$A2",
+        "=A3+A31+B13+A2+3",
+        "=SUM(A$2:A4)*4",
+    ]
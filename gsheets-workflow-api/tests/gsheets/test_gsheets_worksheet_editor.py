@@ -1,3 +1,4 @@
+import pickle
 import unittest.mock
 
 import pandas as pd
@@ -66,3 +67,116 @@ def test_gsheets_worksheet_editor(
     # Verify that the mock object's get_worksheet() method was called
     # mock_spreadsheet.assert_called_with()
     # mock_spreadsheet.return_value.get_worksheet.assert_called_with()
+
+
+@unittest.mock.patch("gspread_dataframe.get_as_dataframe")
+@unittest.mock.patch("gspread.Worksheet")
+@unittest.mock.patch("gspread.Spreadsheet")
+def test_batched_cell_updates_are_written_on_flush(
+    mock_spreadsheet: unittest.mock.MagicMock,
+    mock_worksheet: unittest.mock.MagicMock,
+    mock_get_as_dataframe: unittest.mock.MagicMock,
+) -> None:
+    mock_spreadsheet.worksheet.return_value = mock_worksheet
+    mock_get_as_dataframe.return_value = pd.DataFrame(
+        [{"Foo": "a", "Notes": None}, {"Foo": "b", "Notes": None}]
+    )
+
+    editor = GsheetsWorksheetEditor(
+        sh=mock_spreadsheet,
+        worksheet_name="Sheet1",
+        header_row_number=0,
+        attributes_to_columns_map={"foo": "Foo", "notes": "Notes"},
+    )
+    editor.update_a_cell(0, "notes", "First", batch=True)
+    editor.update_a_cell(1, "notes", "Second", batch=True)
+    editor.update_a_cell(0, "notes", "Replaced", batch=True)
+    assert editor.update_a_cell(1, "notes", "Not empty", only_if_empty=True) is False
+
+    mock_worksheet.update_acell.assert_not_called()
+    mock_worksheet.batch_update.assert_not_called()
+    assert editor.data.df["notes"].tolist() == ["Replaced", "Second"]
+
+    editor.flush()
+    mock_worksheet.batch_update.assert_called_once_with(
+        [
+            {"range": "B2", "values": [["Replaced"]]},
+            {"range": "B3", "values": [["Second"]]},
+        ],
+        value_input_option="USER_ENTERED",
+    )
+    editor.flush()
+    assert mock_worksheet.batch_update.call_count == 1
+
+
+@unittest.mock.patch("gspread_dataframe.get_as_dataframe")
+@unittest.mock.patch("gspread.Worksheet")
+@unittest.mock.patch("gspread.Spreadsheet")
+def test_deferred_appends_are_written_at_once(
+    mock_spreadsheet: unittest.mock.MagicMock,
+    mock_worksheet: unittest.mock.MagicMock,
+    mock_get_as_dataframe: unittest.mock.MagicMock,
+) -> None:
+    mock_spreadsheet.worksheet.return_value = mock_worksheet
+    mock_get_as_dataframe.return_value = pd.DataFrame(
+        [{"Foo": "a", "bar": 1, "formula": "=A2"}]
+    )
+
+    editor = GsheetsWorksheetEditor(
+        sh=mock_spreadsheet,
+        worksheet_name="Sheet1",
+        header_row_number=0,
+        attributes_to_columns_map={"foo": "Foo"},
+    )
+    editor.append_data(
+        pd.DataFrame([{"foo": "b", "bar": 2, "formula": "=A[[CURRENT_ROW]]"}]),
+        defer=True,
+    )
+    editor.append_data(
+        pd.DataFrame([{"foo": "'c", "bar": 3.5}, {"foo": "d", "bar": None}]),
+        defer=True,
+    )
+    assert editor.data.df["foo"].tolist() == ["a", "b", "'c", "d"]
+    mock_worksheet.append_rows.assert_not_called()
+
+    editor.flush()
+    mock_worksheet.append_rows.assert_called_once_with(
+        [["b", 2.0, "=A3"], ["''c", 3.5, ""], ["d", "", ""]],
+        value_input_option="USER_ENTERED",
+        insert_data_option="INSERT_ROWS",
+        table_range="A1",
+    )
+
+    editor.flush()
+    assert mock_worksheet.append_rows.call_count == 1
+
+
+@unittest.mock.patch("gspread_dataframe.get_as_dataframe")
+@unittest.mock.patch("gspread.Spreadsheet")
+def test_read_only_copies_can_be_passed_to_other_processes(
+    mock_spreadsheet: unittest.mock.MagicMock,
+    mock_get_as_dataframe: unittest.mock.MagicMock,
+) -> None:
+    mock_get_as_dataframe.return_value = pd.DataFrame(
+        [{"Foo": "a", "formula": "=A2"}, {"Foo": "b", "formula": "=A3"}]
+    )
+
+    editor = GsheetsWorksheetEditor(
+        sh=mock_spreadsheet,
+        worksheet_name="Sheet1",
+        header_row_number=0,
+        attributes_to_columns_map={"foo": "Foo"},
+    )
+    editor.update_a_cell(0, "foo", "c", batch=True)
+
+    # The spreadsheet is left out when pickled
+    copied_editor = pickle.loads(pickle.dumps(editor.read_only_copy(1)))
+    assert copied_editor.sh is None
+    assert copied_editor.data.df.to_dict("records") == [
+        {"foo": "c", "formula": "=A[[CURRENT_ROW]]"}
+    ]
+    assert copied_editor.data.header_row_number == 0
+    # The original editor is unchanged
+    assert editor.data.df["foo"].tolist() == ["c", "b"]
+    editor.flush()
+    mock_spreadsheet.worksheet.return_value.batch_update.assert_called_once()
@@ -0,0 +1,189 @@
+import unittest.mock
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+import pandas as pd
+
+from lib.import_mechanics.import_gs_question_and_answer_rows import (
+    import_gs_question_and_answer_rows,
+)
+
+
+def mock_editor(df: pd.DataFrame) -> unittest.mock.MagicMock:
+    editor = unittest.mock.MagicMock()
+    editor.data.df = df
+    return editor
+
+
+def gs_row(survey_question_id: str) -> unittest.mock.MagicMock:
+    return unittest.mock.MagicMock(survey_question_id=survey_question_id)
+
+
+@unittest.mock.patch(
+    "lib.import_mechanics.import_gs_question_and_answer_rows."
+    "convert_survey_details_to_gs_question_and_answer_rows"
+)
+def test_combo_rows_of_all_surveys_are_appended_at_once(
+    mock_convert: unittest.mock.MagicMock,
+) -> None:
+    mock_convert.side_effect = lambda survey_details, *args: (
+        [gs_row(f"{survey_details}-q1")],
+        [gs_row(f"{survey_details}-q1"), gs_row(f"{survey_details}-q1")],
+        [],
+    )
+    gs_survey_results_data = unittest.mock.MagicMock()
+    gs_survey_results_data.questions_combo = mock_editor(
+        pd.DataFrame({"survey_question_id": ["1-q1"]})
+    )
+    gs_survey_results_data.topline_combo = mock_editor(
+        pd.DataFrame({"survey_question_id": ["1-q1"]})
+    )
+    surveys_worksheet_editor = mock_editor(pd.DataFrame())
+    surveys_to_import_data_for = pd.DataFrame(
+        {"survey_id": ["1", "2", "3"]}, index=[4, 5, 6]
+    )
+
+    *_, surveys_fully_imported_df = import_gs_question_and_answer_rows(
+        surveys_to_import_data_for,
+        gs_survey_results_data,
+        {"1": "1", "2": "2", "3": "3"},  # type: ignore
+        {},
+        {},
+        surveys_worksheet_editor,
+    )
+
+    assert surveys_fully_imported_df.index.tolist() == [4, 5, 6]
+    for combo in [
+        gs_survey_results_data.questions_combo,
+        gs_survey_results_data.topline_combo,
+    ]:
+        assert [call.kwargs["defer"] for call in combo.append_data.call_args_list] == [
+            True,
+            True,
+        ]
+        combo.flush.assert_called_once()
+    surveys_worksheet_editor.flush.assert_called_once()
+
+    # The surveys with appended rows are marked as failed if writing them fails
+    gs_survey_results_data.topline_combo.flush.side_effect = Exception("Quota")
+    surveys_worksheet_editor.reset_mock()
+
+    *_, surveys_fully_imported_df = import_gs_question_and_answer_rows(
+        surveys_to_import_data_for,
+        gs_survey_results_data,
+        {"1": "1", "2": "2", "3": "3"},  # type: ignore
+        {},
+        {},
+        surveys_worksheet_editor,
+    )
+
+    assert surveys_fully_imported_df.index.tolist() == [4]
+    notes_by_index = {
+        call.args[0]: call.args[2]
+        for call in surveys_worksheet_editor.update_a_cell.call_args_list
+        if call.args[1] == "import_notes"
+    }
+    assert notes_by_index[4] == "Fully imported"
+    assert "Quota" in notes_by_index[5]
+    assert "Quota" in notes_by_index[6]
+
+
+@unittest.mock.patch(
+    "lib.import_mechanics.import_gs_question_and_answer_rows."
+    "convert_survey_details_to_gs_question_and_answer_rows"
+)
+def test_only_surveys_with_rows_in_a_sheet_that_failed_to_be_written_fail(
+    mock_convert: unittest.mock.MagicMock,
+) -> None:
+    mock_convert.side_effect = lambda survey_details, *args: (
+        [gs_row(f"{survey_details}-q1")],
+        [gs_row(f"{survey_details}-q1")],
+        [],
+    )
+    gs_survey_results_data = unittest.mock.MagicMock()
+    # The question of survey 2 is listed already, only its answers are appended
+    gs_survey_results_data.questions_combo = mock_editor(
+        pd.DataFrame({"survey_question_id": ["2-q1"]})
+    )
+    gs_survey_results_data.topline_combo = mock_editor(
+        pd.DataFrame({"survey_question_id": ["0-q1"]})
+    )
+    gs_survey_results_data.questions_combo.flush.side_effect = Exception("Quota")
+    surveys_worksheet_editor = mock_editor(pd.DataFrame())
+
+    *_, surveys_fully_imported_df = import_gs_question_and_answer_rows(
+        pd.DataFrame({"survey_id": ["1", "2"]}, index=[4, 5]),
+        gs_survey_results_data,
+        {"1": "1", "2": "2"},  # type: ignore
+        {},
+        {},
+        surveys_worksheet_editor,
+    )
+
+    # The answers are still written
+    gs_survey_results_data.topline_combo.flush.assert_called_once()
+    assert surveys_fully_imported_df.index.tolist() == [5]
+    notes_by_index = {
+        call.args[0]: call.args[2]
+        for call in surveys_worksheet_editor.update_a_cell.call_args_list
+        if call.args[1] == "import_notes"
+    }
+    assert "Quota" in notes_by_index[4]
+    assert notes_by_index[5] == "Fully imported"
+
+
+@unittest.mock.patch(
+    "lib.import_mechanics.import_gs_question_and_answer_rows."
+    "convert_surveys_in_process_pool"
+)
+@unittest.mock.patch(
+    "lib.import_mechanics.import_gs_question_and_answer_rows."
+    "convert_survey_details_to_gs_question_and_answer_rows"
+)
+def test_surveys_are_converted_in_the_main_process_without_worker_processes(
+    mock_convert: unittest.mock.MagicMock,
+    mock_convert_surveys_in_process_pool: unittest.mock.MagicMock,
+) -> None:
+    mock_convert.side_effect = lambda survey_details, *args: (
+        [gs_row(f"{survey_details}-q1")],
+        [gs_row(f"{survey_details}-q1")],
+        [],
+    )
+    converted: "Future[Any]" = Future()
+    converted.set_result((mock_convert("1"), [], None))
+    mock_convert.reset_mock()
+    broken: "Future[Any]" = Future()
+    broken.set_exception(BrokenProcessPool("A child process terminated abruptly"))
+    mock_convert_surveys_in_process_pool.return_value = iter(
+        [converted, broken, broken]
+    )
+
+    def import_surveys() -> pd.DataFrame:
+        gs_survey_results_data = unittest.mock.MagicMock()
+        gs_survey_results_data.questions_combo = mock_editor(
+            pd.DataFrame({"survey_question_id": ["0-q1"]})
+        )
+        gs_survey_results_data.topline_combo = mock_editor(
+            pd.DataFrame({"survey_question_id": ["0-q1"]})
+        )
+        *_, surveys_fully_imported_df = import_gs_question_and_answer_rows(
+            pd.DataFrame({"survey_id": ["1", "2", "3"]}, index=[4, 5, 6]),
+            gs_survey_results_data,
+            {"1": "1", "2": "2", "3": "3"},  # type: ignore
+            {},
+            {},
+            mock_editor(pd.DataFrame()),
+            max_workers=2,
+        )
+        return surveys_fully_imported_df
+
+    # The worker processes stopped after converting the first survey
+    assert import_surveys().index.tolist() == [4, 5, 6]
+    assert [call.args[0] for call in mock_convert.call_args_list] == ["2", "3"]
+
+    # The worker processes could not be started
+    mock_convert.reset_mock()
+    mock_convert_surveys_in_process_pool.side_effect = OSError("No shared memory")
+    assert import_surveys().index.tolist() == [4, 5, 6]
+    assert [call.args[0] for call in mock_convert.call_args_list] == ["1", "2", "3"]
@@ -0,0 +1,86 @@
+import unittest.mock
+
+import pandas as pd
+
+from lib.import_mechanics.refresh_surveys_and_combined_listings import (
+    AppFetchResult,
+    fetch_surveys_and_combined_listings_from_one_app_or_error,
+    write_surveys_and_combined_listings,
+)
+from lib.survey_monkey.submitted_answers import SubmittedAnswers
+
+
+@unittest.mock.patch(
+    "lib.import_mechanics.refresh_surveys_and_combined_listings."
+    "import_gs_question_and_answer_rows"
+)
+def test_results_of_all_apps_are_written_at_once(
+    mock_import_gs_question_and_answer_rows: unittest.mock.MagicMock,
+) -> None:
+    mock_import_gs_question_and_answer_rows.return_value = ([], [], pd.DataFrame())
+    surveys_worksheet_editor = unittest.mock.MagicMock()
+    gs_survey_results_data = unittest.mock.MagicMock()
+    app_fetch_results = [
+        AppFetchResult(
+            "token-1",
+            pd.DataFrame([{"survey_id": "101"}]),
+            pd.DataFrame([{"survey_id": "11"}], index=[3]),
+            {"11": "survey 11"},  # type: ignore
+            {"1101": "rollup 1101"},  # type: ignore
+            {"1101": SubmittedAnswers()},
+        ),
+        AppFetchResult("token-2", pd.DataFrame()),
+        AppFetchResult(
+            "token-3",
+            pd.DataFrame([{"survey_id": "301"}, {"survey_id": "302"}]),
+            pd.DataFrame([{"survey_id": "33"}], index=[5]),
+            {"33": "survey 33"},  # type: ignore
+            {"3301": "rollup 3301"},  # type: ignore
+            {},
+        ),
+    ]
+
+    write_surveys_and_combined_listings(
+        app_fetch_results, surveys_worksheet_editor, gs_survey_results_data
+    )
+
+    mock_import_gs_question_and_answer_rows.assert_called_once()
+    args = mock_import_gs_question_and_answer_rows.call_args.args
+    assert args[0]["survey_id"].to_dict() == {3: "11", 5: "33"}
+    assert args[2] == {"11": "survey 11", "33": "survey 33"}
+    assert args[3] == {"1101": "rollup 1101", "3301": "rollup 3301"}
+    assert args[4] == {"1101": SubmittedAnswers()}
+
+    surveys_worksheet_editor.append_data.assert_called_once()
+    appended_df = surveys_worksheet_editor.append_data.call_args.args[0]
+    assert appended_df["survey_id"].tolist() == ["101", "301", "302"]
+
+
+@unittest.mock.patch(
+    "lib.import_mechanics.refresh_surveys_and_combined_listings."
+    "fetch_surveys_and_combined_listings_from_one_app"
+)
+def test_apps_that_failed_to_be_fetched_are_not_written(
+    mock_fetch_surveys_and_combined_listings_from_one_app: unittest.mock.MagicMock,
+) -> None:
+    error = Exception("Invalid token")
+    mock_fetch_surveys_and_combined_listings_from_one_app.side_effect = error
+    surveys_worksheet_editor = unittest.mock.MagicMock()
+
+    failed_app_fetch_result = fetch_surveys_and_combined_listings_from_one_app_or_error(
+        surveys_worksheet_editor, "token-2"
+    )
+    assert failed_app_fetch_result.error is error
+
+    write_surveys_and_combined_listings(
+        [
+            AppFetchResult("token-1", pd.DataFrame([{"survey_id": "101"}])),
+            failed_app_fetch_result,
+        ],
+        surveys_worksheet_editor,
+        unittest.mock.MagicMock(),
+    )
+
+    surveys_worksheet_editor.append_data.assert_called_once()
+    appended_df = surveys_worksheet_editor.append_data.call_args.args[0]
+    assert appended_df["survey_id"].tolist() == ["101"]
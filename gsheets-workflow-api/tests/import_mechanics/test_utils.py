@@ -0,0 +1,86 @@
+from dataclasses import asdict, fields
+
+import pandas as pd
+import pytest
+
+from lib.gs_combined.schemas import GsAnswerRow
+from lib.import_mechanics.utils import (
+    dataclass_rows_to_df,
+    get_non_existing_rows_df,
+    stringified_id_set,
+    stringify_id,
+    stringify_ids,
+)
+
+
+@pytest.mark.parametrize(
+    "ids",
+    [
+        pd.Series([1, 22, 333]),
+        pd.Series([1.0, 22.0, 333.7]),
+        pd.Series(["007", "12", " 5", "-3", "abc", "", True, 4, 5.0], dtype=object),
+    ],
+)
+def test_stringify_ids_is_the_same_as_stringify_id(ids: pd.Series) -> None:
+    assert stringify_ids(ids).tolist() == ids.apply(stringify_id).tolist()
+
+
+def test_get_non_existing_rows_df() -> None:
+    new_df = pd.DataFrame(
+        {"survey_id": ["1", "02", "3", None, "3"], "title": ["a", "b", "c", "d", "e"]}
+    )
+    existing_df = pd.DataFrame({"survey_id": [1.0, 2.0, None], "name": ["x", "y", "z"]})
+    new_df_before = new_df.copy()
+    existing_df_before = existing_df.copy()
+
+    non_existing_rows_df = get_non_existing_rows_df(new_df, existing_df, "survey_id")
+    assert non_existing_rows_df["title"].tolist() == ["c", "d", "e"]
+    pd.testing.assert_frame_equal(new_df, new_df_before)
+    pd.testing.assert_frame_equal(existing_df, existing_df_before)
+
+    existing_ids = stringified_id_set(existing_df["survey_id"])
+    assert existing_ids == {"1", "2"}
+    pd.testing.assert_frame_equal(
+        get_non_existing_rows_df(new_df, existing_df, "survey_id", existing_ids),
+        non_existing_rows_df,
+    )
+
+    empty_df = pd.DataFrame({"survey_id": []})
+    pd.testing.assert_frame_equal(
+        get_non_existing_rows_df(new_df, empty_df, "survey_id"), new_df
+    )
+
+
+def gs_answer(number: int) -> GsAnswerRow:
+    return GsAnswerRow(
+        survey_id=number,
+        survey_name=f"survey_name {number}",
+        survey_question_id=f"survey_question_id {number}",
+        question_number=number,
+        question_text=f"question_text {number}",
+        answer=f"answer {number}",
+        correctness_of_answer_option=f"correctness_of_answer_option {number}",
+        auto_marked_correctness_of_answer=(
+            f"auto_marked_correctness_of_answer {number}"
+        ),
+        answer_by_percent=f"answer_by_percent {number}",
+        correct_answer_at_time_of_import=f"correct_answer_at_time_of_import {number}",
+        very_wrong_answer_at_time_of_import=(
+            f"very_wrong_answer_at_time_of_import {number}"
+        ),
+        metadata=f"metadata {number}",
+        weighted_by=f"weighted_by {number}",
+    )
+
+
+def test_dataclass_rows_to_df_is_the_same_as_from_dicts() -> None:
+    gs_answers = [gs_answer(number) for number in range(3)]
+    gs_answers[1].metadata = None  # type: ignore
+
+    pd.testing.assert_frame_equal(
+        dataclass_rows_to_df(gs_answers, GsAnswerRow),
+        pd.DataFrame(asdict(gs_answer) for gs_answer in gs_answers),
+    )
+    assert dataclass_rows_to_df([], GsAnswerRow).columns.tolist() == [
+        field.name for field in fields(GsAnswerRow)
+    ]
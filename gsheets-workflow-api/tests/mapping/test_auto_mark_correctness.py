@@ -0,0 +1,97 @@
+import unittest.mock
+from typing import Any, List
+
+import pandas as pd
+
+from lib.gs_combined.schemas import GsAnswerRow, GsSurveyResultsData
+from lib.mapping.auto_mark_correctness import auto_mark_correctness
+
+
+def gs_survey_results_data() -> GsSurveyResultsData:
+    imported_igno_questions_info = unittest.mock.MagicMock()
+    imported_igno_questions_info.data.df = pd.DataFrame(
+        {
+            "igno_index_question_id": ["wv1", "wv2"],
+            "igno_index_question_correct_answer": ["20%", "Paris"],
+            "igno_index_question_very_wrong_answer": [None, "Rome"],
+        }
+    )
+    return GsSurveyResultsData(
+        imported_igno_questions_info=imported_igno_questions_info,
+        questions_combo=unittest.mock.MagicMock(),
+        topline_combo=unittest.mock.MagicMock(),
+    )
+
+
+def gs_question(question_number: int, igno_index_question_id: str) -> Any:
+    return unittest.mock.MagicMock(
+        survey_id=1,
+        question_number=question_number,
+        igno_index_question_id=igno_index_question_id,
+        foreign_country_igno_question_id="",
+        step5_question_id="",
+        custom_igno_index_question_id="",
+    )
+
+
+def gs_answers(question_number: int, answers: List[str]) -> List[GsAnswerRow]:
+    return [
+        GsAnswerRow(1, "", "", question_number, "", answer, "", "", "", "", "", "", "")
+        for answer in answers
+    ]
+
+
+def test_answers_are_marked_per_question() -> None:
+    numerical_answers = gs_answers(1, ["0%", "20%", "40%", "60%"])
+    city_answers = gs_answers(2, ["London", "Paris", "Rome"])
+    # Already marked by hand, so only auto-marked
+    city_answers[0].correctness_of_answer_option = "2"
+    unmapped_answers = gs_answers(3, ["Yes", "No"])
+    unlisted_answers = gs_answers(4, ["Yes"])
+
+    auto_mark_correctness(
+        numerical_answers + city_answers + unmapped_answers + unlisted_answers,
+        [gs_question(1, "wv1"), gs_question(2, "wv2"), gs_question(3, "")],
+        gs_survey_results_data(),
+    )
+
+    assert [a.auto_marked_correctness_of_answer for a in numerical_answers] == [
+        "2",
+        "1",
+        "2",
+        "3",
+    ]
+    assert [a.correctness_of_answer_option for a in numerical_answers] == [
+        "2",
+        "1",
+        "2",
+        "3",
+    ]
+    assert numerical_answers[0].correct_answer_at_time_of_import == "20%"
+    assert [a.auto_marked_correctness_of_answer for a in city_answers] == [
+        "2",
+        "1",
+        "3",
+    ]
+    assert [a.correctness_of_answer_option for a in city_answers] == ["2", "", ""]
+    assert {a.auto_marked_correctness_of_answer for a in unmapped_answers} == {
+        "(Question ID not mapped)"
+    }
+    assert unlisted_answers[0].auto_marked_correctness_of_answer == (
+        "(No corresponding question entry found)"
+    )
+
+
+def test_answers_without_a_survey_id_have_no_corresponding_question() -> None:
+    answers = gs_answers(1, ["0%", "20%"])
+    question = gs_question(1, "wv1")
+    for answer in answers:
+        answer.survey_id = None  # type: ignore
+    question.survey_id = None
+
+    auto_mark_correctness(answers, [question], gs_survey_results_data())
+
+    assert {a.auto_marked_correctness_of_answer for a in answers} == {
+        "(No corresponding question entry found)"
+    }
+    assert {a.correctness_of_answer_option for a in answers} == {""}
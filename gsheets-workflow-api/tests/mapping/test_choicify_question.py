@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from lib.mapping.choicify_question import (
+    NUMBER_OF_SIMULATED_CHOICES,
+    cut_bin_edges,
+    divide_into_brackets,
+)
+
+
+def test_cut_bin_edges_are_those_of_pd_cut() -> None:
+    for min_value, max_value in [(0, 100), (0, 3), (-10, 10), (5, 5), (0, 0)]:
+        values = np.arange(min_value, max_value + 1)
+        _, expected_bin_edges = pd.cut(
+            values, NUMBER_OF_SIMULATED_CHOICES, labels=False, retbins=True
+        )
+        np.testing.assert_array_equal(
+            cut_bin_edges(values, NUMBER_OF_SIMULATED_CHOICES), expected_bin_edges
+        )
+
+
+def test_divide_into_brackets() -> None:
+    int_answers = pd.Series([0, 5, 11, 12, 50, 50, 100, 101, -1])
+    df = divide_into_brackets(int_answers, NUMBER_OF_SIMULATED_CHOICES, 0, 100)
+    assert df.index.tolist() == list(range(9))
+    assert df["label"].tolist() == [
+        "0-11",
+        "12-22",
+        "23-33",
+        "34-44",
+        "45-55",
+        "56-66",
+        "67-77",
+        "78-88",
+        "89-100",
+    ]
+    # Answers outside of the slider range are left out
+    assert df["answer_counts"].tolist() == [3, 1, 0, 0, 2, 0, 0, 0, 1]
+    assert df.loc[0, "bin_min"] == 0
+    assert df.loc[0, "bin_max"] == 11
+    assert pd.isna(df.loc[2, "bin_min"])
+
+
+def test_divide_narrow_sliders_into_brackets() -> None:
+    df = divide_into_brackets(pd.Series([0, 3, 3]), NUMBER_OF_SIMULATED_CHOICES, 0, 3)
+    # Only the brackets that hold slider values
+    assert df.index.tolist() == [0, 2, 5, 8]
+    assert df["label"].tolist() == ["0-0", "1-1", "2-2", "3-3"]
+    assert df["answer_counts"].tolist() == [1, 0, 0, 2]
+
+    df = divide_into_brackets(pd.Series([], dtype="int64"), 9, 5, 5)
+    assert df.index.tolist() == [4]
+    assert df["label"].tolist() == ["5-5"]
+    assert df["answer_counts"].tolist() == [0]
+
+
+def test_divide_negative_sliders_into_brackets() -> None:
+    df = divide_into_brackets(
+        pd.Series([-10, 10]), NUMBER_OF_SIMULATED_CHOICES, -10, 10
+    )
+    assert df["label"].tolist()[0] == "-10--8"
+    assert df["label"].tolist()[-1] == "8-10"
+    assert df["answer_counts"].sum() == 2
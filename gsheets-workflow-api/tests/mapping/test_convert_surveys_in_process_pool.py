@@ -0,0 +1,156 @@
+import logging
+import multiprocessing
+import unittest.mock
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pandas as pd
+import pytest
+
+from lib.app_singleton import app_logger
+from lib.gs_combined.schemas import GsSurveyResultsData
+from lib.gsheets.gsheets_worksheet_data import GsheetsWorksheetData
+from lib.gsheets.gsheets_worksheet_editor import GsheetsWorksheetEditor
+from lib.mapping.convert_surveys_in_process_pool import (
+    SurveyConversionError,
+    convert_surveys_in_process_pool,
+    get_conversion_max_workers,
+    survey_conversion_result,
+)
+
+
+def survey(survey_id: str, question_ids: List[str]) -> Any:
+    return SimpleNamespace(
+        id=survey_id,
+        title=f"Survey {survey_id}",
+        pages=[
+            SimpleNamespace(
+                id=f"p{survey_id}",
+                questions=[
+                    SimpleNamespace(id=id, headings=[SimpleNamespace(heading=id)])
+                    for id in question_ids
+                ],
+            )
+        ],
+    )
+
+
+def editor(df: pd.DataFrame) -> GsheetsWorksheetEditor:
+    """An editor of the given data, which can be passed to other processes"""
+    editor = GsheetsWorksheetEditor(
+        unittest.mock.MagicMock(), "sheet", 0, {}, lazy=True
+    )
+    editor.data = GsheetsWorksheetData(df, 0)
+    return editor
+
+
+def gs_survey_results_data() -> GsSurveyResultsData:
+    return GsSurveyResultsData(
+        imported_igno_questions_info=editor(
+            pd.DataFrame({"igno_index_question_id": []})
+        ),
+        questions_combo=editor(pd.DataFrame({"survey_question_id": ["q0"]})),
+        topline_combo=editor(pd.DataFrame({"survey_question_id": ["q0"]})),
+    )
+
+
+def mock_convert(
+    survey_details: Any,
+    question_rollups_by_question_id: Dict[str, Any],
+    submitted_answers_by_question_id: Dict[str, Any],
+    gs_survey_results_data: GsSurveyResultsData,
+) -> Any:
+    app_logger.info("Converting survey {survey_id}", {"survey_id": survey_details.id})
+    if survey_details.id == "2":
+        raise ValueError("Unsupported survey")
+    return (
+        [f"{survey_details.id}-question"],
+        sorted(question_rollups_by_question_id.keys()),
+        [],
+    )
+
+
+def test_surveys_are_converted_in_the_main_process_unless_configured() -> None:
+    assert get_conversion_max_workers({}) == 1
+    assert get_conversion_max_workers({"SURVEY_CONVERSION_MAX_WORKERS": ""}) == 1
+    assert get_conversion_max_workers({"SURVEY_CONVERSION_MAX_WORKERS": "4"}) == 4
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="The conversion is only mocked in forked worker processes",
+)
+@unittest.mock.patch(
+    "lib.mapping.convert_surveys_in_process_pool."
+    "convert_survey_details_to_gs_question_and_answer_rows",
+    mock_convert,
+)
+def test_surveys_are_converted_in_survey_order(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    caplog.set_level(logging.INFO)
+    surveys = [
+        survey("1", ["q1", "q2"]),
+        survey("2", ["q3"]),
+        survey("3", ["q4"]),
+    ]
+
+    survey_conversions = convert_surveys_in_process_pool(
+        surveys,
+        {f"q{number}": f"rollup{number}" for number in range(1, 5)},  # type: ignore
+        {},
+        gs_survey_results_data(),
+        max_workers=2,
+        mp_context=multiprocessing.get_context("fork"),
+    )
+
+    # Each survey is passed the rollups of its own questions only
+    assert survey_conversion_result(next(survey_conversions)) == (
+        ["1-question"],
+        ["q1", "q2"],
+        [],
+    )
+    with pytest.raises(SurveyConversionError, match="Unsupported survey"):
+        survey_conversion_result(next(survey_conversions))
+    assert survey_conversion_result(next(survey_conversions)) == (
+        ["3-question"],
+        ["q4"],
+        [],
+    )
+    # The log messages of the worker processes are emitted in survey order
+    assert [
+        record.getMessage()
+        for record in caplog.records
+        if record.getMessage().startswith("Converting")
+    ] == ["Converting survey 1", "Converting survey 2", "Converting survey 3"]
+
+
+def test_surveys_are_converted_in_spawned_worker_processes(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    caplog.set_level(logging.INFO)
+
+    # Converted for real, since spawned worker processes import the modules anew
+    survey_conversions = convert_surveys_in_process_pool(
+        [survey("1", []), survey("2", ["q2"]), survey("3", [])],
+        {},
+        {},
+        gs_survey_results_data(),
+        max_workers=2,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+    assert survey_conversion_result(next(survey_conversions)) == ([], [], [])
+    # No rollup of the question
+    with pytest.raises(SurveyConversionError, match="KeyError"):
+        survey_conversion_result(next(survey_conversions))
+    assert survey_conversion_result(next(survey_conversions)) == ([], [], [])
+    assert [
+        record.getMessage()
+        for record in caplog.records
+        if record.getMessage().startswith("survey with id")
+    ] == [
+        'survey with id "1" and title "Survey 1"',
+        'survey with id "2" and title "Survey 2"',
+        'survey with id "3" and title "Survey 3"',
+    ]
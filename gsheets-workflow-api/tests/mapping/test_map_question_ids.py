@@ -0,0 +1,94 @@
+import unittest.mock
+from typing import Any
+
+import pandas as pd
+
+from lib.gs_combined.schemas import GsSurveyResultsData
+from lib.mapping.map_question_ids import (
+    get_imported_igno_questions_index,
+    map_igno_index_question_id,
+    map_step5_question_id,
+)
+
+
+def gs_survey_results_data() -> GsSurveyResultsData:
+    imported_igno_questions_info = unittest.mock.MagicMock()
+    imported_igno_questions_info.data.df = pd.DataFrame(
+        {
+            "igno_index_question_id": ["wv1", "wv2", "wv3", "wv4"],
+            "igno_index_world_views_survey_batch_number": [90, 90, 90, 91],
+            "igno_index_question": [
+                "How many people?",
+                "Where is Åland?",
+                "How many persons?",
+                "How many people?",
+            ],
+            "step5_question_id": ["s1", "s2", "", ""],
+            "step5_study_survey_batch_number": ["12", "12", "", ""],
+            "step5_question": ["What share?", "Which country?", "", ""],
+        }
+    )
+    return GsSurveyResultsData(
+        imported_igno_questions_info=imported_igno_questions_info,
+        questions_combo=unittest.mock.MagicMock(),
+        topline_combo=unittest.mock.MagicMock(),
+    )
+
+
+def gs_question_row(survey_name: str, question_text: str) -> Any:
+    return unittest.mock.MagicMock(
+        survey_name=survey_name,
+        question_text=question_text,
+        igno_index_question_id="",
+        step5_question_id="",
+    )
+
+
+def test_question_ids_are_mapped_by_batch_number_and_fuzzy_question_text() -> None:
+    data = gs_survey_results_data()
+
+    row = gs_question_row("World Views 90", " how many PEOPLE?")
+    map_igno_index_question_id(row, data)
+    assert row.auto_mapped_igno_index_question_id == "wv1"
+    assert row.igno_index_question_id == "wv1"
+
+    row = gs_question_row("World Views 90", "Where is Aland?")
+    map_igno_index_question_id(row, data)
+    assert row.auto_mapped_igno_index_question_id == "wv2"
+
+    row = gs_question_row("World Views 91", "Where is Aland?")
+    map_igno_index_question_id(row, data)
+    assert row.auto_mapped_igno_index_question_id == (
+        "(No questions found within igno_index_world_views_survey_batch_number"
+        ' 91, fuzzy-searching for "where is aland")'
+    )
+
+
+def test_step5_question_ids_are_mapped_by_the_step5_batch_number() -> None:
+    data = gs_survey_results_data()
+
+    row = gs_question_row("Study Survey 12", "Which country?")
+    map_step5_question_id(row, data)
+    assert row.auto_mapped_step5_question_id == "s2"
+    assert row.step5_question_id == "s2"
+
+    row = gs_question_row("World Views 90", "Which country?")
+    map_step5_question_id(row, data)
+    assert row.auto_mapped_step5_question_id == "n/a"
+
+
+def test_ambiguous_questions_are_not_mapped() -> None:
+    data = gs_survey_results_data()
+    data.imported_igno_questions_info.data.df.loc[
+        2, "igno_index_question"
+    ] = "How many people?"
+    row = gs_question_row("World Views 90", "How many people?")
+    map_igno_index_question_id(row, data)
+    assert row.auto_mapped_igno_index_question_id == "wv1; wv3"
+    assert row.igno_index_question_id == ""
+
+
+def test_the_index_is_built_once() -> None:
+    data = gs_survey_results_data()
+    index = get_imported_igno_questions_index(data)
+    assert get_imported_igno_questions_index(data) is index
@@ -1,7 +1,9 @@
+import pandas as pd
 import pytest
 
 from lib.parsing.answer_option_matches_factual_answer import (
     answer_option_matches_factual_answer,
+    answer_option_matches_factual_answer_series,
 )
 
 
@@ -36,3 +38,46 @@ def test_answer_option_matches_factual_answer(
 ):
     output = answer_option_matches_factual_answer(answer_option, factual_answer)
     assert output == expected_output
+
+
+def test_answer_option_matches_factual_answer_series() -> None:
+    answer_options = pd.Series(
+        ["20-30%", "30-40%", "34", "Abc", "34"], index=[3, 3, 5, 8, 9]
+    )
+    factual_answers = pd.Series(["34%", "34%", "34", "abc ", "35"])
+    output = answer_option_matches_factual_answer_series(
+        answer_options, factual_answers
+    )
+    assert output.index.tolist() == [3, 3, 5, 8, 9]
+    assert output.tolist() == [False, True, True, True, False]
+    with pytest.raises(ValueError):
+        answer_option_matches_factual_answer_series(answer_options, factual_answers[:2])
+
+
+def test_answer_option_matches_factual_answer_series_is_the_same_as_one_by_one() -> None:
+    values = [
+        "34%",
+        "0.34",
+        "30-40%",
+        "1-2",
+        "14 pounds",
+        "14",
+        "Abc",
+        " abc",
+        "",
+        None,
+    ]
+    answer_options, factual_answers = zip(
+        *[
+            (answer_option, factual_answer)
+            for answer_option in values
+            for factual_answer in values
+        ]
+    )
+    output = answer_option_matches_factual_answer_series(
+        pd.Series(answer_options), pd.Series(factual_answers)
+    )
+    assert output.tolist() == [
+        answer_option_matches_factual_answer(answer_option, factual_answer)
+        for answer_option, factual_answer in zip(answer_options, factual_answers)
+    ]
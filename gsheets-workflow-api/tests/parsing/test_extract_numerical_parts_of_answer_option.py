@@ -1,10 +1,41 @@
+import pandas as pd
 import pytest
 
 from lib.parsing.extract_numerical_parts_of_answer_option import (
     extract_numerical_parts_of_answer_option,
+    extract_numerical_parts_of_answer_option_series,
     is_numeric,
+    is_numeric_series,
 )
 
+# Inputs for comparing the Series functions with the scalar ones
+ANSWER_OPTIONS = [
+    None,
+    True,
+    0,
+    1.5,
+    "",
+    " 7 ",
+    "-3",
+    ".5",
+    "1e3",
+    "inf",
+    "1_000",
+    "12,5%",
+    "15%",
+    "-5%",
+    "5-10",
+    "10-20%",
+    "1.5-2.5 million",
+    "Up to 40",
+    "Between 1,000 and 2,000",
+    "£300 per week",
+    "Abc",
+    "Fóo 3*",
+    "15%",
+    "Abc",
+]
+
 
 @pytest.mark.parametrize(
     "n, expected_output",
@@ -61,3 +92,39 @@ def test_is_numeric(n, expected_output):
 def test_extract_numerical_parts_of_answer_option(answer_option, expected_output):
     output = extract_numerical_parts_of_answer_option(answer_option)
     assert output == expected_output
+
+
+def test_is_numeric_series_is_the_same_as_is_numeric() -> None:
+    values = pd.Series(ANSWER_OPTIONS, index=range(100, 100 + len(ANSWER_OPTIONS)))
+    output = is_numeric_series(values)
+    assert output.index.equals(values.index)
+    assert output.tolist() == [is_numeric(value) for value in ANSWER_OPTIONS]
+
+
+def test_extract_numerical_parts_of_answer_option_series_is_the_same_as_one_by_one() -> None:
+    answer_options = pd.Series(
+        ANSWER_OPTIONS, index=[-i for i in range(len(ANSWER_OPTIONS))]
+    )
+    output = extract_numerical_parts_of_answer_option_series(answer_options)
+    assert output.index.equals(answer_options.index)
+    numerical_parts = [
+        [row.first_part, row.second_part][: row.part_count]
+        for row in output.itertuples()
+    ]
+    assert numerical_parts == [
+        extract_numerical_parts_of_answer_option(answer_option)
+        for answer_option in ANSWER_OPTIONS
+    ]
+    assert output["first_part_is_percentage"].tolist() == [
+        "%" in str(answer_option) for answer_option in ANSWER_OPTIONS
+    ]
+    assert output["second_part_is_percentage"].tolist() == [
+        answer_option == "10-20%" for answer_option in ANSWER_OPTIONS
+    ]
+
+
+def test_extract_numerical_parts_of_answer_option_series_raises_the_same() -> None:
+    with pytest.raises(Exception, match="not deemed numeric"):
+        extract_numerical_parts_of_answer_option("1.2.3")
+    with pytest.raises(Exception, match="not deemed numeric"):
+        extract_numerical_parts_of_answer_option_series(pd.Series(["1", "1.2.3"]))
@@ -1,7 +1,9 @@
+import pandas as pd
 import pytest
 
 from lib.parsing.key_normalizer_for_slightly_fuzzy_lookups import (
     key_normalizer_for_slightly_fuzzy_lookups,
+    key_normalizer_for_slightly_fuzzy_lookups_series,
 )
 
 
@@ -42,3 +44,15 @@ from lib.parsing.key_normalizer_for_slightly_fuzzy_lookups import (
 def test_key_normalizer_for_slightly_fuzzy_lookups(lookup_key, expected_output):
     output = key_normalizer_for_slightly_fuzzy_lookups(lookup_key)
     assert output == expected_output
+
+
+def test_key_normalizer_for_slightly_fuzzy_lookups_series_is_the_same_as_one_by_one() -> None:
+    lookup_keys = pd.Series(
+        ["Foo ", None, 3, " Ñu! ", "Foo ", "30-40%", "", "Fóo*"], index=list("abcdefgh")
+    )
+    output = key_normalizer_for_slightly_fuzzy_lookups_series(lookup_keys)
+    assert output.index.equals(lookup_keys.index)
+    assert output.tolist() == [
+        key_normalizer_for_slightly_fuzzy_lookups(lookup_key)
+        for lookup_key in lookup_keys
+    ]
@@ -0,0 +1,35 @@
+from lib.parsing.extract_numerical_parts_of_answer_option import (
+    extract_numerical_parts_of_answer_option,
+    is_numeric,
+)
+from lib.parsing.key_normalizer_for_slightly_fuzzy_lookups import (
+    key_normalizer_for_slightly_fuzzy_lookups,
+)
+from lib.parsing.parse_survey_name import parse_survey_name
+from lib.parsing.parsing_cache import clear_parsing_caches, get_parsing_cache_stats
+
+
+def test_repeated_lookups_are_cache_hits() -> None:
+    clear_parsing_caches()
+    for _ in range(3):
+        assert key_normalizer_for_slightly_fuzzy_lookups(" Über ") == "uber"
+    cache_info = get_parsing_cache_stats()["normalize_lookup_key"]
+    assert cache_info.misses == 1
+    assert cache_info.hits == 2
+
+
+def test_inputs_are_cached_by_their_string_representation() -> None:
+    clear_parsing_caches()
+    assert is_numeric(1) and is_numeric("1")
+    assert get_parsing_cache_stats()["is_numeric_string"].hits == 1
+    assert not is_numeric(True)
+
+
+def test_cached_results_are_not_shared_with_callers() -> None:
+    numerical_parts = extract_numerical_parts_of_answer_option("12-15%")
+    numerical_parts.append(1.0)
+    assert extract_numerical_parts_of_answer_option("12-15%") == [0.12, 0.15]
+
+    parse_result = parse_survey_name("World Views 3")
+    parse_result["study_survey_batch_number"] = "1"
+    assert parse_survey_name("World Views 3") != parse_result
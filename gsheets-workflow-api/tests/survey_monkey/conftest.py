@@ -0,0 +1,17 @@
+from typing import Iterator
+
+import pytest
+from stub_survey_monkey_api import StubSurveyMonkeyApi
+
+from lib.survey_monkey import api_client, rate_limiter
+
+
+@pytest.fixture
+def stub_sm_api(monkeypatch: pytest.MonkeyPatch) -> Iterator[StubSurveyMonkeyApi]:
+    stub = StubSurveyMonkeyApi(response_delay_seconds=0.05)
+    stub.start()
+    monkeypatch.setattr(api_client, "SURVEY_MONKEY_API_BASE_URL", stub.base_url)
+    # Start every test with a fresh rate limit budget
+    monkeypatch.setattr(rate_limiter, "_rate_limiters_by_app_api_token", {})
+    yield stub
+    stub.stop()
@@ -0,0 +1,221 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# (status code, headers, payload)
+QueuedResponse = Tuple[int, Dict[str, str], Any]
+
+
+class StubSurveyMonkeyApi:
+    """A local HTTP server that serves canned SurveyMonkey API payloads."""
+
+    def __init__(self, response_delay_seconds: float = 0.0):
+        self.routes: Dict[str, Any] = {}
+        # Responses that are served (in order) before falling back to the routes
+        self.queued_responses: Dict[str, List[QueuedResponse]] = {}
+        self.requested_paths: List[str] = []
+        self.client_ports: Set[int] = set()
+        self.response_delay_seconds = response_delay_seconds
+        self.max_concurrent_requests = 0
+        self._concurrent_requests = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v3"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _handler_class(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Support keep-alive connections
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # noqa: N802
+                stub._handle(self)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        path = handler.path[len("/v3") :]
+        with self._lock:
+            self.requested_paths.append(path)
+            self.client_ports.add(handler.client_address[1])
+            queued_responses = self.queued_responses.get(path.split("?")[0])
+            queued_response = queued_responses.pop(0) if queued_responses else None
+            self._concurrent_requests += 1
+            self.max_concurrent_requests = max(
+                self.max_concurrent_requests, self._concurrent_requests
+            )
+        try:
+            time.sleep(self.response_delay_seconds)
+            if queued_response:
+                status, headers, payload = queued_response
+            else:
+                status, headers = 200, {}
+                payload = self.routes.get(path, self.routes.get(path.split("?")[0]))
+                if payload is None:
+                    status = 404
+                    payload = {"error": {"name": "Resource Not Found"}}
+            body = json.dumps(payload).encode("utf-8")
+            handler.send_response(status)
+            for name, value in headers.items():
+                handler.send_header(name, value)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+        finally:
+            with self._lock:
+                self._concurrent_requests -= 1
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def survey_details_payload(survey_id: str, question_ids: List[str]) -> Dict[str, Any]:
+    return {
+        "title": f"World Views {survey_id}",
+        "nickname": "",
+        "language": "en",
+        "folder_id": "0",
+        "category": "",
+        "question_count": len(question_ids),
+        "page_count": 1,
+        "response_count": 2,
+        "date_created": "2023-01-01T00:00:00",
+        "date_modified": "2023-01-02T00:00:00",
+        "id": survey_id,
+        "buttons_text": {
+            "next_button": "Next",
+            "prev_button": "Prev",
+            "done_button": "Done",
+            "exit_button": "",
+        },
+        "is_owner": True,
+        "footer": True,
+        "theme_id": "1",
+        "custom_variables": {},
+        "href": f"https://api.surveymonkey.com/v3/surveys/{survey_id}",
+        "analyze_url": "",
+        "edit_url": "",
+        "collect_url": "",
+        "summary_url": "",
+        "preview": "",
+        "pages": [
+            {
+                "title": "",
+                "description": "",
+                "position": 1,
+                "question_count": len(question_ids),
+                "id": f"{survey_id}-page",
+                "href": "",
+                "questions": [
+                    question_payload(question_id, position)
+                    for position, question_id in enumerate(question_ids, start=1)
+                ],
+            }
+        ],
+    }
+
+
+def question_payload(question_id: str, position: int = 1) -> Dict[str, Any]:
+    return {
+        "id": question_id,
+        "position": position,
+        "visible": True,
+        "family": "single_choice",
+        "subtype": "vertical",
+        "forced_ranking": False,
+        "headings": [{"heading": f"Question {question_id}"}],
+        "href": "",
+        "answers": {
+            "choices": [
+                {"position": 1, "visible": True, "text": "A", "id": f"{question_id}1"},
+                {"position": 2, "visible": True, "text": "B", "id": f"{question_id}2"},
+            ]
+        },
+    }
+
+
+def rollup_payload(question_id: str) -> Dict[str, Any]:
+    return {
+        "id": question_id,
+        "family": "single_choice",
+        "subtype": "vertical",
+        "href": "",
+        "summary": [
+            {
+                "answered": 2,
+                "skipped": 0,
+                "choices": [
+                    {"id": f"{question_id}1", "count": 1},
+                    {"id": f"{question_id}2", "count": 1},
+                ],
+            }
+        ],
+    }
+
+
+def response_payload(
+    survey_id: str, response_id: str, answers_by_question_id: Dict[str, List[Any]]
+) -> Dict[str, Any]:
+    return {
+        "id": response_id,
+        "recipient_id": "",
+        "collection_mode": "default",
+        "response_status": "completed",
+        "custom_value": "",
+        "first_name": "",
+        "last_name": "",
+        "email_address": "",
+        "ip_address": "127.0.0.1",
+        "logic_path": {},
+        "metadata": {"contact": {}},
+        "page_path": [],
+        "collector_id": "1",
+        "survey_id": survey_id,
+        "custom_variables": {},
+        "edit_url": "",
+        "analyze_url": "",
+        "total_time": 10,
+        "date_modified": "2023-01-02T00:00:00",
+        "date_created": "2023-01-02T00:00:00",
+        "href": "",
+        "pages": [
+            {
+                "id": f"{survey_id}-page",
+                "questions": [
+                    {"id": question_id, "answers": answers}
+                    for question_id, answers in answers_by_question_id.items()
+                ],
+            }
+        ],
+    }
+
+
+def paginated_payload(
+    data: List[Any],
+    page: int = 1,
+    per_page: int = 100,
+    total: Optional[int] = None,
+    next_url: Optional[str] = None,
+) -> Dict[str, Any]:
+    return {
+        "data": data,
+        "per_page": per_page,
+        "page": page,
+        "total": len(data) if total is None else total,
+        "links": {"self": "", "next": next_url, "last": None},
+    }
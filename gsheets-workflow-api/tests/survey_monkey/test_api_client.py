@@ -0,0 +1,371 @@
+import math
+import time
+from typing import Dict, List
+from unittest.mock import Mock
+
+import pytest
+from stub_survey_monkey_api import (
+    StubSurveyMonkeyApi,
+    paginated_payload,
+    response_payload,
+    rollup_payload,
+    survey_details_payload,
+)
+
+from lib.mapping.choicify_question import question_ids_needing_submitted_answers
+from lib.survey_monkey import http_session
+from lib.survey_monkey.api_client import (
+    fetch_question_rollups_by_question_id,
+    fetch_question_rollups_of_one_survey,
+    fetch_submitted_answers_by_question_id,
+    fetch_submitted_answers_of_one_survey,
+    fetch_survey_details,
+    iterate_through_response_pages,
+    paginate_through_all_response_pages,
+    sm_request,
+)
+from lib.survey_monkey.http_session import (
+    MINUTE_RESET_HEADER,
+    SurveyMonkeyApiError,
+    get_sm_request_stats,
+    reset_sm_request_stats,
+)
+from lib.survey_monkey.rate_limiter import RateLimiter
+from lib.survey_monkey.response import Answer, Response
+
+SURVEY_IDS = ["101", "102", "103", "104", "105", "106"]
+
+
+def add_survey_routes(stub_sm_api: StubSurveyMonkeyApi) -> None:
+    for survey_id in SURVEY_IDS:
+        question_ids = [f"{survey_id}01", f"{survey_id}02"]
+        stub_sm_api.routes[f"/surveys/{survey_id}/details"] = survey_details_payload(
+            survey_id, question_ids
+        )
+        stub_sm_api.routes[f"/surveys/{survey_id}/rollups"] = paginated_payload(
+            [rollup_payload(question_id) for question_id in question_ids]
+        )
+        stub_sm_api.routes[f"/surveys/{survey_id}/responses/bulk"] = paginated_payload(
+            [
+                response_payload(
+                    survey_id,
+                    f"{survey_id}-r{respondent}",
+                    {
+                        question_id: [{"choice_id": f"{question_id}{respondent}"}]
+                        for question_id in question_ids
+                    },
+                )
+                for respondent in [1, 2]
+            ]
+        )
+
+
+def test_fetch_concurrently_returns_the_same_as_serially(
+    stub_sm_api: StubSurveyMonkeyApi,
+) -> None:
+    add_survey_routes(stub_sm_api)
+
+    serial_details = fetch_survey_details(SURVEY_IDS, "token", max_workers=1)
+    concurrent_details = fetch_survey_details(SURVEY_IDS, "token", max_workers=4)
+    assert list(concurrent_details.keys()) == SURVEY_IDS
+    assert concurrent_details == serial_details
+
+    serial_rollups = fetch_question_rollups_by_question_id(
+        serial_details, "token", max_workers=1
+    )
+    concurrent_rollups = fetch_question_rollups_by_question_id(
+        concurrent_details, "token", max_workers=4
+    )
+    assert len(concurrent_rollups) == 2 * len(SURVEY_IDS)
+    assert concurrent_rollups == serial_rollups
+
+    serial_answers = fetch_submitted_answers_by_question_id(
+        serial_details, "token", max_workers=1
+    )
+    concurrent_answers = fetch_submitted_answers_by_question_id(
+        concurrent_details, "token", max_workers=4
+    )
+    assert len(concurrent_answers["10101"]) == 2
+    assert concurrent_answers["10101"][1][0].choice_id == "101012"
+    assert concurrent_answers == serial_answers
+
+
+def test_fetch_concurrency_is_bounded(stub_sm_api: StubSurveyMonkeyApi) -> None:
+    add_survey_routes(stub_sm_api)
+
+    fetch_survey_details(SURVEY_IDS, "token", max_workers=1)
+    assert stub_sm_api.max_concurrent_requests == 1
+
+    fetch_survey_details(SURVEY_IDS, "token", max_workers=3)
+    assert 1 < stub_sm_api.max_concurrent_requests <= 3
+
+
+def test_rate_limiter_blocks_when_limit_is_reached() -> None:
+    rate_limiter = RateLimiter(max_requests=2, period_seconds=0.2)
+    start = time.monotonic()
+    rate_limiter.acquire()
+    rate_limiter.acquire()
+    assert time.monotonic() - start < 0.1
+    rate_limiter.acquire()
+    assert time.monotonic() - start >= 0.2
+
+
+def test_connections_are_reused(stub_sm_api: StubSurveyMonkeyApi) -> None:
+    add_survey_routes(stub_sm_api)
+
+    fetch_survey_details(SURVEY_IDS, "token", max_workers=1)
+    assert len(stub_sm_api.requested_paths) == len(SURVEY_IDS)
+    assert len(stub_sm_api.client_ports) == 1
+
+
+def test_rate_limited_and_failed_requests_are_retried(
+    stub_sm_api: StubSurveyMonkeyApi, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(http_session, "BACKOFF_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(http_session, "RATE_LIMIT_JITTER_SECONDS", 0.01)
+    add_survey_routes(stub_sm_api)
+    stub_sm_api.queued_responses["/surveys/101/details"] = [
+        (429, {MINUTE_RESET_HEADER: "0.1"}, {"error": {"name": "Rate Limit"}}),
+        (503, {}, {"error": {"name": "Service Unavailable"}}),
+    ]
+    reset_sm_request_stats()
+
+    start = time.monotonic()
+    response = sm_request(stub_sm_api.url("/surveys/101/details"), "token")
+    assert time.monotonic() - start >= 0.1
+    assert response["id"] == "101"
+
+    stats = get_sm_request_stats()["/surveys/{id}/details"]
+    assert stats.request_count == 3
+    assert stats.retry_count == 2
+    assert stats.failed_count == 0
+    assert stats.max_latency_seconds > 0
+
+
+def test_server_errors_back_off_exponentially_despite_rate_limit_headers(
+    stub_sm_api: StubSurveyMonkeyApi, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(http_session, "BACKOFF_BASE_SECONDS", 0.01)
+    add_survey_routes(stub_sm_api)
+    stub_sm_api.queued_responses["/surveys/101/details"] = [
+        (503, {MINUTE_RESET_HEADER: "30"}, {"error": {"name": "Service Unavailable"}}),
+    ]
+    pause = Mock()
+    monkeypatch.setattr(RateLimiter, "pause", pause)
+
+    start = time.monotonic()
+    response = sm_request(stub_sm_api.url("/surveys/101/details"), "token")
+    assert time.monotonic() - start < 5
+    assert response["id"] == "101"
+    pause.assert_not_called()
+
+
+def test_giving_up_after_max_retries(
+    stub_sm_api: StubSurveyMonkeyApi, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(http_session, "BACKOFF_BASE_SECONDS", 0.01)
+    stub_sm_api.queued_responses["/surveys/101/details"] = [
+        (500, {}, {"error": {"name": "Internal Server Error"}})
+    ] * (http_session.MAX_RETRIES + 1)
+    reset_sm_request_stats()
+
+    with pytest.raises(SurveyMonkeyApiError):
+        sm_request(stub_sm_api.url("/surveys/101/details"), "token")
+
+    stats = get_sm_request_stats()["/surveys/{id}/details"]
+    assert stats.retry_count == http_session.MAX_RETRIES
+    assert stats.failed_count == 1
+
+
+def test_error_responses_raise(stub_sm_api: StubSurveyMonkeyApi) -> None:
+    with pytest.raises(SurveyMonkeyApiError, match="Resource Not Found"):
+        sm_request(stub_sm_api.url("/surveys/999/details"), "token")
+
+
+def add_paginated_responses_routes(
+    stub_sm_api: StubSurveyMonkeyApi, survey_id: str, page_count: int, per_page: int
+) -> None:
+    total = page_count * per_page
+    path = f"/surveys/{survey_id}/responses/bulk"
+    for page in range(1, page_count + 1):
+        next_url = (
+            stub_sm_api.url(f"{path}?per_page={per_page}&page={page + 1}")
+            if page < page_count
+            else None
+        )
+        stub_sm_api.routes[
+            f"{path}?per_page={per_page}&page={page}"
+        ] = paginated_payload(
+            [
+                response_payload(
+                    survey_id,
+                    f"r{page}-{respondent}",
+                    {
+                        "q1": [{"choice_id": f"c{page}-{respondent}"}],
+                        "q2": [{"text": str(page * respondent)}],
+                    },
+                )
+                for respondent in range(per_page)
+            ],
+            page=page,
+            per_page=per_page,
+            total=total,
+            next_url=next_url,
+        )
+        # As requested by fetch_submitted_answers_of_one_survey
+        stub_sm_api.routes[f"{path}?per_page=100&page={page}"] = stub_sm_api.routes[
+            f"{path}?per_page={per_page}&page={page}"
+        ]
+    stub_sm_api.routes[f"{path}?per_page=100"] = stub_sm_api.routes[
+        f"{path}?per_page={per_page}&page=1"
+    ]
+
+
+def test_pages_are_fetched_lazily(stub_sm_api: StubSurveyMonkeyApi) -> None:
+    add_paginated_responses_routes(stub_sm_api, "101", page_count=3, per_page=5)
+
+    pages = iterate_through_response_pages(
+        stub_sm_api.url("/surveys/101/responses/bulk?per_page=5&page=1"), "token"
+    )
+    first_page = next(pages)
+    assert first_page.page == 1
+    assert len(stub_sm_api.requested_paths) == 1
+    assert [page.page for page in pages] == [2, 3]
+    assert len(stub_sm_api.requested_paths) == 3
+
+
+def test_streaming_aggregation_matches_full_response_models(
+    stub_sm_api: StubSurveyMonkeyApi,
+) -> None:
+    add_paginated_responses_routes(stub_sm_api, "101", page_count=3, per_page=5)
+
+    responses = paginate_through_all_response_pages(
+        stub_sm_api.url("/surveys/101/responses/bulk?per_page=100"), "token", Response
+    )
+    assert len(responses) == 15
+    expected: Dict[str, List[List[Answer]]] = {}
+    for response in responses:
+        for response_page in response.pages:
+            for question in response_page.questions:
+                expected.setdefault(question.id, []).append(question.answers)
+
+    assert {
+        question_id: list(submitted_answers)
+        for question_id, submitted_answers in fetch_submitted_answers_of_one_survey(
+            "101", "token"
+        ).items()
+    } == expected
+
+
+def test_submitted_answers_are_the_same_with_strict_validation(
+    stub_sm_api: StubSurveyMonkeyApi,
+) -> None:
+    add_paginated_responses_routes(stub_sm_api, "101", page_count=2, per_page=5)
+
+    assert fetch_submitted_answers_of_one_survey(
+        "101", "token"
+    ) == fetch_submitted_answers_of_one_survey("101", "token", strict_validation=True)
+
+
+def test_pages_are_prefetched_in_parallel(stub_sm_api: StubSurveyMonkeyApi) -> None:
+    add_paginated_responses_routes(stub_sm_api, "101", page_count=6, per_page=5)
+    url = stub_sm_api.url("/surveys/101/responses/bulk?per_page=5&page=1")
+
+    serial_pages = list(iterate_through_response_pages(url, "token"))
+    assert stub_sm_api.max_concurrent_requests == 1
+
+    prefetched_pages = list(iterate_through_response_pages(url, "token", 3))
+    assert 1 < stub_sm_api.max_concurrent_requests <= 3
+    assert [page.page for page in prefetched_pages] == [1, 2, 3, 4, 5, 6]
+    assert prefetched_pages == serial_pages
+
+    assert fetch_submitted_answers_of_one_survey(
+        "101", "token", max_workers=3
+    ) == fetch_submitted_answers_of_one_survey("101", "token")
+
+
+def test_nested_page_prefetching_is_bounded_by_max_workers(
+    stub_sm_api: StubSurveyMonkeyApi,
+) -> None:
+    add_survey_routes(stub_sm_api)
+    details = fetch_survey_details(SURVEY_IDS[:2], "token", max_workers=1)
+    for survey_id in details:
+        add_paginated_responses_routes(stub_sm_api, survey_id, page_count=6, per_page=5)
+
+    fetch_submitted_answers_by_question_id(details, "token", max_workers=4)
+    assert 2 < stub_sm_api.max_concurrent_requests <= 4
+
+
+def test_submitted_answers_are_only_fetched_for_questions_that_need_them(
+    stub_sm_api: StubSurveyMonkeyApi,
+) -> None:
+    add_survey_routes(stub_sm_api)
+    stub_sm_api.routes["/surveys/102/details"]["pages"][0]["questions"][1][
+        "display_options"
+    ] = {"show_display_number": True, "display_type": "slider"}
+    details = fetch_survey_details(SURVEY_IDS, "token", max_workers=1)
+    question_ids_by_survey_id = {
+        survey_id: question_ids_needing_submitted_answers(survey_details)
+        for survey_id, survey_details in details.items()
+    }
+    assert question_ids_by_survey_id["102"] == {"10202"}
+    stub_sm_api.requested_paths.clear()
+
+    answers = fetch_submitted_answers_by_question_id(
+        details, "token", 2, question_ids_by_survey_id=question_ids_by_survey_id
+    )
+    assert stub_sm_api.requested_paths == ["/surveys/102/responses/bulk?per_page=100"]
+    assert answers == {
+        "10202": fetch_submitted_answers_by_question_id(details, "token")["10202"]
+    }
+
+
+def add_paginated_rollups_routes(
+    stub_sm_api: StubSurveyMonkeyApi, survey_id: str, question_ids: List[str]
+) -> None:
+    path = f"/surveys/{survey_id}/rollups"
+    page_count = math.ceil(len(question_ids) / 100)
+    for page in range(1, page_count + 1):
+        stub_sm_api.routes[f"{path}?per_page=100&page={page}"] = paginated_payload(
+            [
+                rollup_payload(question_id)
+                for question_id in question_ids[(page - 1) * 100 : page * 100]
+            ],
+            page=page,
+            total=len(question_ids),
+            next_url=stub_sm_api.url(f"{path}?per_page=100&page={page + 1}")
+            if page < page_count
+            else None,
+        )
+    stub_sm_api.routes[f"{path}?per_page=100"] = stub_sm_api.routes[
+        f"{path}?per_page=100&page=1"
+    ]
+
+
+def test_all_rollup_pages_are_fetched(stub_sm_api: StubSurveyMonkeyApi) -> None:
+    question_ids = [f"101{number:03}" for number in range(250)]
+    add_paginated_rollups_routes(stub_sm_api, "101", question_ids)
+
+    serial_rollups = fetch_question_rollups_of_one_survey("101", "token")
+    assert [rollup.id for rollup in serial_rollups] == question_ids
+    assert stub_sm_api.max_concurrent_requests == 1
+
+    assert fetch_question_rollups_of_one_survey("101", "token", 3) == serial_rollups
+    assert stub_sm_api.max_concurrent_requests == 2
+
+
+def test_nested_rollup_page_prefetching_is_bounded_by_max_workers(
+    stub_sm_api: StubSurveyMonkeyApi,
+) -> None:
+    add_survey_routes(stub_sm_api)
+    details = fetch_survey_details(SURVEY_IDS[:2], "token", max_workers=1)
+    for survey_id in details:
+        add_paginated_rollups_routes(
+            stub_sm_api,
+            survey_id,
+            [f"{survey_id}{number:03}" for number in range(600)],
+        )
+
+    rollups = fetch_question_rollups_by_question_id(details, "token", max_workers=4)
+    assert len(rollups) == 1200
+    assert 2 < stub_sm_api.max_concurrent_requests <= 4
@@ -0,0 +1,30 @@
+from typing import Any, Dict, List
+
+import pytest
+from pydantic import ValidationError
+
+from lib.survey_monkey.response import Answer, parse_answers
+
+
+def test_answers_are_parsed_the_same_without_validation() -> None:
+    answer_payloads: List[Dict[str, Any]] = [
+        {"choice_id": "1", "text": "A", "tag_data": []},
+        {"choice_id": 2},
+        {"text": 75, "other": "ignored"},
+    ]
+    answers = parse_answers(answer_payloads)
+    assert answers == parse_answers(answer_payloads, strict_validation=True)
+    assert answers[1] == Answer(choice_id="2")
+    assert answers[2].text == "75"
+    assert [answer.dict() for answer in answers] == [
+        {"choice_id": "1", "tag_data": [], "text": "A"},
+        {"choice_id": "2", "tag_data": None, "text": None},
+        {"choice_id": None, "tag_data": None, "text": "75"},
+    ]
+
+
+def test_answers_are_only_validated_when_strict() -> None:
+    answer_payloads: List[Dict[str, Any]] = [{"text": {"not": "a string"}}]
+    parse_answers(answer_payloads)
+    with pytest.raises(ValidationError):
+        parse_answers(answer_payloads, strict_validation=True)
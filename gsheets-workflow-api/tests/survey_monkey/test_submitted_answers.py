@@ -0,0 +1,88 @@
+from lib.survey_monkey.response import Answer
+from lib.survey_monkey.submitted_answers import SubmittedAnswers
+
+
+def submitted_answers_of(responses: list) -> SubmittedAnswers:
+    submitted_answers = SubmittedAnswers()
+    for answer_payloads in responses:
+        submitted_answers.append_response(answer_payloads)
+    return submitted_answers
+
+
+def test_answers_are_kept_per_response() -> None:
+    submitted_answers = submitted_answers_of(
+        [
+            [{"choice_id": "1"}, {"choice_id": "2", "text": "Other"}],
+            [],
+            [{"choice_id": "1", "tag_data": []}],
+        ]
+    )
+    assert len(submitted_answers) == 3
+    assert list(submitted_answers) == [
+        [Answer(choice_id="1"), Answer(choice_id="2", text="Other")],
+        [],
+        [Answer(choice_id="1")],
+    ]
+    assert submitted_answers[-1] == [Answer(choice_id="1")]
+    # Repeated choice ids are only stored once
+    assert submitted_answers.choice_ids == ["1", "2"]
+
+
+def test_first_answer_int_values() -> None:
+    submitted_answers = submitted_answers_of(
+        [
+            [{"text": "10"}],
+            [{"text": ""}],
+            [],
+            [{"choice_id": "1"}],
+            [{"text": "-5"}, {"text": "not a number"}],
+            [{"text": "10"}],
+        ]
+    )
+    assert submitted_answers.first_answer_int_values().tolist() == [10, -5, 10]
+    assert SubmittedAnswers().first_answer_int_values().tolist() == []
+
+
+def test_payload_round_trip_and_extend() -> None:
+    submitted_answers = submitted_answers_of([[{"text": "1"}], [{"choice_id": "2"}]])
+    assert SubmittedAnswers.from_payload(submitted_answers.to_payload()) == (
+        submitted_answers
+    )
+
+    other_submitted_answers = submitted_answers_of([[{"text": "3"}]])
+    submitted_answers.extend(other_submitted_answers)
+    assert list(submitted_answers) == [
+        [Answer(text="1")],
+        [Answer(choice_id="2")],
+        [Answer(text="3")],
+    ]
+
+
+def test_extend_remaps_the_codes_of_the_other_answers() -> None:
+    responses = [
+        [{"choice_id": "1", "text": "A"}, {"choice_id": "2"}],
+        [],
+        [{"text": "B"}],
+    ]
+    other_responses = [
+        [{"choice_id": "2", "text": "B"}],
+        [{"choice_id": "3"}, {"text": "C"}],
+        [],
+    ]
+    submitted_answers = submitted_answers_of(responses)
+    submitted_answers.extend(submitted_answers_of(other_responses))
+    assert submitted_answers == submitted_answers_of(responses + other_responses)
+    assert submitted_answers.to_payload() == (
+        submitted_answers_of(responses + other_responses).to_payload()
+    )
+
+    submitted_answers.extend(submitted_answers)
+    assert len(submitted_answers) == 12
+    assert submitted_answers.choice_ids == ["1", "2", "3"]
+    assert submitted_answers[-3] == [Answer(choice_id="2", text="B")]
+
+    empty_submitted_answers = SubmittedAnswers()
+    empty_submitted_answers.extend(SubmittedAnswers())
+    assert len(empty_submitted_answers) == 0
+    empty_submitted_answers.extend(submitted_answers_of(responses))
+    assert empty_submitted_answers == submitted_answers_of(responses)
@@ -0,0 +1,157 @@
+import os
+
+import pandas as pd
+from stub_survey_monkey_api import (
+    StubSurveyMonkeyApi,
+    paginated_payload,
+    response_payload,
+    rollup_payload,
+    survey_details_payload,
+)
+
+from lib.survey_monkey.api_client import (
+    fetch_question_rollups_by_question_id,
+    fetch_submitted_answers_by_question_id,
+    fetch_submitted_answers_of_one_survey,
+    fetch_survey_details,
+)
+from lib.survey_monkey.survey_cache import (
+    SurveyCache,
+    get_survey_cache,
+    survey_versions,
+)
+
+SURVEY_IDS = ["101", "102"]
+
+
+def add_survey_routes(stub_sm_api: StubSurveyMonkeyApi) -> None:
+    for survey_id in SURVEY_IDS:
+        question_id = f"{survey_id}01"
+        stub_sm_api.routes[f"/surveys/{survey_id}/details"] = survey_details_payload(
+            survey_id, [question_id]
+        )
+        stub_sm_api.routes[f"/surveys/{survey_id}/rollups"] = paginated_payload(
+            [rollup_payload(question_id)]
+        )
+        stub_sm_api.routes[f"/surveys/{survey_id}/responses/bulk"] = paginated_payload(
+            [
+                response_payload(
+                    survey_id, f"{survey_id}-r1", {question_id: [{"text": "Yes"}]}
+                )
+            ]
+        )
+
+
+def fetch_all(survey_cache: SurveyCache, versions: dict) -> tuple:
+    details = fetch_survey_details(SURVEY_IDS, "token", 2, survey_cache, versions)
+    rollups = fetch_question_rollups_by_question_id(
+        details, "token", 2, survey_cache, versions
+    )
+    answers = fetch_submitted_answers_by_question_id(
+        details, "token", 2, survey_cache, versions
+    )
+    return details, rollups, answers
+
+
+def test_unchanged_surveys_are_served_from_the_cache(
+    stub_sm_api: StubSurveyMonkeyApi, tmp_path: str
+) -> None:
+    add_survey_routes(stub_sm_api)
+    survey_cache = SurveyCache(str(tmp_path))
+    versions = {"101": "2021-01-01T00:00:00|1", "102": "2021-01-01T00:00:00|1"}
+
+    uncached = fetch_all(survey_cache, versions)
+    assert len(stub_sm_api.requested_paths) == 3 * len(SURVEY_IDS)
+    assert fetch_all(survey_cache, versions) == uncached
+    assert len(stub_sm_api.requested_paths) == 3 * len(SURVEY_IDS)
+
+    # A new response changes the version of survey 102 only
+    versions["102"] = "2021-01-01T00:00:00|2"
+    assert fetch_all(survey_cache, versions) == uncached
+    assert len(stub_sm_api.requested_paths) == 3 * len(SURVEY_IDS) + 3
+    assert all("/102/" in path for path in stub_sm_api.requested_paths[-3:])
+    # The outdated entries of survey 102 have been replaced
+    assert len(os.listdir(tmp_path)) == 3 * len(SURVEY_IDS)
+
+
+def test_selections_of_questions_are_cached_side_by_side(
+    stub_sm_api: StubSurveyMonkeyApi, tmp_path: str
+) -> None:
+    add_survey_routes(stub_sm_api)
+    survey_cache = SurveyCache(str(tmp_path))
+    versions = {"101": "2021-01-01T00:00:00|1"}
+
+    def fetch(question_ids: set) -> dict:
+        return fetch_submitted_answers_of_one_survey(
+            "101", "token", 1, survey_cache, versions, question_ids
+        )
+
+    all_answers = fetch({"10101", "10102"})
+    no_answers = fetch({"10102"})
+    assert len(stub_sm_api.requested_paths) == 2
+    assert fetch({"10101", "10102"}) == all_answers
+    assert fetch({"10102"}) == no_answers == {}
+    assert len(stub_sm_api.requested_paths) == 2
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_surveys_without_a_version_are_not_cached(
+    stub_sm_api: StubSurveyMonkeyApi, tmp_path: str
+) -> None:
+    add_survey_routes(stub_sm_api)
+    survey_cache = SurveyCache(str(tmp_path))
+
+    fetch_all(survey_cache, {})
+    fetch_all(survey_cache, {})
+    assert len(stub_sm_api.requested_paths) == 6 * len(SURVEY_IDS)
+    assert os.listdir(tmp_path) == []
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: str) -> None:
+    survey_cache = SurveyCache(str(tmp_path), max_bytes=10**6)
+    payload = {"data": [os.urandom(256).hex() for _ in range(100)]}
+    survey_cache.put("101", "v1", "details", payload)
+    survey_cache.put("102", "v1", "details", payload)
+    os.utime(survey_cache._path("101", "v1", "details"), (0, 0))
+    entry_bytes = os.path.getsize(survey_cache._path("101", "v1", "details"))
+
+    survey_cache.max_bytes = int(entry_bytes * 2.5)
+    survey_cache.put("103", "v1", "details", payload)
+    assert survey_cache.get("101", "v1", "details") is None
+    assert survey_cache.get("102", "v1", "details") == payload
+    assert survey_cache.get("103", "v1", "details") == payload
+
+    survey_cache.clear()
+    assert os.listdir(tmp_path) == []
+
+
+def test_survey_versions_and_config(tmp_path: str) -> None:
+    sm_surveys_df = pd.DataFrame(
+        [
+            {"id": "101", "date_modified": "2021-01-01T00:00:00", "response_count": 3},
+            {"id": "102", "date_modified": None, "response_count": 0},
+        ]
+    )
+    assert survey_versions(sm_surveys_df) == {"101": "2021-01-01T00:00:00|3"}
+    assert survey_versions(sm_surveys_df[["id"]]) == {}
+
+    assert get_survey_cache({}) is None
+    assert get_survey_cache({"SURVEY_MONKEY_CACHE_DIR": ""}) is None
+    assert (
+        get_survey_cache(
+            {
+                "SURVEY_MONKEY_CACHE_DIR": str(tmp_path),
+                "SURVEY_MONKEY_CACHE_DISABLED": "true",
+            }
+        )
+        is None
+    )
+    survey_cache = get_survey_cache(
+        {
+            "SURVEY_MONKEY_CACHE_DIR": str(tmp_path),
+            "SURVEY_MONKEY_CACHE_MAX_MEGABYTES": "2",
+        }
+    )
+    assert survey_cache is not None
+    assert survey_cache.directory == str(tmp_path)
+    assert survey_cache.max_bytes == 2 * 1024 * 1024